@@ -0,0 +1,56 @@
+"""Benchmarks of the performance critical parts of the API.
+
+Every benchmark is a module run from the root of the repository, for example
+``ENV=DEV python -m Benchmarks.import_content``. The benchmarks that need a
+database create a test database for the run and destroy it afterwards, so
+they never touch the data of the configured database.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import django
+
+
+def setup() -> None:
+    """Configure Django like ``manage.py`` does."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Bloggity.settings.local")
+    django.setup()
+
+
+@contextmanager
+def test_database() -> Iterator[None]:
+    """Run the block against a new test database, which is destroyed
+    afterwards."""
+    from django.db import connection
+
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+class Timer:
+    """Measures the wall clock seconds a block takes."""
+
+    def __enter__(self) -> "Timer":
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.seconds = time.perf_counter() - self.start
+
+
+def report(name: str, count: int, seconds: float, unit: str = "rows") -> float:
+    """Print the throughput of a benchmark.
+
+    :return: The throughput per minute.
+    """
+    per_minute = count / seconds * 60 if seconds else float("inf")
+    print(f"{name}: {count:,} {unit} in {seconds:.2f} s, {per_minute:,.0f} {unit}/min")
+    return per_minute
@@ -0,0 +1,198 @@
+"""Load test of the reads of posts and comments under WSGI and ASGI.
+
+Serves the same mix of authenticated list and retrieve requests through
+Django's WSGI handler, with a pool of threads like the threads of a WSGI
+server, and through its ASGI handler, with concurrent tasks on one event
+loop like an ASGI server, where the views of posts and comments are
+asynchronous. Both run in this process against a test database, without a
+network server in front, and the latency of every request is reported as the
+50th and 99th percentiles together with the throughput at every level of
+concurrency.
+
+Run with ``ENV=DEV python -m Benchmarks.async_reads``.
+"""
+
+import argparse
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import Any, Callable, Mapping
+
+from Benchmarks import Timer, setup, test_database
+
+
+def create_rows(posts: int, comments: int) -> tuple[list[str], str]:
+    """Create the posts with their comments and a user reading them.
+
+    :return: The paths of the requests and the access token of the user.
+    """
+    from model_bakery import baker
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from Posts.excerpts import make_excerpt
+    from Posts.models import Comment, Post
+    from Users.models import CustomUser
+
+    user = baker.make(CustomUser)
+    content = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>" * 5
+    created = Post.objects.bulk_create(
+        Post(
+            author_id=user,
+            title=f"Post number {number}",
+            content=content,
+            excerpt=make_excerpt(content),
+        )
+        for number in range(posts)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author_id=user, content="A comment.")
+        for post in created
+        for _ in range(comments)
+    )
+    paths = ["/api/posts/"]
+    for post in created[:20]:
+        paths.append(f"/api/posts/{post.id}/")
+        paths.append(f"/api/posts/{post.id}/comments/")
+    return paths, str(AccessToken.for_user(user))
+
+
+def percentiles(latencies: list[float]) -> tuple[float, float]:
+    """Return the 50th and 99th percentiles of the latencies, in
+    milliseconds."""
+    cut_points = statistics.quantiles(latencies, n=100, method="inclusive")
+    return cut_points[49] * 1000, cut_points[98] * 1000
+
+
+def run_wsgi(paths: list[str], token: str, concurrency: int, count: int) -> tuple:
+    """Serve the requests with the WSGI handler from a pool of threads.
+
+    :return: The latencies of the requests and the seconds of the run.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    application = get_wsgi_application()
+
+    def start_response(status: str, headers: list, exc_info=None) -> Callable:
+        if not status.startswith("200"):
+            raise RuntimeError(f"Request failed with {status}.")
+        return lambda data: None
+
+    def request(number: int) -> float:
+        start = time.perf_counter()
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": paths[number % len(paths)],
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        response = application(environ, start_response)
+        b"".join(response)
+        response.close()
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as executor, Timer() as timer:
+        latencies = list(executor.map(request, range(count)))
+    return latencies, timer.seconds
+
+
+def run_asgi(paths: list[str], token: str, concurrency: int, count: int) -> tuple:
+    """Serve the requests with the ASGI handler from concurrent tasks, with
+    the asynchronous views.
+
+    :return: The latencies of the requests and the seconds of the run.
+    """
+    from django.core.asgi import get_asgi_application
+    from django.test import override_settings
+    from django.urls import get_resolver
+
+    from Mixins.async_reads import get_async_urlpatterns
+
+    application = get_asgi_application()
+    urlconf = ModuleType("async_urls")
+    setattr(urlconf, "urlpatterns", get_async_urlpatterns(get_resolver().url_patterns))
+
+    async def request(number: int) -> float:
+        start = time.perf_counter()
+        path = paths[number % len(paths)]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("localhost", 80),
+        }
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        disconnected = asyncio.get_running_loop().create_future()
+
+        async def receive() -> dict:
+            # The client never disconnects, Django cancels the wait once the
+            # response is sent.
+            if messages:
+                return messages.pop()
+            return await disconnected
+
+        async def send(message: Mapping[str, Any]) -> None:
+            if message["type"] == "http.response.start" and message["status"] != 200:
+                raise RuntimeError(f"Request failed with {message['status']}.")
+
+        await application(scope, receive, send)
+        return time.perf_counter() - start
+
+    async def worker(numbers: range) -> list[float]:
+        return [await request(number) for number in numbers]
+
+    async def main() -> list[float]:
+        results = await asyncio.gather(
+            *(worker(range(start, count, concurrency)) for start in range(concurrency))
+        )
+        return [latency for latencies in results for latency in latencies]
+
+    with override_settings(ROOT_URLCONF=urlconf), Timer() as timer:
+        latencies = asyncio.run(main())
+    return latencies, timer.seconds
+
+
+def main() -> int:
+    """Run the load test at every level of concurrency."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--comments", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    options = parser.parse_args()
+
+    setup()
+    with test_database():
+        paths, token = create_rows(options.posts, options.comments)
+        for concurrency in options.concurrency:
+            for name, run in (("WSGI", run_wsgi), ("ASGI", run_asgi)):
+                latencies, seconds = run(paths, token, concurrency, options.requests)
+                p50, p99 = percentiles(latencies)
+                print(
+                    f"{name} x {concurrency}: p50 {p50:.1f} ms, p99 {p99:.1f} ms, "
+                    f"{len(latencies) / seconds:,.0f} requests/s"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""Benchmark of the encodings and levels of the compression middleware.
+
+Compresses a list response of posts with their comments, rendered like the
+responses of ``api/posts/?include_comments=true``, with every encoding at
+several levels, once as a whole and once streamed in the 64 KiB pieces of
+the export endpoint, and reports the compression ratio and CPU time of each,
+to tune the levels of the RESPONSE_COMPRESSION setting.
+
+Run with ``ENV=DEV python -m Benchmarks.compression``.
+"""
+
+import argparse
+import sys
+import time
+
+from Benchmarks import setup
+from Benchmarks.json_rendering import make_page
+
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 6, 11], "zstd": [1, 3, 9, 19]}
+
+
+def compress(encoder_class, level: int, chunks: list[bytes]) -> tuple[int, float]:
+    """Compress chunks like the middleware, flushing after every chunk.
+
+    :return: The compressed size and the CPU seconds it took.
+    """
+    start = time.process_time()
+    encoder = encoder_class(level)
+    size = sum(len(encoder.compress(chunk) + encoder.flush()) for chunk in chunks)
+    size += len(encoder.finish())
+    return size, time.process_time() - start
+
+
+def main() -> int:
+    """Run the benchmark for every encoding and level."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=1000)
+    options = parser.parse_args()
+
+    setup()
+    from middleware.compression import get_encoders
+    from Renderers.fast_json import FastJSONRenderer
+
+    content = FastJSONRenderer().render(make_page(options.posts))
+    starts = range(0, len(content), 64 * 1024)
+    streamed = [
+        content[start:end] for start, end in zip(starts, [*starts[1:], len(content)])
+    ]
+    print(f"{options.posts:,} posts, {len(content) / 1024:,.0f} KiB")
+    for encoding, encoder_class in get_encoders().items():
+        for level in LEVELS[encoding]:
+            whole_size, whole_seconds = compress(encoder_class, level, [content])
+            stream_size, stream_seconds = compress(encoder_class, level, streamed)
+            print(
+                f"{encoding:>4} {level:>2}: "
+                f"ratio {len(content) / whole_size:5.1f}, "
+                f"{whole_seconds * 1000:7.2f} ms CPU, "
+                f"streamed ratio {len(content) / stream_size:5.1f}, "
+                f"{stream_seconds * 1000:7.2f} ms CPU"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
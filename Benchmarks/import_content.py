@@ -0,0 +1,96 @@
+"""Benchmark of the import_content management command.
+
+Generates users, posts and comments files and imports them into a test
+database with COPY, reporting the rows imported per minute. Exits with
+status 1 if the throughput is below the expected minimum.
+
+Run with ``ENV=DEV python -m Benchmarks.import_content``.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from Benchmarks import Timer, report, setup, test_database
+
+
+def write_files(directory: Path, options: argparse.Namespace) -> dict[str, Path]:
+    """Write the files to import, posts as JSON Lines and the others as CSV."""
+    from django.contrib.auth.hashers import make_password
+
+    # Users migrated from another Django site keep their hashed passwords,
+    # hashing plain text passwords is measured separately.
+    password = "benchmark" if options.plain_passwords else make_password("benchmark")
+    paths = {
+        "users": directory / "users.csv",
+        "posts": directory / "posts.jsonl",
+        "comments": directory / "comments.csv",
+    }
+    with paths["users"].open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ["id", "username", "email", "password", "first_name", "last_name"]
+        )
+        for user_id in range(options.users):
+            writer.writerow(
+                [user_id, f"user{user_id}", f"user{user_id}@example.com", password]
+                + ["First", "Last"]
+            )
+    paragraph = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>"
+    with paths["posts"].open("w") as file:
+        for post_id in range(options.posts):
+            post = {
+                "id": post_id,
+                "author_id": post_id % options.users,
+                "title": f"Post number {post_id}",
+                "content": paragraph * 10,
+                "publish_date": "2020-01-01T00:00:00+00:00",
+            }
+            file.write(json.dumps(post) + "\n")
+    with paths["comments"].open("w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["post", "author_id", "content"])
+        for comment_id in range(options.comments):
+            writer.writerow(
+                [comment_id % options.posts, comment_id % options.users, paragraph]
+            )
+    return paths
+
+
+def main() -> int:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=100000)
+    parser.add_argument("--comments", type=int, default=300000)
+    parser.add_argument("--min-rows-per-minute", type=int, default=200000)
+    parser.add_argument(
+        "--plain-passwords",
+        action="store_true",
+        help="Hash the passwords of the users during the import.",
+    )
+    options = parser.parse_args()
+
+    setup()
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory, test_database():
+        paths = write_files(Path(directory), options)
+        with Timer() as timer:
+            call_command(
+                "import_content", **{name: str(path) for name, path in paths.items()}
+            )
+
+    rows = options.users + options.posts + options.comments
+    per_minute = report("import_content", rows, timer.seconds)
+    if per_minute < options.min_rows_per_minute:
+        print(f"Below the expected {options.min_rows_per_minute:,} rows/min.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
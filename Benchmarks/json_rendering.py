@@ -0,0 +1,95 @@
+"""Benchmark of the orjson renderer and parser against DRF's JSON renderer
+and parser.
+
+Renders and parses list responses of posts with their comments, shaped like
+the responses of the api/posts/ endpoint, at several numbers of posts, and
+checks that both renderers write the same bytes.
+
+Run with ``ENV=DEV python -m Benchmarks.json_rendering``.
+"""
+
+import argparse
+import io
+import sys
+import timeit
+
+from Benchmarks import setup
+
+
+def make_page(count: int) -> dict:
+    """Return a page of posts with three comments each, as serialized by
+    PostWithCommentsSerializer."""
+    content = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing élit.</p>" * 5
+    return {
+        "next": "http://localhost:8000/api/posts/?cursor=eyJ2IjogWyIyMDI0In0%3D",
+        "previous": None,
+        "results": [
+            {
+                "id": post_id,
+                "title": f"Post number {post_id}",
+                "content": content,
+                "author_id": 1,
+                "publish_date": "2024-01-02T03:04:05.678901Z",
+                "comment_count": 3,
+                "comments": [
+                    {
+                        "id": post_id * 3 + number,
+                        "author_id": 2,
+                        "post": post_id,
+                        "content": "A comment.",
+                        "publish_date": "2024-01-02T03:04:05.678901Z",
+                    }
+                    for number in range(3)
+                ],
+            }
+            for post_id in range(count)
+        ],
+    }
+
+
+def best_time(function, repeat: int) -> float:
+    """Return the fastest of several runs of a function, in seconds."""
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+
+def main() -> int:
+    """Run the benchmark for every size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from Renderers.fast_json import FastJSONParser, FastJSONRenderer
+
+    identical = True
+    for count in options.sizes:
+        page = make_page(count)
+        rendered = JSONRenderer().render(page)
+        identical &= FastJSONRenderer().render(page) == rendered
+        results = {}
+        for name, function in (
+            ("render json", lambda: JSONRenderer().render(page)),
+            ("render orjson", lambda: FastJSONRenderer().render(page)),
+            ("parse json", lambda: JSONParser().parse(io.BytesIO(rendered))),
+            ("parse orjson", lambda: FastJSONParser().parse(io.BytesIO(rendered))),
+        ):
+            results[name] = best_time(function, options.repeat)
+        print(
+            f"{count:,} posts ({len(rendered) / 1024:,.0f} KiB): "
+            f"render {results['render json'] * 1000:.2f} ms -> "
+            f"{results['render orjson'] * 1000:.2f} ms "
+            f"({results['render json'] / results['render orjson']:.1f}x), "
+            f"parse {results['parse json'] * 1000:.2f} ms -> "
+            f"{results['parse orjson'] * 1000:.2f} ms "
+            f"({results['parse json'] / results['parse orjson']:.1f}x)"
+        )
+    print("Identical output." if identical else "DIFFERENT output.")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Benchmark of the per-request overhead of the logging middleware.
+
+Runs requests through the logging middleware as it was before, which parsed
+the User-Agent twice and wrote a formatted line synchronously with a
+``FileHandler``, and through the current one, which parses each distinct
+User-Agent once and hands a structured record to ``QueuedFileHandler``.
+The view returns a prepared response, so only the middleware is measured.
+Both write to a temporary file.
+
+Run with ``ENV=DEV python -m Benchmarks.logging_middleware``.
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from Benchmarks import Timer, setup
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like "
+    "Gecko) Chrome/{version}.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:{version}.0) Gecko/20100101 "
+    "Firefox/{version}.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/{version}.0 Mobile/15E148 Safari/604.1",
+    "python-requests/2.{version}.0",
+]
+
+
+class LegacyLoggingMiddleWare:
+    """The logging middleware before the structured request log."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        import user_agents
+
+        today = date.today()
+        start_time = time.time()
+        response = self.get_response(request)
+        end_time = time.time()
+        response_time = end_time - start_time
+        user_agent = request.META.get("HTTP_USER_AGENT", "")
+        browser_type = user_agents.parse(user_agent).browser.family
+        browser_version = user_agents.parse(user_agent).browser.version_string
+
+        logger = logging.getLogger("benchmark.legacy")
+        logger.warning(
+            f"{today} - user_id: {request.user.id}, "
+            f"user: {request.user.username}, "
+            f"browser: {browser_type}/{browser_version}, "
+            f"response time: {response_time} seconds"
+        )
+        return response
+
+
+def make_requests(count: int) -> list:
+    """Return requests from a few dozen distinct User-Agents."""
+    from django.contrib.auth.models import AnonymousUser
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    user_agents = [
+        user_agent.format(version=version)
+        for user_agent in USER_AGENTS
+        for version in range(100, 110)
+    ]
+    requests = []
+    for number in range(count):
+        request = factory.get(
+            "/api/posts/", HTTP_USER_AGENT=user_agents[number % len(user_agents)]
+        )
+        request.user = AnonymousUser()
+        requests.append(request)
+    return requests
+
+
+def run(middleware, requests: list) -> float:
+    """Return the microseconds per request of a middleware."""
+    with Timer() as timer:
+        for request in requests:
+            middleware(request)
+    return timer.seconds / len(requests) * 1_000_000
+
+
+def main() -> int:
+    """Run the benchmark for both middlewares."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    options = parser.parse_args()
+
+    setup()
+    from django.http import HttpResponse
+
+    from middleware.logging import JSONFormatter, LoggingMiddleWare, QueuedFileHandler
+
+    response = HttpResponse()
+    requests = make_requests(options.requests)
+    with tempfile.TemporaryDirectory() as directory:
+        legacy_logger = logging.getLogger("benchmark.legacy")
+        legacy_logger.propagate = False
+        legacy_handler = logging.FileHandler(Path(directory) / "legacy.log")
+        legacy_logger.addHandler(legacy_handler)
+
+        current_logger = logging.getLogger("middleware.logging")
+        current_logger.handlers = []
+        current_logger.propagate = False
+        current_logger.setLevel(logging.INFO)
+        current_handler = QueuedFileHandler(str(Path(directory) / "current.log"))
+        current_handler.setFormatter(JSONFormatter())
+        current_logger.addHandler(current_handler)
+
+        before = run(LegacyLoggingMiddleWare(lambda request: response), requests)
+        after = run(LoggingMiddleWare(lambda request: response), requests)
+        with Timer() as drain:
+            current_handler.close()
+        legacy_handler.close()
+
+    print(
+        f"{options.requests:,} requests: {before:.1f} us -> {after:.1f} us per "
+        f"request ({before / after:.1f}x), background writer drained in "
+        f"{drain.seconds:.2f} s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
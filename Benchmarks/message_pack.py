@@ -0,0 +1,72 @@
+"""Benchmark of the MessagePack renderer and parser against the JSON ones.
+
+Renders and parses the same pages of posts as ``Benchmarks.json_rendering``
+with DRF's JSON renderer and parser, the orjson ones and the MessagePack
+ones, and compares the size of the payloads, raw and compressed with gzip.
+Also checks that the MessagePack payload decodes to the same data as the
+JSON one.
+
+Run with ``ENV=DEV python -m Benchmarks.message_pack``.
+"""
+
+import argparse
+import gzip
+import io
+import sys
+
+from Benchmarks import setup
+from Benchmarks.json_rendering import best_time, make_page
+
+
+def main() -> int:
+    """Run the benchmark for every size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    options = parser.parse_args()
+
+    setup()
+    from rest_framework.parsers import JSONParser
+    from rest_framework.renderers import JSONRenderer
+
+    from Renderers.fast_json import FastJSONParser, FastJSONRenderer
+    from Renderers.message_pack import MessagePackParser, MessagePackRenderer
+
+    identical = True
+    for count in options.sizes:
+        page = make_page(count)
+        json_content = JSONRenderer().render(page)
+        packed = MessagePackRenderer().render(page)
+        identical &= MessagePackParser().parse(io.BytesIO(packed)) == (
+            JSONParser().parse(io.BytesIO(json_content))
+        )
+        results = {}
+        for name, function in (
+            ("render json", lambda: JSONRenderer().render(page)),
+            ("render orjson", lambda: FastJSONRenderer().render(page)),
+            ("render msgpack", lambda: MessagePackRenderer().render(page)),
+            ("parse json", lambda: JSONParser().parse(io.BytesIO(json_content))),
+            ("parse orjson", lambda: FastJSONParser().parse(io.BytesIO(json_content))),
+            ("parse msgpack", lambda: MessagePackParser().parse(io.BytesIO(packed))),
+        ):
+            results[name] = best_time(function, options.repeat) * 1000
+        print(
+            f"{count:,} posts: "
+            f"size {len(json_content) / 1024:,.1f} KiB -> "
+            f"{len(packed) / 1024:,.1f} KiB "
+            f"({1 - len(packed) / len(json_content):.0%} smaller), "
+            f"gzipped {len(gzip.compress(json_content)) / 1024:,.1f} KiB -> "
+            f"{len(gzip.compress(packed)) / 1024:,.1f} KiB"
+        )
+        for action in ("render", "parse"):
+            print(
+                f"  {action} json {results[f'{action} json']:.2f} ms, "
+                f"orjson {results[f'{action} orjson']:.2f} ms, "
+                f"msgpack {results[f'{action} msgpack']:.2f} ms"
+            )
+    print("Identical data." if identical else "DIFFERENT data.")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""Micro-benchmark of the values serializers against the model serializers.
+
+Serializes the same posts and comments with both, including the queries,
+and checks that the rendered JSON is identical.
+
+Run with ``ENV=DEV python -m Benchmarks.serializers``.
+"""
+
+import argparse
+import sys
+
+from Benchmarks import Timer, setup, test_database
+
+
+def create_rows(count: int) -> None:
+    """Create the posts, and a comment for every post."""
+    from model_bakery import baker
+
+    from Posts.excerpts import make_excerpt
+    from Posts.models import Comment, Post
+    from Users.models import CustomUser
+
+    user = baker.make(CustomUser)
+    content = "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit.</p>" * 5
+    posts = Post.objects.bulk_create(
+        Post(
+            author_id=user,
+            title=f"Post number {number}",
+            content=content,
+            excerpt=make_excerpt(content),
+        )
+        for number in range(count)
+    )
+    Comment.objects.bulk_create(
+        Comment(post=post, author_id=user, content="A comment.") for post in posts
+    )
+
+
+def compare(name: str, serializer_class: type, queryset, count: int) -> bool:
+    """Time both serializers on the queryset and print the speedup.
+
+    :return: True if both rendered the same JSON.
+    """
+    from rest_framework.renderers import JSONRenderer
+
+    from Mixins.values_serializers import ValuesSerializer
+
+    with Timer() as regular_timer:
+        regular = serializer_class(list(queryset.all()), many=True).data
+    with Timer() as values_timer:
+        values = ValuesSerializer(serializer_class()).serialize(queryset.all())
+
+    renderer = JSONRenderer()
+    identical = renderer.render(regular) == renderer.render(values)
+    print(
+        f"{name} x {count:,}: model serializer {regular_timer.seconds:.3f} s, "
+        f"values serializer {values_timer.seconds:.3f} s, "
+        f"{regular_timer.seconds / values_timer.seconds:.1f}x faster, "
+        f"{'identical' if identical else 'DIFFERENT'} output"
+    )
+    return identical
+
+
+def main() -> int:
+    """Run the benchmark for every size."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    options = parser.parse_args()
+
+    setup()
+    from Posts.models import Comment, Post
+    from Posts.serializers import (
+        CommentSerializer,
+        PostSerializer,
+        PostWithCommentsSerializer,
+    )
+
+    identical = True
+    with test_database():
+        for count in options.sizes:
+            Post.objects.all().delete()
+            create_rows(count)
+            posts = Post.objects.defer("search_vector").order_by("id")
+            identical &= compare("PostSerializer", PostSerializer, posts, count)
+            identical &= compare(
+                "CommentSerializer",
+                CommentSerializer,
+                Comment.objects.order_by("id"),
+                count,
+            )
+            identical &= compare(
+                "PostWithCommentsSerializer",
+                PostWithCommentsSerializer,
+                posts.prefetch_related("comments"),
+                count,
+            )
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""This module provides the warm-up and memory reports of gunicorn workers,
+used by the hooks of ``gunicorn.conf.py``."""
+
+import asyncio
+import io
+import resource
+from pathlib import Path
+from typing import Any, Callable
+
+# Fields of /proc/self/smaps_rollup reported by memory_usage, in kB.
+SHARED_FIELDS = ("Shared_Clean", "Shared_Dirty")
+PRIVATE_FIELDS = ("Private_Clean", "Private_Dirty")
+
+
+def get_warm_up_host() -> str:
+    """Return a host the warm-up request may be sent to, the first allowed
+    host without wildcards."""
+    from django.conf import settings
+
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip("*.")
+        if host:
+            return host
+    return "localhost"
+
+
+def warm_up(application: Callable, path: str) -> int:
+    """Send a GET request to the application in the process, so that the
+    lazily built URL resolvers, serializers, renderers and the database
+    connection are ready before the first request of a client.
+
+    :param application: The WSGI or ASGI application.
+    :param path: The path of the request.
+    :return: The status code of the response.
+    """
+    host = get_warm_up_host()
+    if asyncio.iscoroutinefunction(application) or asyncio.iscoroutinefunction(
+        getattr(application, "__call__", None)
+    ):
+        return asyncio.run(warm_up_asgi(application, path, host))
+    return warm_up_wsgi(application, path, host)
+
+
+def warm_up_wsgi(application: Callable, path: str, host: str) -> int:
+    """Send the warm-up request to a WSGI application."""
+    statuses: list[int] = []
+
+    def start_response(status: str, headers: list, exc_info: Any = None) -> Callable:
+        statuses.append(int(status.split()[0]))
+        return lambda data: None
+
+    response = application(
+        {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": host,
+            "HTTP_USER_AGENT": "warm-up",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.errors": io.StringIO(),
+            "wsgi.url_scheme": "http",
+        },
+        start_response,
+    )
+    try:
+        b"".join(response)
+    finally:
+        response.close()
+    return statuses[0]
+
+
+async def warm_up_asgi(application: Callable, path: str, host: str) -> int:
+    """Send the warm-up request to an ASGI application."""
+    statuses: list[int] = []
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+    disconnected = asyncio.get_running_loop().create_future()
+
+    async def receive() -> dict:
+        # The request never disconnects, the application stops waiting for
+        # it once the response is sent.
+        if messages:
+            return messages.pop()
+        return await disconnected
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    await application(
+        {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", host.encode()), (b"user-agent", b"warm-up")],
+            "client": ("127.0.0.1", 0),
+            "server": (host, 80),
+        },
+        receive,
+        send,
+    )
+    return statuses[0]
+
+
+def memory_usage() -> dict[str, float]:
+    """Return the resident memory of the process in MiB, split into the
+    memory shared with the other workers and its private memory where the
+    system reports it, as Linux does.
+
+    Pages of the master are shared until a worker writes to them, so the
+    shared memory shows what copy-on-write saves.
+    """
+    rollup = Path("/proc/self/smaps_rollup")
+    if not rollup.exists():
+        # ru_maxrss is the peak resident memory, in kB on Linux but in bytes
+        # on macOS, only the Linux unit is assumed.
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+    fields: dict[str, int] = {}
+    for line in rollup.read_text().splitlines()[1:]:
+        name, value, *_ = line.split()
+        fields[name.rstrip(":")] = int(value)
+    return {
+        "rss": fields["Rss"] / 1024,
+        "shared": sum(fields.get(name, 0) for name in SHARED_FIELDS) / 1024,
+        "private": sum(fields.get(name, 0) for name in PRIVATE_FIELDS) / 1024,
+    }
+
+
+def format_memory_usage(usage: dict[str, float]) -> str:
+    """Format the memory usage of a process for the log."""
+    return ", ".join(f"{name} {mebibytes:.1f} MiB" for name, mebibytes in usage.items())
@@ -2,6 +2,9 @@
 
 from datetime import timedelta
 from pathlib import Path
+from typing import Any
+
+from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -14,6 +17,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "Users",
     "Posts",
     "rest_framework",
@@ -23,6 +27,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "middleware.metrics.MetricsMiddleware",
+    "middleware.compression.CompressionMiddleware",
+    "middleware.queries.QueryInstrumentationMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -34,6 +41,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "Bloggity.urls"
 
+# Serve the reads of posts and comments with asynchronous views when the
+# project runs under ASGI, see Mixins.async_reads.
+ASYNC_READS = config("ASYNC_READS", default=False, cast=bool)
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -96,6 +107,42 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# Cache of rendered post responses, see Caching.response_cache. The shared
+# tier is the cache alias named by SHARED_CACHE, without it responses are only
+# cached in the process. With a VERSION_TIMEOUT of 0 every process reads the
+# versions of the shared tier on every lookup and sees invalidations at once.
+# A positive value keeps the versions in the process for that many seconds,
+# saving the round trip of in-process hits, but delays the invalidations of
+# other processes by as much.
+RESPONSE_CACHE: dict[str, Any] = {
+    "MAX_ENTRIES": 1024,
+    "TIMEOUT": 300,
+    "SHARED_CACHE": None,
+    "VERSION_TIMEOUT": 0,
+}
+
+# Compression of responses, see middleware.compression. LEVELS lists the
+# offered encodings with their level, the first ones are preferred when the
+# client accepts several equally. MAX_RANDOM_BYTES bounds the random padding
+# against BREACH, 0 turns the mitigation off.
+RESPONSE_COMPRESSION: dict[str, Any] = {
+    "MIN_LENGTH": 1024,
+    "LEVELS": {"zstd": 3, "br": 4, "gzip": 6},
+    "MAX_RANDOM_BYTES": 100,
+}
+
+# Instrumentation of the queries of requests, see middleware.queries. A
+# request running one statement at least N_PLUS_ONE_THRESHOLD times is
+# logged as a possible N+1 query, None turns the check off.
+QUERY_INSTRUMENTATION = {
+    "N_PLUS_ONE_THRESHOLD": 10,
+}
+
+# The bearer token Prometheus has to send to read the metrics at /metrics,
+# see Metrics.prometheus. Without a token the metrics are only served with
+# DEBUG on.
+METRICS_TOKEN: str | None = None
+
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -104,6 +151,19 @@ REST_FRAMEWORK = {
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    # The same JSON as DRF's JSONRenderer and JSONParser, faster with orjson,
+    # and MessagePack for clients that send application/msgpack.
+    "DEFAULT_RENDERER_CLASSES": [
+        "Renderers.fast_json.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "Renderers.message_pack.MessagePackRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "Renderers.fast_json.FastJSONParser",
+        "Renderers.message_pack.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
 SPECTACULAR_SETTINGS = {
@@ -17,6 +17,19 @@ DATABASES = {
 
 STATIC_URL = "/static_files/"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Local stand-in for the shared tier of the response cache.
+    "responses": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "responses",
+    },
+}
+
+RESPONSE_CACHE = {**RESPONSE_CACHE, "SHARED_CACHE": "responses"}  # noqa: F405
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
@@ -25,7 +38,17 @@ LOGGING = {
             "level": "DEBUG",
             "class": "logging.FileHandler",
             "filename": "./dev-logs.log",
-        }
+        },
+        # Lines of JSON, written by a background thread to their own file,
+        # apart from the plain text records of the file handler.
+        "requests": {
+            "class": "middleware.logging.QueuedFileHandler",
+            "filename": "./dev-requests.log",
+            "formatter": "json",
+        },
+    },
+    "formatters": {
+        "json": {"()": "middleware.logging.JSONFormatter"},
     },
     "loggers": {
         "django": {
@@ -33,5 +56,10 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": True,
         },
+        "middleware.logging": {
+            "handlers": ["requests"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
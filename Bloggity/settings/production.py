@@ -1,25 +1,41 @@
 """Production Django settings."""
 
-from GoogleClouds.secrets_utils import GoogleCloudsSecretManager
+from GoogleClouds.secrets_utils import get_secret_manager
 
 from .base import *  # noqa
 
-secretmanager = GoogleCloudsSecretManager()
+secret_manager = get_secret_manager()
+
+# Fetched concurrently, or read from the cache of recent restarts.
+secrets = secret_manager.access_secrets(
+    [
+        "DJANGO_SECRET_KEY",
+        "DB_NAME",
+        "DB_USER",
+        "DB_PASS",
+        "DB_HOST",
+        "DB_PORT",
+        "ALLOWED_HOSTS",
+        "CORS_ALLOWED_ORIGINS",
+        "CORS_ALLOW_METHODS",
+        "CORS_ALLOW_HEADERS",
+    ]
+)
 
 DEBUG = False
 
-SECRET_KEY = secretmanager.access_secret("DJANGO_SECRET_KEY")
+SECRET_KEY = secrets["DJANGO_SECRET_KEY"]
 
 INSTALLED_APPS += ["sslserver"]  # noqa
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql_psycopg2",
-        "NAME": secretmanager.access_secret("DB_NAME"),
-        "USER": secretmanager.access_secret("DB_USER"),
-        "PASSWORD": secretmanager.access_secret("DB_PASS"),
-        "HOST": secretmanager.access_secret("DB_HOST"),
-        "PORT": secretmanager.access_secret("DB_PORT"),
+        "NAME": secrets["DB_NAME"],
+        "USER": secrets["DB_USER"],
+        "PASSWORD": secrets["DB_PASS"],
+        "HOST": secrets["DB_HOST"],
+        "PORT": secrets["DB_PORT"],
         "CONN_MAX_AGE": 300,
     }
 }
@@ -36,7 +52,17 @@ LOGGING = {
             "level": "WARNING",
             "class": "logging.FileHandler",
             "filename": "./production-logs.log",
-        }
+        },
+        # Lines of JSON, written by a background thread to their own file,
+        # apart from the plain text records of the file handler.
+        "requests": {
+            "class": "middleware.logging.QueuedFileHandler",
+            "filename": "./production-requests.log",
+            "formatter": "json",
+        },
+    },
+    "formatters": {
+        "json": {"()": "middleware.logging.JSONFormatter"},
     },
     "loggers": {
         "django": {
@@ -44,16 +70,28 @@ LOGGING = {
             "level": "WARNING",
             "propagate": True,
         },
+        "middleware.logging": {
+            "handlers": ["requests"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
-ALLOWED_HOSTS = secretmanager.access_secret("ALLOWED_HOSTS")
+ALLOWED_HOSTS = secrets["ALLOWED_HOSTS"]
+
+CORS_ALLOWED_ORIGINS = secrets["CORS_ALLOWED_ORIGINS"]
 
-CORS_ALLOWED_ORIGINS = secretmanager.access_secret("CORS_ALLOWED_ORIGINS")
+CORS_ALLOW_METHODS = secrets["CORS_ALLOW_METHODS"]
 
-CORS_ALLOW_METHODS = secretmanager.access_secret("CORS_ALLOW_METHODS")
+CORS_ALLOW_HEADERS = secrets["CORS_ALLOW_HEADERS"]
 
-CORS_ALLOW_HEADERS = secretmanager.access_secret("CORS_ALLOW_HEADERS")
+# The metrics endpoint stays off, with the METRICS_TOKEN of the base settings,
+# until the secret is created.
+try:
+    METRICS_TOKEN = secret_manager.access_secrets(["METRICS_TOKEN"])["METRICS_TOKEN"]
+except secret_manager.not_found_errors:
+    pass
 
 SECURE_SSL_REDIRECT = False
 SESSION_COOKIE_SECURE = True
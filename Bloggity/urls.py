@@ -19,6 +19,7 @@ from django.urls import include, path
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from rest_framework.routers import DefaultRouter
 
+from Metrics.prometheus import metrics_view
 from Posts.views import PostViewSet
 from Users.views import UserViewSet
 
@@ -33,4 +34,5 @@ urlpatterns = [
     path("api/posts/", include("Posts.urls")),
     path("api/users/", include("Users.urls")),
     path("api/token/", include("Authentication.urls")),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,362 @@
+"""This module provides the cache of rendered API responses.
+
+Responses are cached as their rendered bytes together with their headers, in
+two tiers: an in-process LRU tier, and an optional shared tier, any Django
+cache backend, through which processes share the responses they rendered.
+
+Every cached resource, for example a post, has a version that is part of
+the keys of its responses. Invalidating a resource replaces its version, so
+all of its responses become unreachable at once, and a response rendered
+from data read before the invalidation is stored under the old version
+where it is never found. With a shared tier the versions live in the shared
+cache, so an invalidation in one process is seen at once by every process.
+A positive VERSION_TIMEOUT trades that for fewer round trips: every process
+then keeps the versions it read for that many seconds, so that a hit of the
+in-process tier answers without any round trip, and the other processes
+only see an invalidation within that time.
+
+Responses missing from the cache are rebuilt by a single caller per key:
+threads of a process wait for the thread rebuilding it, and with a shared
+tier processes wait for the process holding the rebuild lock of the key.
+Waiting callers are answered with the expired response of the key instead,
+if the process still has it.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from functools import cache
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db.models import Model
+
+from Caching.single_flight import SingleFlight
+from Metrics.prometheus import RESPONSE_CACHE_LOOKUPS
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """The rendered content and the headers of a successful response."""
+
+    content: bytes
+    headers: tuple[tuple[str, str], ...]
+
+
+class LRUCache:
+    """A thread safe mapping that evicts its least recently used entries
+    beyond a maximum number of entries."""
+
+    def __init__(self, max_entries: int) -> None:
+        """
+        :param max_entries: The maximum number of entries to keep.
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the value of a key and mark it as recently used."""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key: str, value: Any) -> None:
+        """Set the value of a key, evicting the least recently used entry if
+        the cache is full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def add(self, key: str, value: Any) -> Any:
+        """Set the value of a key unless it is already set.
+
+        :return: The value of the key after the call.
+        """
+        with self._lock:
+            self._entries.setdefault(key, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return self._entries[key]
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Two tier cache of rendered responses, grouped by resource.
+
+    Responses are looked up by a key from ``make_key``, which includes the
+    current version of the resource, so the key has to be made before the
+    response is rendered and the same key used to store it.
+    """
+
+    # Seconds between checks of the shared tier while another process
+    # rebuilds a response.
+    poll_interval = 0.05
+
+    def __init__(
+        self,
+        max_entries: int,
+        timeout: int,
+        shared_cache: BaseCache | None = None,
+        lock_timeout: int = 5,
+        version_timeout: float = 0,
+    ) -> None:
+        """
+        :param max_entries: The maximum number of responses, and versions, of
+            the in-process tier.
+        :param timeout: Number of seconds a response is cached.
+        :param shared_cache: The cache backend of the shared tier, or None to
+            only cache in the process.
+        :param lock_timeout: The maximum number of seconds to wait for
+            another process rebuilding a response.
+        :param version_timeout: Number of seconds the versions read from the
+            shared tier are kept in the process, 0 to read them every time.
+        """
+        self.timeout = timeout
+        self.shared_cache = shared_cache
+        self.lock_timeout = lock_timeout
+        self.version_timeout = version_timeout
+        self.local_cache = LRUCache(max_entries)
+        self.local_versions = LRUCache(max_entries)
+        self.flights = SingleFlight()
+        self.counters: Counter[str] = Counter()
+        self._counters_lock = threading.Lock()
+
+    def make_key(self, resource: str, variant: str) -> str:
+        """Return the key of a response of a resource.
+
+        :param resource: The cached resource, see ``get_resource``.
+        :param variant: Everything else the response depends on, such as the
+            URL and the media type.
+        """
+        variant_hash = hashlib.sha256(variant.encode()).hexdigest()
+        return f"response:{resource}:{self.get_version(resource)}:{variant_hash}"
+
+    def get_version(self, resource: str) -> str:
+        """Return the current version of a resource.
+
+        A resource without a version, never invalidated or evicted, gets a
+        new unique one, so a lost version never makes old responses
+        reachable again.
+        """
+        version_key = f"response-version:{resource}"
+        if self.shared_cache is None:
+            return self.local_versions.add(version_key, uuid.uuid4().hex)
+        entry = self.local_versions.get(version_key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        version = self.shared_cache.get(version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not self.shared_cache.add(version_key, version, timeout=None):
+                version = self.shared_cache.get(version_key, version)
+        self.set_local_version(version_key, version)
+        return version
+
+    def set_local_version(self, version_key: str, version: str) -> None:
+        """Keep a version of the shared tier in the process for the version
+        timeout."""
+        if self.version_timeout:
+            self.local_versions.set(
+                version_key, (time.monotonic() + self.version_timeout, version)
+            )
+
+    def invalidate(self, *resources: str) -> None:
+        """Make all cached responses of the resources unreachable."""
+        versions = {
+            f"response-version:{resource}": uuid.uuid4().hex for resource in resources
+        }
+        if self.shared_cache is None:
+            for version_key, version in versions.items():
+                self.local_versions.set(version_key, version)
+        else:
+            self.shared_cache.set_many(versions, timeout=None)
+            # The process sees its own invalidations at once.
+            for version_key, version in versions.items():
+                self.set_local_version(version_key, version)
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the cached response of a key, or None."""
+        entry = self.local_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.count("local_hits")
+            return entry[1]
+
+        if self.shared_cache is not None:
+            response = self.shared_cache.get(key)
+            if response is not None:
+                self.set_local(key, response)
+                self.count("shared_hits")
+                return response
+
+        self.count("misses")
+        return None
+
+    def get_or_build(
+        self, key: str, build: Callable[[], CachedResponse | None]
+    ) -> CachedResponse | None:
+        """Return the cached response of a key, or build and cache it.
+
+        Only one caller per key builds the response at a time, the others
+        get the expired response of the key if there is one, or wait for
+        the response being built.
+
+        :param key: The key from ``make_key``.
+        :param build: Renders the response, or returns None if the response
+            must not be cached.
+        :return: The response, or None if it was not cached.
+        """
+        response = self.get(key)
+        if response is not None:
+            return response
+
+        stale_response = self.get_stale(key)
+        if stale_response is not None and self.flights.is_in_flight(key):
+            self.count("stale_hits")
+            return stale_response
+
+        response, shared = self.flights.do(
+            key, lambda: self.build_once(key, build, stale_response)
+        )
+        if shared:
+            self.count("coalesced")
+        return response
+
+    def build_once(
+        self,
+        key: str,
+        build: Callable[[], CachedResponse | None],
+        stale_response: CachedResponse | None,
+    ) -> CachedResponse | None:
+        """Build and cache a response, unless another process is already
+        building it.
+
+        :param key: The key from ``make_key``.
+        :param build: Renders the response, or returns None.
+        :param stale_response: The expired response of the key, returned
+            instead of waiting for another process.
+        :return: The response, or None if it was not cached.
+        """
+        # The thread that built the response may have finished between the
+        # cache miss and taking over the key.
+        entry = self.local_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        shared_cache = self.shared_cache
+        lock_key = f"{key}:lock"
+        holds_lock = False
+        if shared_cache is not None:
+            holds_lock = shared_cache.add(lock_key, True, timeout=self.lock_timeout)
+            if not holds_lock:
+                if stale_response is not None:
+                    self.count("stale_hits")
+                    return stale_response
+                response = self.wait_for_shared(shared_cache, key, lock_key)
+                if response is not None:
+                    return response
+
+        try:
+            response = build()
+            if response is not None:
+                self.set(key, response)
+            return response
+        finally:
+            if shared_cache is not None and holds_lock:
+                shared_cache.delete(lock_key)
+
+    def wait_for_shared(
+        self, shared_cache: BaseCache, key: str, lock_key: str
+    ) -> CachedResponse | None:
+        """Wait for the response another process is building.
+
+        :param shared_cache: The cache backend of the shared tier.
+        :param key: The key of the response.
+        :param lock_key: The key of the rebuild lock held by the other
+            process.
+        :return: The response, or None if the other process released the
+            lock without caching it or did not finish in time.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            response = shared_cache.get(key)
+            if response is not None:
+                self.set_local(key, response)
+                return response
+            if shared_cache.get(lock_key) is None:
+                break
+        return None
+
+    def get_stale(self, key: str) -> CachedResponse | None:
+        """Return the response of a key from the in-process tier even if it
+        expired, or None."""
+        entry = self.local_cache.get(key)
+        return entry[1] if entry is not None else None
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Cache a response in both tiers."""
+        self.set_local(key, response)
+        if self.shared_cache is not None:
+            self.shared_cache.set(key, response, timeout=self.timeout)
+
+    def set_local(self, key: str, response: CachedResponse) -> None:
+        """Cache a response in the in-process tier."""
+        self.local_cache.set(key, (time.monotonic() + self.timeout, response))
+
+    def count(self, counter: str) -> None:
+        """Increment a counter of the cache, and its Prometheus metric."""
+        with self._counters_lock:
+            self.counters[counter] += 1
+        RESPONSE_CACHE_LOOKUPS.labels(counter).inc()
+
+    def stats(self) -> dict[str, int]:
+        """Return the hit and miss counters of the cache."""
+        with self._counters_lock:
+            local_hits = self.counters["local_hits"]
+            shared_hits = self.counters["shared_hits"]
+            return {
+                "hits": local_hits + shared_hits,
+                "local_hits": local_hits,
+                "shared_hits": shared_hits,
+                "stale_hits": self.counters["stale_hits"],
+                "coalesced": self.counters["coalesced"],
+                "misses": self.counters["misses"],
+            }
+
+
+def get_resource(model: type[Model], pk: Any) -> str:
+    """Return the name of the cached resource of a model instance."""
+    return f"{model._meta.label_lower}:{pk}"
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    """Return the response cache configured by the RESPONSE_CACHE setting."""
+    options = settings.RESPONSE_CACHE
+    shared_cache_alias = options.get("SHARED_CACHE")
+    return ResponseCache(
+        max_entries=options["MAX_ENTRIES"],
+        timeout=options["TIMEOUT"],
+        shared_cache=caches[shared_cache_alias] if shared_cache_alias else None,
+        lock_timeout=options.get("LOCK_TIMEOUT", 5),
+        version_timeout=options.get("VERSION_TIMEOUT", 0),
+    )
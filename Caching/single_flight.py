@@ -0,0 +1,64 @@
+"""This module coalesces concurrent calls that compute the same value.
+
+When many threads miss the cache for the same key at once, only the first
+one computes the value and the others wait for its result, instead of all
+of them querying the database for the same rows.
+"""
+
+import threading
+from typing import Any, Callable
+
+
+class Flight:
+    """A call in progress, with the result or error it ended with."""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time in the process, concurrent
+    callers for the same key share the result of that call."""
+
+    def __init__(self) -> None:
+        self._flights: dict[str, Flight] = {}
+        self._lock = threading.Lock()
+
+    def is_in_flight(self, key: str) -> bool:
+        """Return True if a call for the key is in progress."""
+        with self._lock:
+            return key in self._flights
+
+    def do(self, key: str, function: Callable[[], Any]) -> tuple[Any, bool]:
+        """Call the function, or wait for the call already in progress for
+        the key.
+
+        :param key: The key the function computes the value of.
+        :param function: The function to call.
+        :return: The result, and whether it was shared from another call.
+        :raises Exception: The error of the call, also in waiting callers.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            is_leader = flight is None
+            if flight is None:
+                flight = self._flights[key] = Flight()
+
+        if not is_leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
@@ -0,0 +1,259 @@
+"""This module tests the two tier response cache and the coalescing of
+concurrent cache misses."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase
+from prometheus_client import REGISTRY
+
+from Caching.response_cache import CachedResponse, LRUCache, ResponseCache
+from Caching.single_flight import SingleFlight
+
+
+class LRUCacheTest(SimpleTestCase):
+    """Tests the eviction order of the in-process tier."""
+
+    def test_least_recently_used_evicted(self) -> None:
+        """Checks that reading an entry keeps it over older entries."""
+        lru_cache = LRUCache(max_entries=2)
+        lru_cache.set("a", 1)
+        lru_cache.set("b", 2)
+        lru_cache.get("a")
+        lru_cache.set("c", 3)
+        self.assertEqual(lru_cache.get("a"), 1)
+        self.assertIsNone(lru_cache.get("b"))
+        self.assertEqual(len(lru_cache), 2)
+
+    def test_add_keeps_existing_value(self) -> None:
+        """Checks that add only sets missing keys."""
+        lru_cache = LRUCache(max_entries=2)
+        self.assertEqual(lru_cache.add("a", 1), 1)
+        self.assertEqual(lru_cache.add("a", 2), 1)
+
+
+class ResponseCacheTest(SimpleTestCase):
+    """Tests caching and invalidating responses, with and without the shared
+    tier."""
+
+    response = CachedResponse(b"{}", (("Content-Type", "application/json"),))
+
+    def make_caches(self) -> list[ResponseCache]:
+        """Return a cache of every configuration."""
+        return [
+            ResponseCache(max_entries=10, timeout=60),
+            ResponseCache(
+                max_entries=10,
+                timeout=60,
+                shared_cache=LocMemCache("response-cache-test", {}),
+            ),
+        ]
+
+    def test_hit_after_set(self) -> None:
+        """Checks that a cached response is found under the same key."""
+        for response_cache in self.make_caches():
+            key = response_cache.make_key("post:1", "variant")
+            self.assertIsNone(response_cache.get(key))
+            response_cache.set(key, self.response)
+            self.assertEqual(
+                response_cache.get(response_cache.make_key("post:1", "variant")),
+                self.response,
+            )
+            self.assertEqual(response_cache.stats()["hits"], 1)
+            self.assertEqual(response_cache.stats()["misses"], 1)
+
+    def test_invalidate(self) -> None:
+        """Checks that invalidating a resource only drops its responses."""
+        for response_cache in self.make_caches():
+            key = response_cache.make_key("post:1", "variant")
+            other_key = response_cache.make_key("post:2", "variant")
+            response_cache.set(key, self.response)
+            response_cache.set(other_key, self.response)
+            response_cache.invalidate("post:1")
+            self.assertIsNone(
+                response_cache.get(response_cache.make_key("post:1", "variant"))
+            )
+            self.assertIsNotNone(
+                response_cache.get(response_cache.make_key("post:2", "variant"))
+            )
+
+    def test_stale_key_not_reachable(self) -> None:
+        """Checks that a response stored under a key made before an
+        invalidation is never found."""
+        for response_cache in self.make_caches():
+            key = response_cache.make_key("post:1", "variant")
+            response_cache.invalidate("post:1")
+            response_cache.set(key, self.response)
+            self.assertIsNone(
+                response_cache.get(response_cache.make_key("post:1", "variant"))
+            )
+
+    def test_shared_tier_seen_by_other_process(self) -> None:
+        """Checks that processes share responses and invalidations through
+        the shared tier."""
+        shared_cache = LocMemCache("response-cache-shared-test", {})
+        first = ResponseCache(max_entries=10, timeout=60, shared_cache=shared_cache)
+        second = ResponseCache(max_entries=10, timeout=60, shared_cache=shared_cache)
+        first.set(first.make_key("post:1", "variant"), self.response)
+        self.assertEqual(
+            second.get(second.make_key("post:1", "variant")), self.response
+        )
+        self.assertEqual(second.stats()["shared_hits"], 1)
+
+        first.invalidate("post:1")
+        self.assertIsNone(second.get(second.make_key("post:1", "variant")))
+
+    def test_shared_versions_kept_in_process(self) -> None:
+        """Checks that versions of the shared tier are only read again after
+        the version timeout, and that a process sees its own invalidations
+        at once."""
+        shared_cache = LocMemCache("response-cache-version-test", {})
+        first = ResponseCache(
+            max_entries=10, timeout=60, shared_cache=shared_cache, version_timeout=60
+        )
+        second = ResponseCache(
+            max_entries=10, timeout=60, shared_cache=shared_cache, version_timeout=60
+        )
+        key = second.make_key("post:1", "variant")
+        with patch.object(shared_cache, "get", wraps=shared_cache.get) as get:
+            self.assertEqual(second.make_key("post:1", "variant"), key)
+        get.assert_not_called()
+
+        first.invalidate("post:1")
+        self.assertNotEqual(first.make_key("post:1", "variant"), key)
+        self.assertEqual(second.make_key("post:1", "variant"), key)
+        with patch("Caching.response_cache.time.monotonic", return_value=1e12):
+            self.assertNotEqual(second.make_key("post:1", "variant"), key)
+
+    def test_lookups_counted_in_metrics(self) -> None:
+        """Checks that hits and misses are counted in the Prometheus
+        metrics."""
+
+        def get_sample(result: str) -> float:
+            return (
+                REGISTRY.get_sample_value(
+                    "response_cache_lookups_total", {"result": result}
+                )
+                or 0.0
+            )
+
+        hits, misses = get_sample("local_hits"), get_sample("misses")
+        response_cache = ResponseCache(max_entries=10, timeout=60)
+        key = response_cache.make_key("post:1", "variant")
+        response_cache.get(key)
+        response_cache.set(key, self.response)
+        response_cache.get(key)
+        self.assertEqual(get_sample("local_hits"), hits + 1)
+        self.assertEqual(get_sample("misses"), misses + 1)
+
+
+class SingleFlightTest(SimpleTestCase):
+    """Tests that concurrent calls for the same key are coalesced."""
+
+    def test_concurrent_calls_coalesced(self) -> None:
+        """Checks that only one of many concurrent calls runs."""
+        single_flight = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def compute() -> str:
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        def call() -> tuple[str, bool]:
+            barrier.wait()
+            return single_flight.do("key", compute)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: call(), range(8)))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual({result for result, _ in results}, {"value"})
+        self.assertEqual(sum(shared for _, shared in results), 7)
+
+    def test_error_shared(self) -> None:
+        """Checks that waiting callers get the error of the call."""
+        single_flight = SingleFlight()
+        started = threading.Event()
+
+        def fail() -> None:
+            started.set()
+            time.sleep(0.2)
+            raise ValueError("failed")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(single_flight.do, "key", fail)
+            started.wait()
+            follower = executor.submit(single_flight.do, "key", fail)
+            self.assertRaises(ValueError, leader.result)
+            self.assertRaises(ValueError, follower.result)
+
+
+class GetOrBuildTest(SimpleTestCase):
+    """Tests building missing responses once."""
+
+    response = CachedResponse(b"{}", (("Content-Type", "application/json"),))
+
+    def test_built_once(self) -> None:
+        """Checks that a cached response is not built again."""
+        response_cache = ResponseCache(max_entries=10, timeout=60)
+        builds = []
+
+        def build() -> CachedResponse:
+            builds.append(1)
+            return self.response
+
+        key = response_cache.make_key("post:1", "variant")
+        self.assertEqual(response_cache.get_or_build(key, build), self.response)
+        self.assertEqual(response_cache.get_or_build(key, build), self.response)
+        self.assertEqual(len(builds), 1)
+
+    def test_uncacheable_response_not_stored(self) -> None:
+        """Checks that a build returning None caches nothing."""
+        response_cache = ResponseCache(max_entries=10, timeout=60)
+        key = response_cache.make_key("post:1", "variant")
+        self.assertIsNone(response_cache.get_or_build(key, lambda: None))
+        self.assertIsNone(response_cache.get(key))
+
+    def test_stale_response_while_rebuilding(self) -> None:
+        """Checks that an expired response is returned while another thread
+        rebuilds it."""
+        response_cache = ResponseCache(max_entries=10, timeout=0)
+        key = response_cache.make_key("post:1", "variant")
+        response_cache.set(key, self.response)
+        rebuilding = threading.Event()
+        release = threading.Event()
+
+        def build() -> CachedResponse:
+            rebuilding.set()
+            release.wait(timeout=5)
+            return CachedResponse(b"[]", ())
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            rebuilt = executor.submit(response_cache.get_or_build, key, build)
+            rebuilding.wait()
+            self.assertEqual(response_cache.get_or_build(key, build), self.response)
+            release.set()
+            self.assertEqual(rebuilt.result(), CachedResponse(b"[]", ()))
+        self.assertEqual(response_cache.stats()["stale_hits"], 1)
+
+    def test_other_process_building(self) -> None:
+        """Checks that a process waits for the response another process is
+        building instead of building it too."""
+        shared_cache = LocMemCache("response-cache-lock-test", {})
+        first = ResponseCache(max_entries=10, timeout=60, shared_cache=shared_cache)
+        second = ResponseCache(max_entries=10, timeout=60, shared_cache=shared_cache)
+        key = first.make_key("post:1", "variant")
+        shared_cache.add(f"{key}:lock", True)
+
+        def finish_build() -> None:
+            time.sleep(0.2)
+            first.set(key, self.response)
+            shared_cache.delete(f"{key}:lock")
+
+        threading.Thread(target=finish_build).start()
+        self.assertEqual(second.get_or_build(key, lambda: None), self.response)
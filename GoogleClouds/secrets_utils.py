@@ -1,29 +1,252 @@
+"""This module reads the secrets of the settings from Google Cloud Secret
+Manager.
+
+Every secret is a blocking RPC, so ``access_secrets`` fetches a batch of
+secrets concurrently. With SECRETS_CACHE_PATH and SECRETS_CACHE_KEY, a Fernet
+key, configured, the fetched secrets are also kept in a file encrypted with
+that key for SECRETS_CACHE_TTL seconds, so that restarts in that time do not
+fetch them again. With SECRETS_DIR configured, ``get_secret_manager`` reads
+the secrets from the files of that directory instead, without any network.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
 import google_crc32c
+from cryptography.fernet import Fernet, InvalidToken
 from decouple import config
+from google.api_core.exceptions import NotFound
 from google.cloud import secretmanager
 
 # See here:
 # https://cloud.google.com/secret-manager/docs/
 # access-secret-version#secretmanager-access-secret-version-python
 
+DATA_CORRUPTION = "Data corruption detected."
+
+
+class SecretCache:
+    """Keeps secrets in a file encrypted with Fernet, each for ``ttl``
+    seconds after it was fetched.
+
+    A file that cannot be decrypted, for example after the key changed, or
+    decoded is treated as empty and replaced on the next write.
+    """
+
+    def __init__(self, path: str | Path, key: str | bytes, ttl: float) -> None:
+        """
+        :param path: The file of the cache.
+        :param key: The Fernet key encrypting the file.
+        :param ttl: The seconds a secret is kept for.
+        """
+        self.path = Path(path)
+        self.fernet = Fernet(key)
+        self.ttl = ttl
+
+    @classmethod
+    def from_config(cls) -> "SecretCache | None":
+        """Return the cache of the SECRETS_CACHE_* config, or None if the
+        cache is not configured."""
+        path = config("SECRETS_CACHE_PATH", default="")
+        key = config("SECRETS_CACHE_KEY", default="")
+        if not path or not key:
+            return None
+        return cls(path, key, config("SECRETS_CACHE_TTL", default=3600, cast=float))
+
+    def read(self) -> dict[str, tuple[float, str]]:
+        """Return the fetch time and value of every secret in the file,
+        including the expired ones, or nothing if the file cannot be read."""
+        try:
+            entries = {}
+            content = json.loads(self.fernet.decrypt(self.path.read_bytes()))
+            for name, (fetched_at, value) in content.items():
+                if not isinstance(value, str):
+                    raise TypeError(f"The value of {name} is not a string.")
+                entries[name] = (float(fetched_at), value)
+        except (
+            OSError,
+            InvalidToken,
+            AttributeError,
+            KeyError,
+            TypeError,
+            ValueError,
+        ):
+            return {}
+        return entries
+
+    def get_many(self, names: list[str]) -> dict[str, str]:
+        """Return the values of the names that are in the cache and have not
+        expired."""
+        now = time.time()
+        entries = self.read()
+        return {
+            name: entries[name][1]
+            for name in names
+            if name in entries and now - entries[name][0] < self.ttl
+        }
+
+    def set_many(self, values: dict[str, str]) -> None:
+        """Add the values to the file, together with the entries that have
+        not expired.
+
+        The file is replaced at once, readable by its owner only, so that
+        processes starting at the same time never read half of it.
+        """
+        now = time.time()
+        entries = {
+            name: entry
+            for name, entry in self.read().items()
+            if now - entry[0] < self.ttl
+        }
+        entries.update((name, (now, value)) for name, value in values.items())
+        token = self.fernet.encrypt(json.dumps(entries).encode())
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.path.parent)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(token)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
 
 class GoogleCloudsSecretManager:
-    def __init__(self):
-        self.client = secretmanager.SecretManagerServiceClient()
+    """Reads the secrets of the environment from Google Cloud Secret Manager."""
 
-    def access_secret(self, secret_id: str, version_id="latest") -> str:
+    # Secrets fetched at the same time by access_secrets.
+    max_workers = 16
+    # The errors of access_secrets for a secret that does not exist.
+    not_found_errors: tuple[type[Exception], ...] = (NotFound,)
+
+    def __init__(self, cache: SecretCache | None = None) -> None:
+        """
+        :param cache: The cache of access_secrets, None to always fetch.
+        """
+        self.cache = cache
+        self._client: secretmanager.SecretManagerServiceClient | None = None
+        self._client_lock = threading.Lock()
+
+    def get_client(self) -> secretmanager.SecretManagerServiceClient:
+        """Return the client of Secret Manager, only created when a secret is
+        fetched, since finding the credentials may take a request.
+
+        The client is created under a lock, so that the concurrent fetches
+        of ``access_secrets`` share a single one.
+        """
+        with self._client_lock:
+            if self._client is None:
+                self._client = secretmanager.SecretManagerServiceClient()
+            return self._client
+
+    @staticmethod
+    def get_name(secret_id: str, version_id: str = "latest") -> str:
+        """Return the resource name of a secret of the environment."""
         environment = config("ENV")
         google_cloud_project_name = "feisty-wall-439503-t8"
-        name = (
+        return (
             f"projects/{google_cloud_project_name}/secrets/{secret_id}-"
             f"{environment}/versions/{version_id}"
         )
-        response = self.client.access_secret_version(request={"name": name})
+
+    def access_secret(self, secret_id: str, version_id="latest") -> str:
+        name = self.get_name(secret_id, version_id)
+        response = self.get_client().access_secret_version(request={"name": name})
 
         crc32c = google_crc32c.Checksum()
         crc32c.update(response.payload.data)
         if response.payload.data_crc32c != int(crc32c.hexdigest(), 16):
             # TODO: Return 400 status code and test it.
-            return "Data corruption detected."
+            return DATA_CORRUPTION
 
         return response.payload.data.decode("utf-8")
+
+    def access_secrets(
+        self, secret_ids: list[str], version_id: str = "latest"
+    ) -> dict[str, str]:
+        """Return several secrets, from the cache if they are in it, and
+        fetch the others concurrently.
+
+        :param secret_ids: The IDs of the secrets, without the environment.
+        :param version_id: The version of every secret.
+        :return: The value of every secret by its ID.
+        """
+        names = {
+            secret_id: self.get_name(secret_id, version_id) for secret_id in secret_ids
+        }
+        cached = self.cache.get_many(list(names.values())) if self.cache else {}
+        secrets = {
+            secret_id: cached[name]
+            for secret_id, name in names.items()
+            if name in cached
+        }
+
+        missing = [secret_id for secret_id in secret_ids if secret_id not in secrets]
+        if missing:
+            with ThreadPoolExecutor(min(len(missing), self.max_workers)) as executor:
+                secrets.update(
+                    zip(
+                        missing,
+                        executor.map(self.access_secret, missing, repeat(version_id)),
+                    )
+                )
+            if self.cache:
+                self.cache.set_many(
+                    {
+                        names[secret_id]: secrets[secret_id]
+                        for secret_id in missing
+                        if secrets[secret_id] != DATA_CORRUPTION
+                    }
+                )
+        return secrets
+
+
+class LocalSecretManager(GoogleCloudsSecretManager):
+    """Reads every secret from a file of a directory named after its ID,
+    like the secrets Docker and Kubernetes mount, as a stand-in for Secret
+    Manager during development and tests.
+
+    Files have no versions, so the version of a secret is ignored.
+    """
+
+    not_found_errors = (FileNotFoundError,)
+
+    def __init__(self, directory: str | Path, cache: SecretCache | None = None):
+        """
+        :param directory: The directory of the secret files.
+        :param cache: The cache of access_secrets, None to always read.
+        """
+        super().__init__(cache)
+        self.directory = Path(directory)
+
+    def access_secret(self, secret_id: str, version_id="latest") -> str:
+        """Return the content of the file of the secret, without the final
+        newline editors add.
+
+        :raises FileNotFoundError: If the secret has no file.
+        """
+        return (self.directory / secret_id).read_text().removesuffix("\n")
+
+    def get_client(self) -> secretmanager.SecretManagerServiceClient:
+        """Files are read without a client.
+
+        :raises NotImplementedError: Always.
+        """
+        raise NotImplementedError("Secret files are read without a client.")
+
+
+def get_secret_manager() -> GoogleCloudsSecretManager:
+    """Return the secret manager of the configuration, reading the files of
+    SECRETS_DIR if it is set, and Secret Manager otherwise."""
+    cache = SecretCache.from_config()
+    directory = config("SECRETS_DIR", default="")
+    if directory:
+        return LocalSecretManager(directory, cache)
+    return GoogleCloudsSecretManager(cache)
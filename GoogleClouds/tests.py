@@ -1,9 +1,19 @@
+import json
+import tempfile
+import threading
+import time
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import google_crc32c
+from cryptography.fernet import Fernet
 
-from GoogleClouds.secrets_utils import GoogleCloudsSecretManager
+from GoogleClouds.secrets_utils import (
+    GoogleCloudsSecretManager,
+    LocalSecretManager,
+    SecretCache,
+)
 
 
 class SecretAccess(unittest.TestCase):
@@ -41,5 +51,123 @@ class SecretAccess(unittest.TestCase):
         self.assertEqual("Data corruption detected.", result)
 
 
+class SecretBatches(unittest.TestCase):
+    secrets = {"DB_NAME": "blog", "DB_USER": "admin", "DB_PASS": "secret"}
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        (self.directory / "secrets").mkdir()
+        for secret_id, value in self.secrets.items():
+            (self.directory / "secrets" / secret_id).write_text(f"{value}\n")
+        self.key = Fernet.generate_key()
+
+    def get_manager(self, ttl: float = 60, key: bytes | None = None):
+        cache = SecretCache(self.directory / "cache", key or self.key, ttl)
+        return LocalSecretManager(self.directory / "secrets", cache)
+
+    def test_local_files(self) -> None:
+        manager = LocalSecretManager(self.directory / "secrets")
+        self.assertEqual(manager.access_secrets(list(self.secrets)), self.secrets)
+        with self.assertRaises(FileNotFoundError):
+            manager.access_secrets(["DB_HOST"])
+        with self.assertRaises(manager.not_found_errors):
+            manager.access_secrets(["DB_HOST"])
+
+    def test_secrets_fetched_concurrently(self) -> None:
+        manager = LocalSecretManager(self.directory / "secrets")
+        # Every fetch waits for all of them, so they only finish concurrently.
+        barrier = threading.Barrier(len(self.secrets), timeout=5)
+        access_secret = manager.access_secret
+
+        def wait_and_access_secret(secret_id: str, version_id: str) -> str:
+            barrier.wait()
+            return access_secret(secret_id, version_id)
+
+        with patch.object(manager, "access_secret", side_effect=wait_and_access_secret):
+            self.assertEqual(manager.access_secrets(list(self.secrets)), self.secrets)
+
+    def test_restart_reads_cache(self) -> None:
+        self.get_manager().access_secrets(list(self.secrets))
+        (self.directory / "secrets" / "DB_PASS").write_text("rotated")
+
+        manager = self.get_manager()
+        with patch.object(manager, "access_secret") as access_secret:
+            self.assertEqual(manager.access_secrets(list(self.secrets)), self.secrets)
+        access_secret.assert_not_called()
+
+    def test_cache_encrypted(self) -> None:
+        self.get_manager().access_secrets(list(self.secrets))
+        content = (self.directory / "cache").read_bytes()
+        for value in self.secrets.values():
+            self.assertNotIn(value.encode(), content)
+
+    def test_expired_secrets_fetched(self) -> None:
+        self.get_manager().access_secrets(["DB_NAME"])
+        with patch("GoogleClouds.secrets_utils.time.time", return_value=1e12):
+            self.get_manager().access_secrets(["DB_USER"])
+        (self.directory / "secrets" / "DB_NAME").write_text("renamed")
+
+        with patch("GoogleClouds.secrets_utils.time.time", return_value=1e12 + 30):
+            secrets = self.get_manager().access_secrets(["DB_NAME", "DB_USER"])
+        self.assertEqual(secrets, {"DB_NAME": "renamed", "DB_USER": "admin"})
+
+    def test_cache_of_other_key_ignored(self) -> None:
+        self.get_manager().access_secrets(["DB_PASS"])
+        (self.directory / "secrets" / "DB_PASS").write_text("rotated")
+
+        manager = self.get_manager(key=Fernet.generate_key())
+        self.assertEqual(manager.access_secrets(["DB_PASS"]), {"DB_PASS": "rotated"})
+
+    def test_corrupted_secret_not_cached(self) -> None:
+        manager = self.get_manager()
+        with patch.object(
+            manager, "access_secret", return_value="Data corruption detected."
+        ):
+            manager.access_secrets(["DB_NAME"])
+        self.assertEqual(
+            self.get_manager().access_secrets(["DB_NAME"]), {"DB_NAME": "blog"}
+        )
+
+    def test_undecodable_cache_fetched(self) -> None:
+        contents: list[object] = [
+            [],
+            {"DB_NAME": 1},
+            {"DB_NAME": ["now", "blog"]},
+            1,
+        ]
+        for content in contents:
+            with self.subTest(content=content):
+                (self.directory / "cache").write_bytes(
+                    Fernet(self.key).encrypt(json.dumps(content).encode())
+                )
+                self.assertEqual(
+                    self.get_manager().access_secrets(["DB_NAME"]),
+                    {"DB_NAME": "blog"},
+                )
+
+    def test_client_created_once(self) -> None:
+        data = b"MySecret"
+        checksum = google_crc32c.Checksum()
+        checksum.update(data)
+        response = MagicMock(
+            payload=MagicMock(data=data, data_crc32c=int(checksum.hexdigest(), 16))
+        )
+
+        def create_client() -> MagicMock:
+            # Slow enough for every fetch to create a client of its own.
+            time.sleep(0.1)
+            return MagicMock(**{"access_secret_version.return_value": response})
+
+        with patch(
+            "GoogleClouds.secrets_utils.secretmanager.SecretManagerServiceClient",
+            side_effect=create_client,
+        ) as client_class:
+            secrets = GoogleCloudsSecretManager().access_secrets(list(self.secrets))
+        self.assertEqual(secrets, dict.fromkeys(self.secrets, "MySecret"))
+        client_class.assert_called_once()
+
+
 if __name__ == "__main__":
     unittest.main()
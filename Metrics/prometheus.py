@@ -0,0 +1,154 @@
+"""This module provides the Prometheus metrics of the API.
+
+Every request is observed in histograms labelled with the name of its
+route, its method and its status: the latency of the request, the time
+spent in SQL queries, the time spent serializing and the size of the
+response. The compressed responses are counted per encoding, with their size
+before and after compression and the CPU time spent compressing them, and
+the lookups of the response cache are counted per result. The metrics are
+served in the Prometheus text format by ``metrics_view``.
+
+With several worker processes, such as gunicorn workers, every process has
+to write its metrics to files shared by all processes, so that any worker
+serves the metrics of all of them. This is enabled by pointing the
+``PROMETHEUS_MULTIPROC_DIR`` environment variable at an empty directory
+before the processes start, see ``gunicorn.conf.py``.
+"""
+
+import os
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LABELS = ("route", "method", "status")
+
+# The methods labelled by name, any other method a client sends is labelled
+# "other" so that the number of series stays bounded.
+METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latency of requests.", LABELS
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_seconds", "Time requests spent running SQL queries.", LABELS
+)
+REQUEST_SERIALIZER_TIME = Histogram(
+    "http_request_serializer_seconds",
+    "Time requests spent serializing data.",
+    LABELS,
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the content of responses, as sent.",
+    LABELS,
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, float("inf")),
+)
+
+# Counted per encoding by middleware.compression.
+COMPRESSED_RESPONSES = Counter(
+    "http_compressed_responses", "Compressed responses.", ("encoding",)
+)
+COMPRESSION_INPUT_BYTES = Counter(
+    "http_compression_input_bytes",
+    "Size of the compressed responses before compression.",
+    ("encoding",),
+)
+COMPRESSION_OUTPUT_BYTES = Counter(
+    "http_compression_output_bytes",
+    "Size of the compressed responses after compression.",
+    ("encoding",),
+)
+COMPRESSION_CPU_SECONDS = Counter(
+    "http_compression_cpu_seconds",
+    "CPU time spent compressing responses.",
+    ("encoding",),
+)
+
+# Counted per result by Caching.response_cache: local_hits, shared_hits,
+# stale_hits, coalesced and misses.
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "response_cache_lookups", "Lookups of the response cache.", ("result",)
+)
+
+# Seconds spent serializing by the current request, None outside requests.
+serializer_seconds: ContextVar[list[float] | None] = ContextVar(
+    "serializer_seconds", default=None
+)
+
+
+@contextmanager
+def track_serializer_time() -> Iterator[list[float]]:
+    """Sum the serializer time of the block, for example a request.
+
+    :return: A list whose only item is the sum of the seconds.
+    """
+    seconds = [0.0]
+    token = serializer_seconds.set(seconds)
+    try:
+        yield seconds
+    finally:
+        serializer_seconds.reset(token)
+
+
+@contextmanager
+def time_serializer() -> Iterator[None]:
+    """Add the time of the block to the serializer time of the request."""
+    seconds = serializer_seconds.get()
+    if seconds is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds[0] += time.perf_counter() - start
+
+
+def get_method_label(method: str | None) -> str:
+    """Return the label of a request method, "other" for unknown methods."""
+    return method if method in METHODS else "other"
+
+
+def get_registry() -> CollectorRegistry:
+    """Return the registry of the metrics of the process, or of the metrics
+    of all processes in multiprocess mode."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Serve the metrics in the Prometheus text format.
+
+    If the METRICS_TOKEN setting is set, the scraper has to send it as a
+    bearer token. Without a token, the metrics are only served with DEBUG on
+    and are not found otherwise.
+    """
+    token = settings.METRICS_TOKEN
+    if not token and not settings.DEBUG:
+        return HttpResponse(status=404)
+    if token and not secrets.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+    return HttpResponse(
+        generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,181 @@
+"""This module tests the metrics of requests and their aggregation across
+processes."""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from types import ModuleType
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver
+from model_bakery import baker
+from prometheus_client import REGISTRY
+
+from Metrics.prometheus import get_registry, time_serializer, track_serializer_time
+from middleware.queries import instrument_connection
+from Mixins.async_reads import get_async_urlpatterns
+from Posts.models import Comment, Post
+from Posts.serializers import PostWithCommentsSerializer
+
+LABELS = {"route": "posts-list", "method": "GET", "status": "200"}
+
+
+def get_sample(name: str, labels: dict[str, str] = LABELS) -> float:
+    """Return the value of a sample of the metrics of the process."""
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class RequestMetricsTest(TestCase):
+    """Tests the metrics observed for requests and the metrics endpoint."""
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        for post in baker.make(Post, _quantity=3):
+            baker.make(Comment, post=post, _quantity=2)
+
+    def test_request_observed(self) -> None:
+        """Checks that every histogram observes a request."""
+        before = {
+            name: get_sample(name)
+            for name in (
+                "http_request_duration_seconds_count",
+                "http_request_db_seconds_sum",
+                "http_request_serializer_seconds_sum",
+                "http_response_size_bytes_sum",
+            )
+        }
+        response = self.client.get("/api/posts/?include_comments=true")
+        self.assertEqual(
+            get_sample("http_request_duration_seconds_count"),
+            before["http_request_duration_seconds_count"] + 1,
+        )
+        self.assertGreater(
+            get_sample("http_request_db_seconds_sum"),
+            before["http_request_db_seconds_sum"],
+        )
+        self.assertGreater(
+            get_sample("http_request_serializer_seconds_sum"),
+            before["http_request_serializer_seconds_sum"],
+        )
+        self.assertEqual(
+            get_sample("http_response_size_bytes_sum"),
+            before["http_response_size_bytes_sum"] + len(response.content),
+        )
+
+    def test_async_request_observed(self) -> None:
+        """Checks that the SQL and serializer time of a request to an
+        asynchronous view are observed, although its queries run in other
+        threads."""
+        async_urlconf = ModuleType("async_urls")
+        setattr(
+            async_urlconf,
+            "urlpatterns",
+            get_async_urlpatterns(get_resolver().url_patterns),
+        )
+        # The asynchronous client builds the middleware in another thread,
+        # which cannot instrument the connection of this one, opened before.
+        instrument_connection(connection)
+        before = {
+            name: get_sample(name)
+            for name in (
+                "http_request_db_seconds_sum",
+                "http_request_serializer_seconds_sum",
+            )
+        }
+        with override_settings(ROOT_URLCONF=async_urlconf):
+            response = async_to_sync(self.async_client.get)(
+                "/api/posts/?include_comments=true"
+            )
+        self.assertEqual(response.status_code, 200)
+        for name, value in before.items():
+            with self.subTest(name):
+                self.assertGreater(get_sample(name), value)
+
+    @override_settings(DEBUG=True)
+    def test_metrics_endpoint(self) -> None:
+        """Checks that the metrics are served in the text format."""
+        self.client.get("/api/posts/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b'http_request_duration_seconds_count{method="GET",route="posts-list",'
+            b'status="200"}',
+            response.content,
+        )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self) -> None:
+        """Checks that a configured token is required."""
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        response = self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+
+    def test_metrics_not_found_without_token(self) -> None:
+        """Checks that without a token the metrics are not served with DEBUG
+        off."""
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_unknown_method_labelled_other(self) -> None:
+        """Checks that methods outside the known ones share a label."""
+        name = "http_request_duration_seconds_count"
+        labels = {"route": "posts-list", "status": "405"}
+        before = REGISTRY.get_sample_value(name, {**labels, "method": "other"}) or 0
+        self.client.generic("PROPFIND", "/api/posts/")
+        self.client.generic("BREW", "/api/posts/")
+        self.assertEqual(
+            REGISTRY.get_sample_value(name, {**labels, "method": "other"}), before + 2
+        )
+        self.assertIsNone(
+            REGISTRY.get_sample_value(name, {**labels, "method": "PROPFIND"})
+        )
+
+    def test_nested_serializers_not_timed(self) -> None:
+        """Checks that only the serializer of the response data is timed."""
+        with (
+            patch(
+                "Mixins.timed_serializers.time_serializer",
+                wraps=time_serializer,
+            ) as timed,
+            track_serializer_time() as seconds,
+        ):
+            data = PostWithCommentsSerializer(Post.objects.all(), many=True).data
+        self.assertEqual(len(data), 3)
+        self.assertEqual(timed.call_count, 3)
+        self.assertGreater(seconds[0], 0)
+
+
+class MultiprocessMetricsTest(SimpleTestCase):
+    """Tests the aggregation of the metrics of several processes."""
+
+    def test_metrics_of_all_processes(self) -> None:
+        """Checks that the registry sums the observations of every
+        process."""
+        observe = (
+            "from Metrics.prometheus import REQUEST_LATENCY\n"
+            "REQUEST_LATENCY.labels('posts-list', 'GET', '200').observe(0.5)\n"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            environment = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, "-c", observe],
+                    check=True,
+                    cwd=Path(__file__).resolve().parent.parent,
+                    env=environment,
+                )
+            with patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                registry = get_registry()
+                count = registry.get_sample_value(
+                    "http_request_duration_seconds_count", LABELS
+                )
+                total = registry.get_sample_value(
+                    "http_request_duration_seconds_sum", LABELS
+                )
+        self.assertEqual(count, 2)
+        self.assertEqual(total, 1.0)
@@ -0,0 +1,174 @@
+"""This module serves the reads of views with asynchronous handlers.
+
+Under ASGI, Django runs a synchronous view in a thread through
+``sync_to_async``, and the request holds that thread while the view reads
+the database, serializes and builds the response. With the ASYNC_READS
+setting, the views of ``AsyncReadsViewMixin`` are asynchronous instead: the
+list and retrieve actions run on the event loop, and only their queries
+leave it, through Django's asynchronous ORM.
+
+The authentication, permission and throttling checks of ``initial`` still
+run in a thread, as do all other actions and the actions of views without
+an asynchronous handler, so the responses are the same either way. Under
+WSGI the views stay synchronous.
+"""
+
+from typing import TYPE_CHECKING, Any
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Model, QuerySet
+from django.http import Http404, HttpRequest, HttpResponseBase
+from django.urls import URLPattern, URLResolver
+from rest_framework.generics import GenericAPIView
+from rest_framework.viewsets import ViewSetMixin
+
+if TYPE_CHECKING:
+    # Only defined by the type stubs.
+    from rest_framework.decorators import ViewSetAction
+    from rest_framework.views import AsView, GenericView
+
+
+class AsyncReadsViewMixin(ViewSetMixin, GenericAPIView):
+    """View-set mixin serving the list and retrieve actions with
+    asynchronous handlers in asynchronous views.
+
+    The asynchronous handler of an action has the name of the action with an
+    ``a`` prefix, ``alist`` and ``aretrieve``, and the other view mixins
+    define them next to ``list`` and ``retrieve``, so this mixin comes after
+    them. Actions without an asynchronous handler are dispatched in a
+    thread.
+    """
+
+    async_actions = ("list", "retrieve")
+    # True for the instances of asynchronous views, set by as_view.
+    async_reads = False
+
+    @classmethod
+    def as_view(
+        cls,
+        actions: "dict[str, str | ViewSetAction] | None" = None,
+        **initkwargs: Any,
+    ) -> "AsView[GenericView]":
+        """Return an asynchronous view if the ``async_reads`` argument, by
+        default the ASYNC_READS setting, is true."""
+        initkwargs.setdefault("async_reads", settings.ASYNC_READS)
+        view = super().as_view(actions, **initkwargs)
+        if not initkwargs["async_reads"]:
+            return view
+        # The view returns the coroutine of adispatch, which Django awaits
+        # for views marked as coroutine functions.
+        return markcoroutinefunction(view)
+
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> Any:
+        """Dispatch the request, or return the coroutine dispatching it in
+        asynchronous views."""
+        if self.async_reads:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(
+        self, request: HttpRequest, *args, **kwargs
+    ) -> HttpResponseBase:
+        """Dispatch a request of an asynchronous view like ``dispatch``, to
+        the asynchronous handler of its action, or to ``dispatch`` in a
+        thread if the action has none.
+
+        The request is checked by ``initial`` in a thread, since the
+        authentication and permission checks may query the database.
+        """
+        method = (request.method or "").lower()
+        action = self.action_map.get(method)
+        handler = getattr(self, f"a{action}", None)
+        if (
+            method not in self.http_method_names
+            or action not in self.async_actions
+            or handler is None
+        ):
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def aget_object(self, queryset: QuerySet | None = None) -> Model:
+        """Return the instance of a detail request like ``get_object``, read
+        with ``aget``.
+
+        :param queryset: The queryset to look the instance up in, by default
+            the filtered queryset of the view.
+        :raises Http404: If the instance does not exist.
+        """
+        if queryset is None:
+            queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def apaginate_queryset(self, queryset: QuerySet) -> Any:
+        """Return a single page of the queryset, read with the
+        ``apaginate_queryset`` method of the paginator if it has one, or
+        None if the view is not paginated."""
+        if self.paginator is None:
+            return None
+        if hasattr(self.paginator, "apaginate_queryset"):
+            return await self.paginator.apaginate_queryset(
+                queryset, self.request, view=self
+            )
+        return await sync_to_async(self.paginator.paginate_queryset)(
+            queryset, self.request, view=self
+        )
+
+    async def aget_serializer_data(self, instances: Any) -> Any:
+        """Serialize the fetched instances of a list response."""
+        return self.get_serializer(instances, many=True).data
+
+
+def get_async_urlpatterns(urlpatterns: list) -> list:
+    """Return the URL patterns with the views of ``AsyncReadsViewMixin`` made
+    asynchronous, whatever the ASYNC_READS setting, for example to serve
+    both kinds of views from one process.
+
+    :param urlpatterns: URL patterns and resolvers of included patterns.
+    :return: New patterns, the views of other classes are kept as they are.
+    """
+    async_urlpatterns: list[URLPattern | URLResolver] = []
+    for pattern in urlpatterns:
+        if isinstance(pattern, URLResolver):
+            pattern = URLResolver(
+                pattern.pattern,
+                get_async_urlpatterns(pattern.url_patterns),
+                pattern.default_kwargs,
+                pattern.app_name,
+                pattern.namespace,
+            )
+        elif isinstance(getattr(pattern.callback, "cls", None), type) and issubclass(
+            pattern.callback.cls, AsyncReadsViewMixin
+        ):
+            callback = pattern.callback
+            view = callback.cls.as_view(
+                callback.actions, **{**callback.initkwargs, "async_reads": True}
+            )
+            pattern = URLPattern(
+                pattern.pattern, view, pattern.default_args, pattern.name
+            )
+        async_urlpatterns.append(pattern)
+    return async_urlpatterns
@@ -0,0 +1,400 @@
+"""This module provides bulk operations for the API.
+
+A ``POST`` of a list of items to the ``bulk/`` endpoint of a view-set
+validates every item on its own and inserts all valid items with batched
+``bulk_create`` calls in one transaction, instead of one request, permission
+check and INSERT per item. Invalid items are reported by their index
+without failing the other items, unless the ``atomic`` query parameter is
+set, then a single invalid item fails the whole batch.
+
+A ``PATCH`` or ``DELETE`` of the ``bulk/`` endpoint updates or deletes all
+instances of the user that match the filters of the query parameters. An
+update locks the matching rows and updates them with a single UPDATE
+statement, a deletion deletes them with a single DELETE statement that
+returns their primary keys. The ownership rules of the permission classes
+are part of the WHERE clause instead of being checked per object. Filter
+backends ignore unknown query parameters, so a request without any known
+filter parameter is rejected, unless it sets ``all=true`` to change all
+instances of the user.
+
+The set-based statements do not send the model signals, views that rely on
+them have to do their work in ``bulk_changed``, or set
+``bulk_send_signals`` to save and delete instance by instance.
+"""
+
+from typing import Any, Iterable
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections, transaction
+from django.db.models import DateTimeField, Model, QuerySet
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+ItemError = dict[str, Any]
+
+
+class PreloadedObjects:
+    """Stands in for the queryset of a related field, answering the lookups
+    of the field from objects fetched in a single query."""
+
+    def __init__(self, queryset: QuerySet, pks: Iterable[Any]) -> None:
+        """
+        :param queryset: The queryset of the related field.
+        :param pks: The primary keys the items refer to.
+        """
+        self.to_python = queryset.model._meta.pk.to_python
+        valid_pks = set()
+        for pk in pks:
+            try:
+                valid_pks.add(self.to_python(pk))
+            except (DjangoValidationError, TypeError, ValueError):
+                continue
+        self.objects = queryset.in_bulk(valid_pks)
+
+    def get(self, pk: Any) -> Model:
+        """Return the object with the primary key, like ``QuerySet.get``."""
+        try:
+            key = self.to_python(pk)
+        except DjangoValidationError as error:
+            raise ValueError(pk) from error
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise ObjectDoesNotExist(pk) from None
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """List serializer that validates every item on its own, so that the
+    valid items can be created even if other items are invalid."""
+
+    batch_size = 500
+    child: serializers.ModelSerializer
+
+    def validate_items(
+        self, items: list[tuple[int, Any]]
+    ) -> tuple[list[tuple[int, dict]], list[ItemError]]:
+        """Validate the items.
+
+        The objects the related fields of the items refer to are fetched
+        with one query per field, instead of one query per item.
+
+        :param items: The items to validate, with their index.
+        :return: The index and validated data of every valid item, and the
+            index and errors of every invalid item.
+        """
+        self.preload_related_objects(items)
+        valid_items: list[tuple[int, dict]] = []
+        errors: list[ItemError] = []
+        for index, item in items:
+            try:
+                valid_items.append((index, self.child.run_validation(item)))
+            except ValidationError as error:
+                errors.append({"index": index, "errors": error.detail})
+        return valid_items, errors
+
+    def preload_related_objects(self, items: list[tuple[int, Any]]) -> None:
+        """Make the writable primary key related fields of the items look up
+        their objects from a single query each."""
+        for field in self.child.fields.values():
+            if (
+                isinstance(field, serializers.PrimaryKeyRelatedField)
+                and not field.read_only
+            ):
+                pks = [
+                    item.get(field.field_name)
+                    for _, item in items
+                    if isinstance(item, dict)
+                ]
+                # The field only calls ``get`` on its queryset, which the stubs
+                # type as a manager descriptor.
+                preloaded = PreloadedObjects(field.get_queryset(), pks)
+                setattr(field, "queryset", preloaded)
+
+    def create(self, validated_data: list[dict]) -> list[Model]:
+        """Insert the validated items in batches."""
+        model: type[Model] = self.child.Meta.model
+        return model._default_manager.bulk_create(
+            [model(**attrs) for attrs in validated_data], batch_size=self.batch_size
+        )
+
+
+class BulkViewMixin(GenericAPIView):
+    """View mixin adding a ``bulk/`` endpoint that creates, updates or
+    deletes many instances in one request.
+
+    Permission classes check every created item with
+    ``has_bulk_item_permission`` and limit the updated and deleted instances
+    with ``filter_bulk_queryset``, if they define them.
+    """
+
+    bulk_max_items = 5000
+    # The fields a bulk update can set.
+    bulk_update_fields: tuple[str, ...] = ()
+    bulk_send_signals = False
+
+    # The PATCH of the bulk endpoint is allowed even if the view-set does
+    # not allow PATCH for single instances.
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="bulk",
+        http_method_names=["post", "patch", "delete"],
+    )
+    def bulk_create(self, request: Request, *args, **kwargs) -> Response:
+        """Create the valid items of a list.
+
+        Responds with 201 and the created instances if any item was created,
+        with 400 otherwise. The errors of invalid items are reported by the
+        index of the item in both cases.
+        """
+        items = list(enumerate(self.get_bulk_items(request)))
+        atomic = request.query_params.get("atomic") == "true"
+
+        permitted_items, errors = self.check_bulk_item_permissions(request, items)
+        serializer = BulkCreateListSerializer(
+            child=self.get_serializer(), context=self.get_serializer_context()
+        )
+        valid_items, validation_errors = serializer.validate_items(permitted_items)
+        errors = sorted(errors + validation_errors, key=lambda error: error["index"])
+        if not valid_items or (atomic and errors):
+            return Response(
+                {"created": [], "errors": errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            instances = self.perform_bulk_create(
+                serializer, [attrs for _, attrs in valid_items]
+            )
+        created = self.get_serializer(instances, many=True).data
+        return Response(
+            {"created": created, "errors": errors}, status=status.HTTP_201_CREATED
+        )
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request: Request, *args, **kwargs) -> Response:
+        """Set the fields of the request data on the instances of the user
+        that match the filters, and respond with their number."""
+        self.check_bulk_authenticated(request)
+        self.check_bulk_filtered(request)
+        data = request.data
+        if not isinstance(data, dict) or not data:
+            raise ValidationError(
+                {"non_field_errors": "Expected an object with the fields to set."}
+            )
+        unknown_fields = sorted(set(data) - set(self.bulk_update_fields))
+        if unknown_fields:
+            raise ValidationError(
+                {
+                    field_name: "This field can not be updated in bulk."
+                    for field_name in unknown_fields
+                }
+            )
+        serializer = self.get_serializer(data=data, partial=True)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            pks = self.perform_bulk_update(
+                self.get_bulk_queryset(), dict(serializer.validated_data)
+            )
+            if pks:
+                self.bulk_changed(pks)
+        return Response({"updated": len(pks)})
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request: Request, *args, **kwargs) -> Response:
+        """Delete the instances of the user that match the filters, and
+        respond with their number."""
+        self.check_bulk_authenticated(request)
+        self.check_bulk_filtered(request)
+        with transaction.atomic():
+            pks = self.perform_bulk_delete(self.get_bulk_queryset())
+            if pks:
+                self.bulk_changed(pks)
+        return Response({"deleted": len(pks)})
+
+    def get_bulk_items(self, request: Request) -> list[Any]:
+        """Return the items of the request.
+
+        :raises ValidationError: If the request data is not a list of one up
+            to ``bulk_max_items`` items.
+        """
+        items = request.data
+        if not isinstance(items, list) or not 1 <= len(items) <= self.bulk_max_items:
+            raise ValidationError(
+                {
+                    "non_field_errors": "Expected a list of 1 to "
+                    f"{self.bulk_max_items} items."
+                }
+            )
+        return items
+
+    def check_bulk_item_permissions(
+        self, request: Request, items: list[tuple[int, Any]]
+    ) -> tuple[list[tuple[int, Any]], list[ItemError]]:
+        """Split the items into the permitted items and the errors of the
+        others."""
+        permissions = [
+            permission
+            for permission in self.get_permissions()
+            if hasattr(permission, "has_bulk_item_permission")
+        ]
+        permitted_items: list[tuple[int, Any]] = []
+        errors: list[ItemError] = []
+        for index, item in items:
+            denied = next(
+                (
+                    permission
+                    for permission in permissions
+                    if not permission.has_bulk_item_permission(request, self, item)
+                ),
+                None,
+            )
+            if denied is None:
+                permitted_items.append((index, item))
+            else:
+                errors.append(
+                    {
+                        "index": index,
+                        "errors": {
+                            "detail": getattr(
+                                denied, "message", PermissionDenied.default_detail
+                            )
+                        },
+                    }
+                )
+        return permitted_items, errors
+
+    def perform_bulk_create(
+        self, serializer: BulkCreateListSerializer, validated_data: list[dict]
+    ) -> list[Model]:
+        """Create the instances of the valid items."""
+        return serializer.create(validated_data)
+
+    def check_bulk_authenticated(self, request: Request) -> None:
+        """Deny bulk updates and deletions of anonymous users, which have no
+        instances of their own."""
+        if not request.user.is_authenticated:
+            self.permission_denied(request)
+
+    def filter_bulk_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Limit the queryset to the instances the user may change."""
+        for permission in self.get_permissions():
+            if hasattr(permission, "filter_bulk_queryset"):
+                queryset = permission.filter_bulk_queryset(self.request, self, queryset)
+        return queryset
+
+    def check_bulk_filtered(self, request: Request) -> None:
+        """Reject bulk updates and deletions without any filter the filter
+        backends know, unless all instances of the user are requested.
+
+        :raises ValidationError: If the request has no known filter.
+        """
+        if request.query_params.get("all") == "true":
+            return
+        filter_params = self.get_bulk_filter_params()
+        if not any(request.query_params.get(param) for param in filter_params):
+            raise ValidationError(
+                {
+                    "non_field_errors": "Filter the instances with at least one "
+                    f"of the query parameters {', '.join(sorted(filter_params))}, "
+                    "or set all=true to change all of your instances."
+                }
+            )
+
+    def get_bulk_filter_params(self) -> set[str]:
+        """Return the query parameters the filter backends of the view
+        filter by."""
+        queryset = self.get_queryset()
+        params: set[str] = set()
+        for backend_class in self.filter_backends:
+            backend = backend_class()
+            if hasattr(backend, "get_filterset_class"):
+                filterset_class = backend.get_filterset_class(self, queryset)
+                if filterset_class is not None:
+                    params.update(filterset_class.base_filters)
+            search_param = getattr(backend, "search_param", None)
+            if search_param:
+                params.add(search_param)
+        return params
+
+    def get_bulk_queryset(self) -> QuerySet:
+        """Return the instances of the user that match the filters of the
+        query parameters."""
+        return self.filter_bulk_queryset(self.filter_queryset(self.get_queryset()))
+
+    def perform_bulk_update(
+        self, queryset: QuerySet, values: dict[str, Any]
+    ) -> list[Any]:
+        """Update the instances with a single UPDATE statement.
+
+        The rows are locked first, so that the returned primary keys are
+        exactly the updated rows. ``QuerySet.update`` does not set
+        ``auto_now`` fields, so they are set here like ``save`` would.
+
+        :return: The primary keys of the updated instances.
+        """
+        for field in queryset.model._meta.concrete_fields:
+            if isinstance(field, DateTimeField) and field.auto_now:
+                values.setdefault(field.attname, timezone.now())
+        if not self.bulk_send_signals:
+            pks = list(
+                queryset.select_for_update(of=("self",))
+                .order_by()
+                .values_list("pk", flat=True)
+            )
+            queryset.model._base_manager.using(queryset.db).filter(pk__in=pks).update(
+                **values
+            )
+            return pks
+
+        instances = list(queryset)
+        for instance in instances:
+            for field_name, value in values.items():
+                setattr(instance, field_name, value)
+            instance.save(update_fields=list(values))
+        return [instance.pk for instance in instances]
+
+    def perform_bulk_delete(self, queryset: QuerySet) -> list[Any]:
+        """Delete the instances with a single DELETE statement.
+
+        :return: The primary keys of the deleted instances.
+        """
+        if not self.bulk_send_signals:
+            return delete_returning_pks(queryset)
+        pks = list(queryset.values_list("pk", flat=True))
+        queryset.delete()
+        return pks
+
+    def bulk_changed(self, pks: list[Any]) -> None:
+        """Called in the transaction of a bulk update or deletion with the
+        primary keys of the changed instances."""
+
+
+def delete_returning_pks(queryset: QuerySet) -> list[Any]:
+    """Delete the rows of a queryset with a single DELETE statement, without
+    collecting related objects or sending signals.
+
+    :return: The primary keys of the deleted rows.
+    """
+    meta = queryset.model._meta
+    connection = connections[queryset.db]
+    quote_name = connection.ops.quote_name
+    pk_column = f"{quote_name(meta.db_table)}.{quote_name(meta.pk.column)}"
+    subquery, params = (
+        queryset.order_by().values("pk").query.get_compiler(queryset.db).as_sql()
+    )
+    # QuerySet.delete would collect the rows in Python to send their
+    # signals, and not return them. RETURNING is supported by PostgreSQL.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {quote_name(meta.db_table)} WHERE {pk_column} IN "
+            f"({subquery}) RETURNING {pk_column}",
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
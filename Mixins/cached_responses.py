@@ -0,0 +1,134 @@
+"""This module serves repeated reads of the same resource from the response
+cache.
+
+The first anonymous read of an instance is rendered as usual and its bytes
+and headers are cached, later reads are answered from the cache without
+querying the database, serializing or rendering. Conditional requests are
+answered from the cached ``ETag`` and ``Last-Modified`` headers as well.
+Concurrent misses for the same response are coalesced into a single read.
+
+The cache is invalidated by signal receivers of the models, see
+``Posts.signals``.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from Caching.response_cache import CachedResponse, get_resource, get_response_cache
+from Mixins.conditional_requests import ConditionalRequestsViewMixin
+
+
+class CachedResponsesViewMixin(ConditionalRequestsViewMixin):
+    """View mixin caching the rendered retrieve responses of anonymous users.
+
+    The responses are rendered by the conditional ``retrieve``, so the
+    cached headers carry its validators. Only anonymous responses are
+    cached, since the browsable API renders the user into the page.
+    Responses are not cached at all with ATOMIC_REQUESTS, as every request
+    then runs in a transaction.
+    """
+
+    def is_response_cached(self) -> bool:
+        """Return True if the response to this request is cached."""
+        return self.request.user.is_anonymous
+
+    def get_response_cache_key(self) -> str | None:
+        """Return the cache key of the response to this request, or None if
+        the response is not cached."""
+        request = self.request
+        if not self.is_response_cached():
+            return None
+        model = self.get_queryset().model
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            # Equal primary keys written differently in the URL have to map
+            # to the same resource to be invalidated together.
+            pk = model._meta.pk.to_python(self.kwargs[lookup_url_kwarg])
+        except ValidationError:
+            return None
+        variant = f"{request.accepted_media_type} {request.build_absolute_uri()}"
+        return get_response_cache().make_key(get_resource(model, pk), variant)
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """Answer from the response cache, or retrieve the instance and cache
+        the rendered response.
+
+        Concurrent requests missing the cache for the same response wait
+        for a single request to build it, see ``ResponseCache.get_or_build``.
+        """
+        key = self.get_response_cache_key()
+        if key is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        built_response: HttpResponseBase | None = None
+
+        def build() -> CachedResponse | None:
+            nonlocal built_response
+            built_response = super(CachedResponsesViewMixin, self).retrieve(
+                request, *args, **kwargs
+            )
+            # Only DRF responses are rendered, and may be cached.
+            if isinstance(built_response, Response):
+                built_response = self.finalize_response(request, built_response)
+            return self.get_cacheable_response(built_response)
+
+        cached = get_response_cache().get_or_build(key, build)
+        if built_response is not None:
+            return built_response
+        if cached is None:
+            # The response built by a concurrent request could not be cached.
+            return super().retrieve(request, *args, **kwargs)
+        return self.get_cached_response(request, cached)
+
+    async def aretrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """Retrieve the instance with the asynchronous handler if its response
+        is not cached.
+
+        Cached responses are still answered by ``retrieve`` in a thread, as
+        the response cache and its single flight are synchronous.
+        """
+        if self.is_response_cached():
+            return await sync_to_async(self.retrieve)(request, *args, **kwargs)
+        return await super().aretrieve(request, *args, **kwargs)
+
+    @staticmethod
+    def get_cacheable_response(response: HttpResponseBase) -> CachedResponse | None:
+        """Render a successful response for the cache, or return None if the
+        response must not be cached.
+
+        A response rendered inside a transaction may show rows that are
+        rolled back later, so it is not cached.
+        """
+        if (
+            not isinstance(response, Response)
+            or response.status_code != 200
+            or transaction.get_connection().in_atomic_block
+        ):
+            return None
+        response.render()
+        return CachedResponse(response.content, tuple(response.items()))
+
+    @staticmethod
+    def get_cached_response(
+        request: Request, cached: CachedResponse
+    ) -> HttpResponseBase:
+        """Build the response of a cache hit, or a 304 response if the client
+        already has it."""
+        response = HttpResponse(cached.content, headers=dict(cached.headers))
+        last_modified = response.headers.get("Last-Modified")
+        conditional_response = get_conditional_response(
+            request,
+            etag=response.headers.get("ETag"),
+            last_modified=(
+                parse_http_date_safe(last_modified) if last_modified else None
+            ),
+            response=response,
+        )
+        # The response given is returned unless the client already has it.
+        return conditional_response or response
@@ -0,0 +1,258 @@
+"""This module provides conditional GET requests for the API.
+
+Responses carry a strong ``ETag``, and detail responses also a
+``Last-Modified`` date, both derived from the modification dates of the
+rows. A request with ``If-None-Match`` or ``If-Modified-Since`` is first
+checked against a metadata query that only selects the primary keys and
+modification dates, so a client with an unchanged resource gets a
+``304 Not Modified`` response without the rows being loaded or serialized.
+
+List responses only carry an ``ETag``, since removing a row from a list does
+not advance any modification date. The ``ETag`` of a page of a paginated
+list also covers the links to the pages around it, which are part of the
+response and move when rows are added or removed next to the page.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Iterable, TypeVar
+
+from django.db.models import Model, QuerySet
+from django.http import HttpResponse, HttpResponseBase
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+Validators = tuple[str, datetime | None]
+ResponseT = TypeVar("ResponseT", bound=HttpResponseBase)
+
+
+class ConditionalRequestsViewMixin(GenericAPIView):
+    """View mixin adding ``ETag`` and ``Last-Modified`` headers to retrieve and
+    list responses, and answering conditional requests for unchanged
+    resources with ``304 Not Modified``.
+
+    ``modified_fields`` names the model fields that date every change of the
+    representation of an instance, they are always selected together with
+    the primary key.
+
+    The mixin implements the list and retrieve actions, so views combine it
+    with the other model mixins instead of ``ModelViewSet``. Its asynchronous
+    handlers read with the methods of ``Mixins.async_reads``, and are only
+    used by views of ``AsyncReadsViewMixin``.
+    """
+
+    modified_fields: tuple[str, ...] = ()
+
+    if TYPE_CHECKING:
+
+        async def aget_object(self, queryset: QuerySet | None = None) -> Model: ...
+
+        async def apaginate_queryset(self, queryset: QuerySet) -> list | None: ...
+
+        async def aget_serializer_data(self, instances: Any) -> Any: ...
+
+    def retrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """Retrieve an instance, or answer with 304 if it has not changed."""
+        if self.is_conditional(request):
+            validators = self.get_validators([self.get_validator_object()], True)
+            not_modified = self.get_not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, self.get_validators([instance], True))
+
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """List the instances, or answer with 304 if the page has not
+        changed."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_conditional(request):
+            validator_page = self.paginate_queryset(
+                self.get_validator_queryset(queryset)
+            )
+            validators = self.get_validators(
+                validator_page if validator_page is not None else queryset,
+                False,
+                self.get_page_links(validator_page),
+            )
+            not_modified = self.get_not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        page = self.paginate_queryset(queryset)
+        instances = page if page is not None else queryset
+        data = self.get_serializer(instances, many=True).data
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return self.set_validators(
+            response, self.get_validators(instances, False, self.get_page_links(page))
+        )
+
+    async def aretrieve(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """Retrieve an instance like ``retrieve``, with the asynchronous ORM,
+        see ``Mixins.async_reads``."""
+        if self.is_conditional(request):
+            validators = self.get_validators([await self.aget_validator_object()], True)
+            not_modified = self.get_not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        instance = await self.aget_object()
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(response, self.get_validators([instance], True))
+
+    async def alist(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """List the instances like ``list``, with the asynchronous ORM, see
+        ``Mixins.async_reads``."""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_conditional(request):
+            validator_queryset = self.get_validator_queryset(queryset)
+            validator_page = await self.apaginate_queryset(validator_queryset)
+            page_links = self.get_page_links(validator_page)
+            if validator_page is None:
+                validator_page = [instance async for instance in validator_queryset]
+            validators = self.get_validators(validator_page, False, page_links)
+            not_modified = self.get_not_modified_response(request, validators)
+            if not_modified is not None:
+                return not_modified
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            instances = page
+        else:
+            instances = [instance async for instance in queryset]
+        data = await self.aget_serializer_data(instances)
+        if page is not None:
+            response = self.get_paginated_response(data)
+        else:
+            response = Response(data)
+        return self.set_validators(
+            response, self.get_validators(instances, False, self.get_page_links(page))
+        )
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Keep the modified fields selected when only some columns are
+        selected, so that the validators never load deferred fields."""
+        queryset = super().filter_queryset(queryset)
+        field_names, defer = queryset.query.deferred_loading
+        if field_names and not defer:
+            queryset = queryset.only(*field_names, *self.modified_fields)
+        return queryset
+
+    @staticmethod
+    def is_conditional(request: Request) -> bool:
+        """Return True if the request has a validator to check."""
+        return (
+            "If-None-Match" in request.headers or "If-Modified-Since" in request.headers
+        )
+
+    def get_validator_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Narrow the queryset to the columns the validators are computed
+        from, without loading any related objects."""
+        return queryset.prefetch_related(None).only(
+            queryset.model._meta.pk.name, *self.modified_fields
+        )
+
+    def get_validator_object(self) -> Model:
+        """Return the requested instance with only the columns the validators
+        are computed from.
+
+        :raises Http404: If the instance does not exist.
+        """
+        queryset = self.get_validator_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        instance = get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def aget_validator_object(self) -> Model:
+        """Return the instance of ``get_validator_object``, read with the
+        asynchronous ORM.
+
+        :raises Http404: If the instance does not exist.
+        """
+        return await self.aget_object(
+            self.get_validator_queryset(self.filter_queryset(self.get_queryset()))
+        )
+
+    def get_page_links(self, page: Iterable[Model] | None) -> tuple[str | None, ...]:
+        """Return the links to the pages before and after the page just
+        paginated, or nothing for a list that is not paginated.
+
+        A paginator without links, like ``BasePagination``, has none.
+        """
+        paginator = self.paginator
+        if page is None or paginator is None:
+            return ()
+        get_previous_link = getattr(paginator, "get_previous_link", None)
+        get_next_link = getattr(paginator, "get_next_link", None)
+        return (
+            get_previous_link() if get_previous_link is not None else None,
+            get_next_link() if get_next_link is not None else None,
+        )
+
+    def get_validators(
+        self,
+        instances: Iterable[Model],
+        detail: bool,
+        page_links: tuple[str | None, ...] = (),
+    ) -> Validators:
+        """Compute the ETag and the last modification date of a response.
+
+        The ETag covers the primary key and the modified fields of every
+        instance in order, the links to the neighbouring pages of a page,
+        and the media type of the response, since the same resource is
+        rendered differently for every media type.
+
+        :param instances: The instances of the response.
+        :param detail: True for a single instance, the last modification date
+            is only exact for detail responses.
+        :param page_links: The links of a page, see ``get_page_links``.
+        :return: The quoted ETag and the last modification date, or None.
+        """
+        digest = hashlib.sha256(str(self.request.accepted_media_type).encode())
+        digest.update(repr(page_links).encode())
+        modified_dates: list[datetime] = []
+        for instance in instances:
+            values = [getattr(instance, name) for name in self.modified_fields]
+            modified_dates.extend(value for value in values if value is not None)
+            digest.update(repr((instance.pk, *values)).encode())
+        last_modified = max(modified_dates) if detail and modified_dates else None
+        return quote_etag(digest.hexdigest()), last_modified
+
+    @staticmethod
+    def set_validators(response: ResponseT, validators: Validators) -> ResponseT:
+        """Add the ETag and Last-Modified headers to a response."""
+        etag, last_modified = validators
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+    def get_not_modified_response(
+        self, request: Request, validators: Validators
+    ) -> HttpResponseBase | None:
+        """Return a 304 response, with the validators, if the resource has not
+        changed since the client fetched it, otherwise None."""
+        etag, last_modified = validators
+        headers = self.set_validators(HttpResponse(), validators)
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=(
+                int(last_modified.timestamp()) if last_modified is not None else None
+            ),
+            response=headers,
+        )
+        return None if response is headers else response
@@ -0,0 +1,128 @@
+"""This module provides sparse fieldsets for the API.
+
+Clients can limit the fields of a response with the ``fields`` query
+parameter, for example ``?fields=id,title``. Besides removing the other
+fields from the serializer, the database columns behind them are not
+selected at all, so large text columns are neither read from the database
+nor decoded when they are not needed.
+"""
+
+from typing import Any, Iterable
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import QuerySet
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import GenericAPIView
+
+
+class SparseFieldsetsSerializerMixin(serializers.Serializer):
+    """Serializer mixin taking an optional ``fields`` argument with the names
+    of the fields to keep, all other fields are removed."""
+
+    def __init__(self, *args, fields: Iterable[str] | None = None, **kwargs) -> None:
+        """Remove the fields that are not requested.
+
+        :param fields: Names of the fields to keep, or None to keep all fields.
+        """
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
+class SparseFieldsetsViewMixin(GenericAPIView):
+    """View mixin that reads the ``fields`` query parameter of read requests,
+    passes it on to the serializer and limits the queryset to the columns the
+    requested fields are read from."""
+
+    fields_query_param = "fields"
+
+    def get_requested_fields(self) -> list[str] | None:
+        """Return the validated field names of the ``fields`` query parameter.
+
+        :return: The requested field names, or None if all fields should be
+            returned.
+        :raises ValidationError: If a requested field does not exist.
+        """
+        request = self.request
+        if request.method not in permissions.SAFE_METHODS:
+            return None
+        fields_param = request.query_params.get(self.fields_query_param)
+        if not fields_param:
+            return None
+
+        requested_fields = [
+            field_name.strip()
+            for field_name in fields_param.split(",")
+            if field_name.strip()
+        ]
+        readable_fields = self.get_readable_fields()
+        unknown_fields = [
+            field_name
+            for field_name in requested_fields
+            if field_name not in readable_fields
+        ]
+        if unknown_fields:
+            raise ValidationError(
+                {
+                    self.fields_query_param: f"Unknown fields: "
+                    f"{', '.join(unknown_fields)}. Available fields: "
+                    f"{', '.join(readable_fields)}."
+                }
+            )
+        return requested_fields
+
+    def get_readable_fields(self) -> dict[str, serializers.Field]:
+        """Return the fields of the serializer that are included in
+        responses, by name."""
+        serializer = self.get_serializer_class()()
+        if not isinstance(serializer, serializers.Serializer):
+            # Only serializers with fields have fields to select.
+            return {}
+        return {
+            field_name: field
+            for field_name, field in serializer.fields.items()
+            if not field.write_only
+        }
+
+    def get_serializer(self, *args, **kwargs) -> serializers.BaseSerializer:
+        """Pass the requested fields on to the serializer."""
+        requested_fields = self.get_requested_fields()
+        if requested_fields is not None:
+            kwargs["fields"] = requested_fields
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Only select the columns of the requested fields, and the primary
+        key, from the database."""
+        queryset = super().filter_queryset(queryset)
+        requested_fields = self.get_requested_fields()
+        if requested_fields is None:
+            return queryset
+        columns = self.get_columns(queryset, requested_fields)
+        return queryset.only(queryset.model._meta.pk.name, *columns)
+
+    def get_columns(self, queryset: QuerySet, field_names: list[str]) -> list[str]:
+        """Map serializer fields to the concrete model fields they read.
+
+        Fields that are not backed by a column of the model, such as related
+        lists and computed fields, do not add any column.
+
+        :param queryset: The queryset of the view.
+        :param field_names: The names of the requested serializer fields.
+        :return: The names of the model fields to select.
+        """
+        readable_fields = self.get_readable_fields()
+        columns: list[str] = []
+        for field_name in field_names:
+            source: Any = readable_fields[field_name].source
+            if not isinstance(source, str) or source == "*":
+                continue
+            try:
+                model_field = queryset.model._meta.get_field(source.split(".")[0])
+            except FieldDoesNotExist:
+                continue
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(model_field.name)
+        return columns
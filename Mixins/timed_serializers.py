@@ -0,0 +1,30 @@
+"""This module provides the timing of serializers for the metrics of
+requests.
+
+The time a serializer spends on the representation of its instances is
+added to the serializer time of the current request, see
+``Metrics.prometheus``. Only the serializer serializing the data of the
+response is timed, nested serializers are part of its time.
+"""
+
+from typing import Any
+
+from rest_framework import serializers
+
+from Metrics.prometheus import time_serializer
+
+
+class TimedSerializerMixin(serializers.Serializer):
+    """Serializer mixin adding the time of representing instances to the
+    serializer time of the request."""
+
+    def to_representation(self, instance: Any) -> Any:
+        """Represent an instance, timed unless the serializer is nested."""
+        parent = self.parent
+        if parent is not None and (
+            not isinstance(parent, serializers.ListSerializer)
+            or parent.parent is not None
+        ):
+            return super().to_representation(instance)
+        with time_serializer():
+            return super().to_representation(instance)
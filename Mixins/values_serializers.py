@@ -0,0 +1,394 @@
+"""This module provides a fast read only path for serializing lists.
+
+A ``ModelSerializer`` spends most of the time of a large list response on
+dispatching every field of every instance: fetching the attribute, checking
+for related objects and calling the field. ``ValuesSerializer`` compiles the
+fields of a serializer once into a list of columns and converters, reads
+the rows with ``values_list()`` instead of building model instances, and
+converts each row into a plain dict. The output is the same as the output
+of the serializer it was compiled from.
+
+Asynchronous views read the rows with the asynchronous ORM instead, see
+``Mixins.async_reads``.
+
+Only serializers whose fields read concrete model fields, primary keys of
+related objects and lists of nested serializers of reverse foreign keys are
+supported. Views fall back to the regular serializer for any other.
+"""
+
+from collections import defaultdict
+from datetime import datetime, tzinfo
+from typing import Any, Callable, Iterable, NamedTuple, Sequence
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ManyToOneRel, Model, QuerySet
+from django.db.models.query import ModelIterable
+from django.http import HttpResponseBase
+from rest_framework import ISO_8601, serializers
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from Metrics.prometheus import time_serializer
+from Mixins.conditional_requests import ConditionalRequestsViewMixin
+
+
+def yields_instances(queryset: QuerySet) -> bool:
+    """Return True if a queryset yields model instances, not the rows of
+    ``values()`` or ``values_list()``."""
+    return issubclass(queryset._iterable_class, ModelIterable)
+
+
+class ValuesField(NamedTuple):
+    """A compiled serializer field."""
+
+    name: str
+    column: str
+    # Converts the value of the column, None if it is output as it is.
+    convert: Callable[[Any], Any] | None
+
+
+class NestedValues(NamedTuple):
+    """A compiled list of nested serializers of a reverse foreign key."""
+
+    name: str
+    serializer: "ValuesSerializer"
+    # The manager of the related model, and the foreign key to the parent.
+    manager: Any
+    foreign_key: str
+
+
+class ValuesSerializer:
+    """Read only counterpart of a model serializer, serializing rows of
+    ``values_list()`` instead of model instances."""
+
+    # Fields whose representation of a database value is the value itself.
+    identity_fields = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.BooleanField,
+    )
+
+    def __init__(self, serializer: serializers.ModelSerializer) -> None:
+        """Compile the readable fields of a serializer.
+
+        :param serializer: The serializer to compile, with any fields already
+            removed, for example by sparse fieldsets.
+        :raises TypeError: If a field of the serializer is not supported.
+        """
+        self.model: type[Model] = serializer.Meta.model
+        self.fields: list[ValuesField] = []
+        self.nested: list[NestedValues] = []
+        # The compiled fields and nested lists in the order of the
+        # serializer, nested lists as their position in self.nested.
+        self.order: list[ValuesField | int] = []
+        for field in serializer._readable_fields:
+            if isinstance(field, serializers.ListSerializer):
+                self.order.append(len(self.nested))
+                self.nested.append(self.compile_nested(field))
+            else:
+                compiled = self.compile_field(field)
+                self.order.append(compiled)
+                self.fields.append(compiled)
+        self.columns = [field.column for field in self.fields]
+
+    @classmethod
+    def for_serializer(
+        cls, serializer: serializers.BaseSerializer
+    ) -> "ValuesSerializer | None":
+        """Compile a serializer, or return None if it is not supported."""
+        if not isinstance(serializer, serializers.ModelSerializer):
+            return None
+        try:
+            return cls(serializer)
+        except TypeError:
+            return None
+
+    @staticmethod
+    def get_names(field: serializers.Field) -> tuple[str, str]:
+        """Return the name and the source attribute of a bound field.
+
+        :raises TypeError: If the source is not the name of an attribute.
+        """
+        if not isinstance(field.field_name, str) or not isinstance(field.source, str):
+            raise TypeError(f"{field} does not read an attribute.")
+        return field.field_name, field.source
+
+    def get_model_field(self, source: str) -> Any:
+        """Return the model field of a source.
+
+        :raises TypeError: If the source is not a field of the model.
+        """
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise TypeError(f"{source} is not a field of {self.model.__name__}.")
+
+    def compile_field(self, field: serializers.Field) -> ValuesField:
+        """Compile a field reading a column of the model.
+
+        :raises TypeError: If the field is not supported.
+        """
+        name, source = self.get_names(field)
+        model_field = self.get_model_field(source)
+        if not model_field.concrete:
+            raise TypeError(f"{name} does not read a column.")
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or (
+                field.pk_field is not None
+            ):
+                raise TypeError(f"{name} is not a primary key field.")
+            # The column of a foreign key already holds the primary key.
+            return ValuesField(name, source, None)
+        if isinstance(field, serializers.ManyRelatedField):
+            raise TypeError(f"{name} is a many related field.")
+        if type(field) in self.identity_fields:
+            return ValuesField(name, source, None)
+        if type(field) is serializers.DateTimeField:
+            return ValuesField(name, source, self.compile_datetime(field))
+        return ValuesField(name, source, field.to_representation)
+
+    @staticmethod
+    def compile_datetime(field: serializers.DateTimeField) -> Callable[[Any], Any]:
+        """Compile the conversion of aware datetimes to ISO 8601 strings,
+        which resolves the format and time zone of the field only once."""
+        output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+        field_timezone = (
+            field.timezone if hasattr(field, "timezone") else field.default_timezone()
+        )
+        if (
+            output_format is None
+            or output_format.lower() != ISO_8601
+            or not isinstance(field_timezone, tzinfo)
+        ):
+            return field.to_representation
+
+        def convert(value: Any) -> Any:
+            if not isinstance(value, datetime) or value.tzinfo is None:
+                return field.to_representation(value)
+            text = value.astimezone(field_timezone).isoformat()
+            return f"{text[:-6]}Z" if text.endswith("+00:00") else text
+
+        return convert
+
+    def compile_nested(self, field: serializers.ListSerializer) -> NestedValues:
+        """Compile a list of nested serializers of a reverse foreign key.
+
+        :raises TypeError: If the list is not supported.
+        """
+        name, source = self.get_names(field)
+        relation = self.get_model_field(source)
+        if not isinstance(relation, ManyToOneRel) or not isinstance(
+            field.child, serializers.ModelSerializer
+        ):
+            raise TypeError(f"{name} is not a reverse foreign key.")
+        return NestedValues(
+            name,
+            ValuesSerializer(field.child),
+            relation.related_model._default_manager,
+            relation.field.name,
+        )
+
+    def get_rows(self, queryset: QuerySet, *extra_columns: str) -> QuerySet:
+        """Return the rows of a queryset with the columns of the serializer.
+
+        :param queryset: The queryset of the model of the serializer.
+        :param extra_columns: Further columns or annotations the rows need,
+            for example for pagination.
+        :return: A queryset of named tuples, which also have a ``pk``.
+        """
+        columns = dict.fromkeys(("pk", *self.columns, *extra_columns))
+        return queryset.prefetch_related(None).values_list(*columns, named=True)
+
+    def serialize(self, rows: Iterable[Any]) -> list[dict[str, Any]]:
+        """Serialize rows, or the instances of a model queryset.
+
+        :return: The representation of every row, like the ``data`` of the
+            serializer with ``many=True``.
+        """
+        if isinstance(rows, QuerySet) and yields_instances(rows):
+            rows = self.get_rows(rows)
+        rows = list(rows)
+        nested = [self.get_nested_data(nested, rows) for nested in self.nested]
+        return self.serialize_rows(rows, nested)
+
+    async def aserialize(self, rows: Iterable[Any]) -> list[dict[str, Any]]:
+        """Serialize rows like ``serialize``, reading the rows and the related
+        rows of nested lists with the asynchronous ORM."""
+        if isinstance(rows, QuerySet):
+            if yields_instances(rows):
+                rows = self.get_rows(rows)
+            rows = [row async for row in rows]
+        else:
+            rows = list(rows)
+        nested = [await self.aget_nested_data(nested, rows) for nested in self.nested]
+        return self.serialize_rows(rows, nested)
+
+    def serialize_rows(
+        self, rows: list[Any], nested: list[dict[Any, list]]
+    ) -> list[dict[str, Any]]:
+        """Serialize fetched rows.
+
+        :param rows: The rows to serialize.
+        :param nested: The representation of the related rows of every
+            nested list, see ``get_nested_data``.
+        :return: The representation of every row.
+        """
+        order = self.order
+        data = []
+        for row in rows:
+            item = {}
+            for field in order:
+                if isinstance(field, int):
+                    item[self.nested[field].name] = nested[field].get(row.pk, [])
+                    continue
+                value = getattr(row, field.column)
+                if value is not None and field.convert is not None:
+                    value = field.convert(value)
+                item[field.name] = value
+            data.append(item)
+        return data
+
+    @classmethod
+    def get_nested_data(cls, nested: NestedValues, rows: list[Any]) -> dict[Any, list]:
+        """Serialize the related rows of a nested list with a single query.
+
+        :return: The representation of the related rows by the primary key
+            of their parent.
+        """
+        if not rows:
+            return {}
+        related_rows = list(cls.get_related_rows(nested, rows))
+        return cls.group_by_parent(
+            nested, related_rows, nested.serializer.serialize(related_rows)
+        )
+
+    @classmethod
+    async def aget_nested_data(
+        cls, nested: NestedValues, rows: list[Any]
+    ) -> dict[Any, list]:
+        """Serialize the related rows of a nested list like
+        ``get_nested_data``, with the asynchronous ORM."""
+        if not rows:
+            return {}
+        related_rows = [row async for row in cls.get_related_rows(nested, rows)]
+        return cls.group_by_parent(
+            nested, related_rows, await nested.serializer.aserialize(related_rows)
+        )
+
+    @staticmethod
+    def get_related_rows(nested: NestedValues, rows: list[Any]) -> QuerySet:
+        """Return the related rows of a nested list for the rows, with the
+        foreign key to their parent."""
+        return nested.serializer.get_rows(
+            nested.manager.filter(
+                **{f"{nested.foreign_key}__in": [row.pk for row in rows]}
+            ),
+            nested.foreign_key,
+        )
+
+    @staticmethod
+    def group_by_parent(
+        nested: NestedValues, related_rows: list[Any], data: list[dict[str, Any]]
+    ) -> dict[Any, list]:
+        """Group the representation of related rows by the primary key of
+        their parent."""
+        data_by_parent: dict[Any, list] = defaultdict(list)
+        for related_row, item in zip(related_rows, data):
+            data_by_parent[getattr(related_row, nested.foreign_key)].append(item)
+        return data_by_parent
+
+
+class ValuesSerializerViewMixin(ConditionalRequestsViewMixin):
+    """View mixin serializing list responses with a ``ValuesSerializer``
+    compiled from the serializer of the request, if it is supported.
+
+    Views opt in with ``use_values_serializer``, after checking that their
+    list output is the same with it, since serializers with custom
+    ``to_representation`` methods or fields are not detected.
+
+    The rows also carry the columns the pagination orders by and the
+    ``modified_fields`` of conditional requests, so both work with rows as
+    they do with instances.
+    """
+
+    use_values_serializer = False
+    values_serializer: ValuesSerializer | None = None
+
+    def get_row_columns(self) -> list[str]:
+        """Return the columns the rows need besides the serialized ones."""
+        columns = list(getattr(self, "modified_fields", ()))
+        if self.paginator is not None and hasattr(self.paginator, "get_ordering"):
+            columns += [
+                field.lstrip("-") for field in self.paginator.get_ordering(self)
+            ]
+        return columns
+
+    def get_page_rows(self, queryset: QuerySet) -> QuerySet:
+        """Return the rows to paginate instead of the instances, if the
+        values serializer is used."""
+        if self.values_serializer is not None and yields_instances(queryset):
+            return self.values_serializer.get_rows(queryset, *self.get_row_columns())
+        return queryset
+
+    def paginate_queryset(
+        self, queryset: QuerySet | Sequence[Any]
+    ) -> Sequence[Any] | None:
+        """Paginate rows instead of instances with the values serializer."""
+        if isinstance(queryset, QuerySet):
+            queryset = self.get_page_rows(queryset)
+        return super().paginate_queryset(queryset)
+
+    async def apaginate_queryset(self, queryset: QuerySet) -> list | None:
+        """Paginate rows instead of instances with the values serializer, with
+        the asynchronous ORM."""
+        return await super().apaginate_queryset(self.get_page_rows(queryset))
+
+    def get_validator_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Read the validators of conditional list requests from rows, which
+        the pagination keeps as they are."""
+        queryset = super().get_validator_queryset(queryset)
+        if self.values_serializer is None:
+            return queryset
+        columns = dict.fromkeys(("pk", *self.get_row_columns()))
+        return queryset.values_list(*columns, named=True)
+
+    def get_serializer(self, *args, **kwargs) -> Any:
+        """Return the values serializer for the rows of a list response."""
+        if self.values_serializer is not None and kwargs.get("many"):
+            return ValuesSerializerData(self.values_serializer, args[0])
+        return super().get_serializer(*args, **kwargs)
+
+    async def aget_serializer_data(self, instances: Any) -> Any:
+        """Serialize the rows of a list response with the values serializer,
+        reading the rows of nested lists with the asynchronous ORM."""
+        if self.values_serializer is None:
+            return await super().aget_serializer_data(instances)
+        with time_serializer():
+            return await self.values_serializer.aserialize(instances)
+
+    async def alist(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """List the instances like ``list``, with the asynchronous handler."""
+        if self.use_values_serializer:
+            self.values_serializer = ValuesSerializer.for_serializer(
+                self.get_serializer()
+            )
+        return await super().alist(request, *args, **kwargs)
+
+    # Defined last, so that the annotations of the class still refer to the
+    # built-in list.
+    def list(self, request: Request, *args, **kwargs) -> HttpResponseBase:
+        """List the instances, with the values serializer if possible."""
+        if self.use_values_serializer:
+            self.values_serializer = ValuesSerializer.for_serializer(
+                self.get_serializer()
+            )
+        return super().list(request, *args, **kwargs)
+
+
+class ValuesSerializerData:
+    """Stands in for a serializer with ``many=True`` in list views, whose
+    ``data`` is the output of a values serializer."""
+
+    def __init__(self, serializer: ValuesSerializer, rows: Iterable[Any]) -> None:
+        with time_serializer():
+            self.data = serializer.serialize(rows)
@@ -3,6 +3,7 @@
 What operations they have access to and what they can do.
 """
 
+from django.db.models import QuerySet
 from rest_framework import permissions
 from rest_framework.request import Request
 from rest_framework.views import APIView
@@ -35,10 +36,46 @@ class IsAuthorAnyRead(permissions.BasePermission):
             return False
 
         if request.method == "POST":
-            # Casting to prevent type mismatch.
-            return str(request.data.get("author_id")) == str(request.user.id)
+            if isinstance(request.data, list):
+                # Bulk creation, every item is checked on its own with
+                # has_bulk_item_permission.
+                return request.user.is_authenticated
+            return self.is_author(request, request.data.get("author_id"))
         return True
 
+    def has_bulk_item_permission(
+        self, request: Request, view: APIView, item: object
+    ) -> bool:
+        """Preventing the user to create an item of a bulk creation for
+        another author than themselves.
+
+        :param request: The incoming request object
+        :param view: The view we are working with
+        :param item: An item of the bulk creation
+        :return: True if the user is the author of the item, otherwise False.
+        """
+        return isinstance(item, dict) and self.is_author(request, item.get("author_id"))
+
+    def filter_bulk_queryset(
+        self, request: Request, view: APIView, queryset: QuerySet
+    ) -> QuerySet:
+        """Limit the objects of a bulk update or deletion to those the user is
+        the author of, the rule of has_object_permission as a filter.
+
+        :param request: The incoming request object
+        :param view: The view we are working with
+        :param queryset: The objects to update or delete
+        :return: The objects of the user.
+        """
+        return queryset.filter(author_id=request.user.pk)
+
+    @staticmethod
+    def is_author(request: Request, author_id: object) -> bool:
+        """Return True if the author ID is the ID of the user of the
+        request."""
+        # Casting to prevent type mismatch.
+        return str(author_id) == str(request.user.pk)
+
     def has_object_permission(
         self, request: Request, view: APIView, obj: Post | Comment
     ) -> bool:
@@ -56,8 +93,6 @@ class IsAuthorAnyRead(permissions.BasePermission):
         """
         if request.method == "GET":
             return True
-        else:
-            # Casting to prevent type mismatch.
-            return hasattr(request.user, "id") and str(obj.author_id.id) == str(
-                request.user.id
-            )
+        # The column of the foreign key holds the ID of the author, reading
+        # obj.author_id.id would load the whole user first.
+        return hasattr(request.user, "id") and self.is_author(request, obj.author_id_id)
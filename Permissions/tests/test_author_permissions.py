@@ -1,3 +1,4 @@
+from typing import Any
 from unittest.mock import Mock
 
 from django.contrib.auth.models import AnonymousUser
@@ -8,6 +9,7 @@ from rest_framework.test import APIRequestFactory
 from rest_framework.views import APIView
 
 from Permissions.author_permissions import IsAuthorAnyRead
+from Posts.models import Post
 from Users.models import CustomUser
 
 
@@ -29,7 +31,7 @@ class AuthorPermissionTest(SimpleTestCase):
 
         # Faking the object. Object should have the author as some user
         self.author_object = Mock()
-        self.author_object.author_id.id = self.author_id
+        self.author_object.author_id_id = self.author_id
 
         # REST API request factory
         self.factory = APIRequestFactory()
@@ -144,3 +146,59 @@ class AuthorPermissionTest(SimpleTestCase):
                 request, APIView(), self.author_object
             )
         )
+
+    def test_has_object_permission_without_loading_author(self) -> None:
+        # The author is not cached on the post, reading it would query the
+        # database, which is not allowed in a SimpleTestCase.
+        post = baker.prepare(Post, author_id_id=self.author_id)
+        request = self.factory.delete(self.detail_view_url)
+        request.user = self.user
+        self.assertTrue(self.permission.has_object_permission(request, APIView(), post))
+
+    def bulk_item(self) -> dict[str, Any]:
+        """An item of a bulk creation by the author."""
+        return {"author_id": self.author_id, "title": "", "content": ""}
+
+    def bulk_post_request(self, user: CustomUser | AnonymousUser) -> Request:
+        """Simulates a bulk post-request without performing one."""
+        request = self.factory.post(self.list_view_url)
+        request.data = [self.bulk_item()]  # type: ignore
+        request.user = user
+        return request
+
+    def test_has_permission_bulk_authenticated(self) -> None:
+        request = self.bulk_post_request(self.other_user)
+        self.assertTrue(self.permission.has_permission(request, APIView()))
+
+    def test_has_permission_bulk_anonymous(self) -> None:
+        request = self.bulk_post_request(self.anonymous_user)
+        self.assertFalse(self.permission.has_permission(request, APIView()))
+
+    def test_has_bulk_item_permission_owner(self) -> None:
+        request = self.bulk_post_request(self.user)
+        self.assertTrue(
+            self.permission.has_bulk_item_permission(
+                request, APIView(), self.bulk_item()
+            )
+        )
+
+    def test_has_bulk_item_permission_not_owner(self) -> None:
+        request = self.bulk_post_request(self.other_user)
+        self.assertFalse(
+            self.permission.has_bulk_item_permission(
+                request, APIView(), self.bulk_item()
+            )
+        )
+
+    def test_has_bulk_item_permission_not_an_object(self) -> None:
+        request = self.bulk_post_request(self.user)
+        self.assertFalse(
+            self.permission.has_bulk_item_permission(request, APIView(), "item")
+        )
+
+    def test_filter_bulk_queryset_by_author(self) -> None:
+        request = self.factory.delete(self.list_view_url)
+        request.user = self.user
+        queryset = Mock()
+        self.permission.filter_bulk_queryset(request, APIView(), queryset)
+        queryset.filter.assert_called_once_with(author_id=self.user.id)
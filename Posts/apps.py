@@ -8,3 +8,7 @@ class PostsConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "Posts"
+
+    def ready(self) -> None:
+        """Connect the signal receivers of the app."""
+        from Posts import signals  # noqa: F401
@@ -0,0 +1,34 @@
+"""This module builds the plain text excerpts shown in post listings.
+
+The excerpt is computed once when a post is written and stored with the
+post, so listings never have to read or truncate the full content.
+"""
+
+from django.utils.html import strip_tags
+
+EXCERPT_LENGTH = 300
+ELLIPSIS = "…"
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Return the beginning of the content as plain text, truncated on a word
+    boundary.
+
+    Markup is removed and all whitespace is collapsed into single spaces. A
+    truncated excerpt ends with an ellipsis, so it is at most one character
+    longer than the given length.
+
+    :param content: The content of a post.
+    :param length: The maximum number of characters before the ellipsis.
+    :return: The excerpt of the content.
+    """
+    text = " ".join(strip_tags(content).split())
+    if len(text) <= length:
+        return text
+
+    # Looking one character past the length finds a boundary right after
+    # the last whole word that fits.
+    boundary = text.rfind(" ", 0, length + 1)
+    if boundary <= 0:
+        boundary = length
+    return text[:boundary].rstrip() + ELLIPSIS
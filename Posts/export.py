@@ -0,0 +1,151 @@
+"""This module exports posts with their comments as newline-delimited JSON.
+
+Every line is one post with all of its comments, in the representation of
+``PostWithCommentsSerializer``, ordered by post ID. The posts are read with
+a server-side cursor in chunks, and the comments are prefetched for one
+chunk at a time, so the memory used does not grow with the number of posts.
+
+An export can be resumed after the last post it wrote, by exporting the
+posts after that ID.
+
+Under ASGI, Django sends a synchronous streaming response only after
+collecting all of it, so the response is streamed by an asynchronous
+iterator instead, which reads every buffered piece in the thread of the
+request while the previous one is sent.
+"""
+
+from typing import AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from Posts.models import Comment, Post
+from Posts.serializers import PostWithCommentsSerializer
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders the errors of the export endpoint as a single line of JSON,
+    the exported lines themselves are streamed without a renderer."""
+
+    media_type = NDJSON_MEDIA_TYPE
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        """Render the data as a line of JSON."""
+        if data is None:
+            return b""
+        line = JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode(data)
+        return f"{line}\n".encode()
+
+
+def iter_posts(after_id: int | None = None, chunk_size: int = 2000) -> Iterator[Post]:
+    """Iterate over the posts to export, with their comments prefetched.
+
+    :param after_id: Only export the posts with a greater ID, or None to
+        export every post.
+    :param chunk_size: The number of posts fetched from the cursor, and
+        whose comments are prefetched, at a time.
+    """
+    posts = Post.objects.defer("search_vector", "excerpt").order_by("id")
+    if after_id is not None:
+        posts = posts.filter(id__gt=after_id)
+    return posts.prefetch_related(
+        Prefetch("comments", queryset=Comment.objects.order_by("id"))
+    ).iterator(chunk_size=chunk_size)
+
+
+def iter_lines(posts: Iterable[Post]) -> Iterator[tuple[Post, bytes]]:
+    """Serialize every post to a line of JSON.
+
+    :return: The posts together with their lines.
+    """
+    # A single serializer instance converts every post, instead of binding
+    # the fields of a new serializer for each one.
+    serializer = PostWithCommentsSerializer()
+    encoder = JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    for post in posts:
+        line = encoder.encode(serializer.to_representation(post))
+        yield post, f"{line}\n".encode()
+
+
+def iter_buffered(
+    chunks: Iterable[bytes], buffer_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Join small chunks of bytes into chunks of at least the buffer size, so
+    that they are written and compressed in fewer, larger pieces."""
+    buffer: list[bytes] = []
+    buffered = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        buffered += len(chunk)
+        if buffered >= buffer_size:
+            yield b"".join(buffer)
+            buffer.clear()
+            buffered = 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def export_lines(
+    after_id: int | None = None, chunk_size: int = 2000
+) -> Iterator[bytes]:
+    """Iterate over the buffered lines of an export of the posts after an
+    ID."""
+    return iter_buffered(
+        line for _, line in iter_lines(iter_posts(after_id, chunk_size))
+    )
+
+
+async def aiter_chunks(chunks: Iterator[bytes]) -> AsyncIterator[bytes]:
+    """Iterate asynchronously over the chunks of a synchronous iterator,
+    each read in the thread of the request, where the server-side cursor
+    of the export is open."""
+
+    def next_chunk() -> bytes | None:
+        return next(chunks, None)
+
+    try:
+        while (chunk := await sync_to_async(next_chunk)()) is not None:
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            await sync_to_async(close)()
+
+
+def parse_after_id(value: str | None) -> int | None:
+    """Parse the ID an export resumes after, or return None if it is not
+    set.
+
+    :raises ValueError: If the value is not a non-negative number.
+    """
+    if not value:
+        return None
+    after_id = int(value)
+    if after_id < 0:
+        raise ValueError(value)
+    return after_id
+
+
+def streaming_export_response(
+    after_id: int | None = None, chunk_size: int = 2000, asynchronous: bool = False
+) -> StreamingHttpResponse:
+    """Return a response streaming the export of the posts after an ID.
+
+    The response is compressed by the compression middleware, in the
+    buffered pieces of ``iter_buffered``.
+
+    :param asynchronous: True to stream the export with an asynchronous
+        iterator, for requests served under ASGI.
+    """
+    lines = export_lines(after_id, chunk_size)
+    return StreamingHttpResponse(
+        aiter_chunks(lines) if asynchronous else lines,
+        content_type=NDJSON_MEDIA_TYPE,
+    )
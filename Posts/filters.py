@@ -0,0 +1,68 @@
+"""This module defines filter backends for the posts API.
+
+The full-text search backend matches posts against the stored search
+vector of the post, which the GIN index on that column makes fast, and
+annotates every match with its relevance rank.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, FloatField, QuerySet
+from django.db.models.functions import Cast
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.request import Request
+from rest_framework.views import APIView
+
+
+class PostSearchFilter(BaseFilterBackend):
+    """Full-text search over the title and content of posts with the ``q``
+    query parameter.
+
+    The query uses the web search syntax, so quoted phrases, ``or`` and
+    ``-excluded`` words are supported. Matching posts are annotated with a
+    ``rank`` that views can order by.
+    """
+
+    search_param = "q"
+    search_config = "english"
+    ordering = ("-rank", "-id")
+
+    @classmethod
+    def get_search_terms(cls, request: Request) -> str:
+        """Return the search terms of the request, or an empty string."""
+        return request.query_params.get(cls.search_param, "").strip()
+
+    def filter_queryset(
+        self, request: Request, queryset: QuerySet, view: APIView
+    ) -> QuerySet:
+        """Filter the posts by the search terms and annotate them with their
+        relevance rank.
+
+        :param request: The incoming request object.
+        :param queryset: The posts to search.
+        :param view: The view we are working with.
+        :return: The matching posts, or all posts if there are no terms.
+        """
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        query = SearchQuery(
+            search_terms, config=self.search_config, search_type="websearch"
+        )
+        # ts_rank() returns a real, cast it so that the rank survives the
+        # round trip through the pagination cursor without losing precision.
+        rank = Cast(SearchRank(F("search_vector"), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(rank=rank)
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict]:
+        """Describe the search query parameter."""
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "Full-text search over the title and content of "
+                "posts, results are ordered by relevance.",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -0,0 +1,85 @@
+"""This module defines a management command that exports every post with its
+comments as newline-delimited JSON, for example for a nightly dump.
+
+The posts are read with a server-side cursor and written line by line, see
+``Posts.export``, so the command runs in constant memory however many posts
+there are.
+"""
+
+import gzip
+import sys
+from typing import BinaryIO
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from Posts.export import iter_buffered, iter_lines, iter_posts
+
+
+class Command(BaseCommand):
+    """Write the export of the posts to a file or to the standard output."""
+
+    help = "Export posts with their comments as newline-delimited JSON."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the output, compression, resume and chunk size arguments."""
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="The file to write the export to, - for the standard output.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Compress the export with gzip.",
+        )
+        parser.add_argument(
+            "--after-id",
+            type=int,
+            default=None,
+            help="Only export the posts with a greater ID, to resume an export.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Number of posts to fetch from the database at a time.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Export the posts and report the last exported ID, which a resumed
+        export starts after."""
+        if options["chunk_size"] < 1:
+            raise CommandError("The chunk size must be at least 1.")
+
+        exported = 0
+        last_id = options["after_id"]
+
+        def lines():
+            nonlocal exported, last_id
+            posts = iter_posts(options["after_id"], options["chunk_size"])
+            for post, line in iter_lines(posts):
+                exported += 1
+                last_id = post.id
+                yield line
+
+        output = self.open_output(options["output"], options["gzip"])
+        try:
+            for chunk in iter_buffered(lines()):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+            sys.stdout.buffer.flush()
+
+        self.stderr.write(f"Exported {exported} posts, the last post ID is {last_id}.")
+
+    @staticmethod
+    def open_output(path: str, compress: bool) -> BinaryIO | gzip.GzipFile:
+        """Open the binary stream to write the export to."""
+        if path == "-":
+            if compress:
+                return gzip.GzipFile(fileobj=sys.stdout.buffer, mode="wb")
+            return sys.stdout.buffer
+        if compress:
+            return gzip.open(path, "wb")
+        return open(path, "wb")
@@ -0,0 +1,404 @@
+"""This module defines a management command that imports users, posts and
+comments from another blog.
+
+The rows are read from JSON Lines or CSV files, one file per model, and
+written with PostgreSQL ``COPY FROM STDIN`` in batches, which is orders of
+magnitude faster than saving them one by one through the API or the ORM.
+Passwords are hashed and the excerpts of posts are computed in a pool of
+processes, since they dominate the import of users and posts otherwise.
+
+Every row gets a new ID from the ID sequence of its table, like an insert.
+The IDs in the files are only used to remap the author of posts and
+comments and the post of comments to the new IDs, and a reference to an ID
+not in the files refers to the row already in the database with that ID, so
+that comments can be added to existing posts. The tables are locked against
+other writes during the import, so that the rows the records refer to stay
+as they were found. The comment count and date of posts are never read from
+the files, the comment triggers fire for ``COPY`` as well and maintain them,
+and the cached responses of the posts that got comments are invalidated.
+"""
+
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterator, cast
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
+
+from Posts.excerpts import make_excerpt
+from Posts.models import Comment, Post
+from Posts.signals import invalidate_cached
+from Users.models import CustomUser
+
+# The characters with a special meaning in the text format of COPY.
+COPY_TEXT_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+# A record of a file with the line number it starts at.
+Record = tuple[int, dict[str, Any]]
+
+
+def hash_password(password: str | None) -> str:
+    """Hash a plain text password, keeping passwords that are already hashed
+    by one of the configured hashers.
+
+    A missing password is stored as unusable, like for users created with
+    ``set_unusable_password``.
+    """
+    if not password:
+        return make_password(None)
+    try:
+        identify_hasher(password)
+    except ValueError:
+        return make_password(password)
+    return password
+
+
+def read_records(path: Path) -> Iterator[Record]:
+    """Read the records of a JSON Lines file, or of a CSV file with a header
+    row if the name of the file ends with .csv.
+
+    :raises CommandError: If a line is not valid JSON.
+    """
+    with path.open(newline="", encoding="utf-8") as file:
+        if path.suffix.lower() == ".csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                raise CommandError(f"{path}:{line_number}: {error}") from None
+
+
+def to_copy_text(value: Any) -> str:
+    """Format a value for the text format of COPY."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).translate(COPY_TEXT_ESCAPES)
+
+
+class Command(BaseCommand):
+    """Import users, posts and comments in one transaction with COPY,
+    remapping their IDs."""
+
+    help = "Import users, posts and comments from JSON Lines or CSV files."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the file, batch size and worker arguments."""
+        parser.add_argument("--users", type=Path, help="The file of the users.")
+        parser.add_argument("--posts", type=Path, help="The file of the posts.")
+        parser.add_argument("--comments", type=Path, help="The file of the comments.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Number of rows to write with one COPY statement.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes hashing passwords and computing excerpts.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Import the files in the order of their dependencies."""
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("The batch size and workers must be at least 1.")
+
+        # The new IDs of the users and posts by their ID in the files.
+        self.id_maps: dict[type[models.Model], dict[str, int]] = {
+            CustomUser: {},
+            Post: {},
+        }
+        # The IDs of the rows in the database that records refer to.
+        self.existing_ids: dict[type[models.Model], dict[str, int]] = {
+            CustomUser: {},
+            Post: {},
+        }
+        self.commented_posts: set[int] = set()
+        # The processes only start with the first batch, inside the
+        # transaction. Spawned processes open their own connections instead
+        # of sharing the connection of the transaction, as forked ones would.
+        self.pool = ProcessPoolExecutor(
+            options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+        self.workers = options["workers"]
+        imported = {}
+        try:
+            with transaction.atomic():
+                self.lock_tables()
+                for model, option in (
+                    (CustomUser, "users"),
+                    (Post, "posts"),
+                    (Comment, "comments"),
+                ):
+                    if options[option] is not None:
+                        imported[option] = self.import_file(
+                            model, Path(options[option]), options["batch_size"]
+                        )
+                invalidate_cached(Post, *self.commented_posts)
+        finally:
+            self.pool.shutdown()
+
+        summary = ", ".join(f"{count} {name}" for name, count in imported.items())
+        self.stdout.write(f"Imported {summary or 'nothing'}.")
+
+    @staticmethod
+    def lock_tables() -> None:
+        """Lock the tables against writes of other transactions until the
+        import is committed, still allowing reads."""
+        tables = ", ".join(
+            connection.ops.quote_name(model._meta.db_table)
+            for model in (CustomUser, Post, Comment)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {tables} IN SHARE ROW EXCLUSIVE MODE")
+
+    @staticmethod
+    def allocate_ids(model: type[models.Model], count: int) -> list[int]:
+        """Take the IDs of new rows from the ID sequence of a model, so that
+        the IDs of deleted rows are never given out again.
+
+        :return: The IDs in ascending order.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, %s)) "
+                "FROM generate_series(1, %s)",
+                [
+                    connection.ops.quote_name(model._meta.db_table),
+                    model._meta.pk.column,
+                    count,
+                ],
+            )
+            return sorted(pk for pk, in cursor.fetchall())
+
+    @staticmethod
+    def get_copy_fields(model: type[models.Model]) -> list[models.Field]:
+        """Return the fields of the columns read from the records, all but the
+        columns the database generates, the columns of the comment triggers
+        and the excerpt, which ``get_rows`` computes from the content."""
+        skipped = set(getattr(model, "trigger_fields", ()))
+        if model is Post:
+            skipped.add("excerpt")
+        return [
+            field
+            for field in model._meta.concrete_fields
+            if not field.generated and field.name not in skipped
+        ]
+
+    @staticmethod
+    def get_related_model(field: models.Field) -> type[models.Model]:
+        """Return the model of the rows a foreign key refers to."""
+        related_model = field.related_model
+        if not isinstance(related_model, type):
+            raise TypeError(f"{field} has no related model.")
+        return related_model
+
+    def import_file(
+        self, model: type[models.Model], path: Path, batch_size: int
+    ) -> int:
+        """Import the records of a file in batches.
+
+        :return: The number of imported rows.
+        :raises CommandError: If a record is invalid or refers to a missing
+            user or post, or the database rejects a row.
+        """
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist.")
+        fields = self.get_copy_fields(model)
+        # Concrete fields always have a column.
+        columns = [cast(str, field.column) for field in fields]
+        if model is Post:
+            columns.append("excerpt")
+        records = read_records(path)
+        imported = 0
+        while batch := list(islice(records, batch_size)):
+            ids = self.allocate_ids(model, len(batch))
+            rows = self.get_rows(model, fields, path, batch, ids)
+            try:
+                self.copy_rows(model, columns, rows)
+            except DatabaseError as error:
+                raise CommandError(f"{path}: {error}") from error
+            imported += len(rows)
+        return imported
+
+    def get_rows(
+        self,
+        model: type[models.Model],
+        fields: list[models.Field],
+        path: Path,
+        batch: list[Record],
+        ids: list[int],
+    ) -> list[list[Any]]:
+        """Convert a batch of records to rows with new IDs, in the order of
+        the fields, followed by the excerpt for posts."""
+        if model is CustomUser:
+            passwords = self.map_in_pool(
+                hash_password, [record.get("password") for _, record in batch]
+            )
+            batch = [
+                (line_number, {**record, "password": password})
+                for (line_number, record), password in zip(batch, passwords)
+            ]
+
+        self.add_existing_ids(fields, batch)
+        id_map = self.id_maps.get(model)
+        now = timezone.now()
+        rows = []
+        for new_id, (line_number, record) in zip(ids, batch):
+            try:
+                values = self.get_values(fields, record, now)
+            except ValidationError as error:
+                raise CommandError(
+                    f"{path}:{line_number}: {'; '.join(error.messages)}"
+                ) from None
+            values["id"] = new_id
+            if id_map is not None:
+                source_id = record.get("id")
+                source_id = "" if source_id is None else str(source_id)
+                if not source_id or source_id in id_map:
+                    raise CommandError(
+                        f"{path}:{line_number}: id: Missing or duplicate ID "
+                        f"{source_id!r}."
+                    )
+                id_map[source_id] = new_id
+            rows.append([values[field.attname] for field in fields])
+            if model is Comment:
+                self.commented_posts.add(values["post_id"])
+
+        if model is Post:
+            content = [field.attname for field in fields].index("content")
+            excerpts = self.map_in_pool(make_excerpt, [row[content] for row in rows])
+            for row, excerpt in zip(rows, excerpts):
+                row.append(excerpt)
+        return rows
+
+    def add_existing_ids(self, fields: list[models.Field], batch: list[Record]) -> None:
+        """Find the rows in the database that the records of a batch refer to
+        with IDs not in the files, with one query per foreign key."""
+        for field in fields:
+            if not field.is_relation:
+                continue
+            model = self.get_related_model(field)
+            ids = {
+                int(value)
+                for value in (str(record.get(field.name)) for _, record in batch)
+                if value.isdigit()
+                and value not in self.id_maps[model]
+                and value not in self.existing_ids[model]
+            }
+            if ids:
+                self.existing_ids[model].update(
+                    (str(pk), pk)
+                    for pk in model._default_manager.filter(pk__in=ids).values_list(
+                        "pk", flat=True
+                    )
+                )
+
+    def get_values(
+        self, fields: list[models.Field], record: dict[str, Any], now: Any
+    ) -> dict[str, Any]:
+        """Convert the values of a record to the values of the columns.
+
+        Foreign keys are mapped to the new IDs, or to the existing rows for
+        IDs not in the files, missing values are set to the default of the
+        field.
+
+        :raises ValidationError: If a value is invalid, missing or refers to
+            a row neither imported nor in the database.
+        """
+        values: dict[str, Any] = {}
+        for field in fields:
+            if field.primary_key:
+                continue
+            value = record.get(field.name)
+            if field.is_relation:
+                model = self.get_related_model(field)
+                related_id = self.id_maps[model].get(
+                    str(value), self.existing_ids[model].get(str(value))
+                )
+                if related_id is None:
+                    raise ValidationError(
+                        f"{field.name}: No imported or existing {model.__name__} "
+                        f"with the ID {value!r}."
+                    )
+                values[field.attname] = related_id
+            elif value is None or (
+                value == "" and field.empty_strings_allowed is False
+            ):
+                values[field.attname] = self.get_default(field, now)
+            else:
+                try:
+                    value = field.to_python(value)
+                except ValidationError as error:
+                    raise ValidationError(
+                        f"{field.name}: {'; '.join(error.messages)}"
+                    ) from None
+                if isinstance(value, datetime) and timezone.is_naive(value):
+                    value = timezone.make_aware(value)
+                values[field.attname] = value
+        return values
+
+    @staticmethod
+    def get_default(field: models.Field, now: Any) -> Any:
+        """Return the value of a field missing from a record.
+
+        :raises ValidationError: If the field is required.
+        """
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+            return now
+        if field.has_default():
+            return field.get_default()
+        if field.null:
+            return None
+        if field.blank or not field.editable:
+            return ""
+        raise ValidationError(f"{field.name}: This field is required.")
+
+    def map_in_pool(self, function: Callable[[Any], Any], values: list[Any]) -> list:
+        """Call a function for every value of a batch in the pool of
+        processes."""
+        chunk_size = max(1, len(values) // (self.workers * 4))
+        return list(self.pool.map(function, values, chunksize=chunk_size))
+
+    @staticmethod
+    def copy_rows(
+        model: type[models.Model], columns: list[str], rows: list[list[Any]]
+    ) -> None:
+        """Write rows to the columns of the table of a model with a single
+        COPY statement."""
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(map(to_copy_text, row)))
+            buffer.write("\n")
+        buffer.seek(0)
+        quote_name = connection.ops.quote_name
+        column_list = ", ".join(map(quote_name, columns))
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote_name(model._meta.db_table)} ({column_list}) FROM STDIN",
+                buffer,
+            )
@@ -0,0 +1,79 @@
+"""This module defines a management command that repairs the denormalized
+comment count of posts.
+
+The count is maintained by database triggers, so it only drifts if the
+triggers were disabled, for example during a manual data migration.
+"""
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from Posts.models import Comment, Post
+from Posts.signals import invalidate_cached
+
+
+class Command(BaseCommand):
+    """Recount the comments of every post and fix the posts whose stored
+    comment count differs, one batch of post IDs at a time."""
+
+    help = "Repair the comment_count of posts that has drifted from the comments."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the batch size and dry run arguments."""
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10000,
+            help="Number of post IDs to check per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many posts have drifted.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Repair the comment counts in batches of post ID ranges, so that no
+        transaction locks a large part of the post table."""
+        batch_size = options["batch_size"]
+        id_range = Post.objects.aggregate(first=Min("id"), last=Max("id"))
+        if id_range["first"] is None:
+            self.stdout.write("No posts to repair.")
+            return
+
+        actual_count = Coalesce(
+            Subquery(
+                Comment.objects.filter(post=OuterRef("pk"))
+                .values("post")
+                .annotate(count=Count("id"))
+                .values("count"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+
+        repaired = 0
+        for start in range(id_range["first"], id_range["last"] + 1, batch_size):
+            with transaction.atomic():
+                drifted = (
+                    Post.objects.filter(id__gte=start, id__lt=start + batch_size)
+                    .annotate(actual_count=actual_count)
+                    .exclude(comment_count=F("actual_count"))
+                )
+                if options["dry_run"]:
+                    repaired += drifted.count()
+                    continue
+                post_ids = list(
+                    drifted.select_for_update(of=("self",)).values_list("id", flat=True)
+                )
+                # The cached responses of the posts and their comment lists
+                # are validated by comments_modified, like the triggers set it.
+                repaired += Post.objects.filter(id__in=post_ids).update(
+                    comment_count=actual_count, comments_modified=Now()
+                )
+                invalidate_cached(Post, *post_ids)
+
+        action = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(f"{action} {repaired} posts with a drifted comment count.")
@@ -0,0 +1,151 @@
+"""This module defines a management command that runs the API with gunicorn.
+
+The command picks the worker class, the number of workers and the threads of
+every worker from the CPU count and the SERVER_* configuration, and replaces
+itself with a gunicorn master that preloads the application. The hooks of
+``gunicorn.conf.py`` freeze the preloaded objects before every fork, warm up
+every worker with a request before it accepts traffic and log the memory of
+the workers.
+"""
+
+import os
+import shlex
+import sys
+
+from decouple import config
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+# The gunicorn worker class and the application of every worker class.
+WORKER_CLASSES = {
+    "gthread": ("gthread", "Bloggity.wsgi:application"),
+    "asgi": ("uvicorn_worker.UvicornWorker", "Bloggity.asgi:application"),
+}
+
+
+def get_cpu_count() -> int:
+    """Return the number of CPUs the process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_default_workers(worker_class: str, cpu_count: int) -> int:
+    """Return the number of workers for the CPUs.
+
+    Threaded workers wait on the database and the network with the GIL
+    released, so there are more of them than CPUs, as gunicorn recommends.
+    An ASGI worker waits on its event loop instead, so one per CPU keeps
+    every CPU busy.
+    """
+    if worker_class == "asgi":
+        return cpu_count
+    return 2 * cpu_count + 1
+
+
+class Command(BaseCommand):
+    """Run gunicorn with preloaded, copy-on-write friendly workers."""
+
+    help = "Serve the API with gunicorn, tuned for the CPUs of the machine."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        """Add the server arguments, which default to the SERVER_* config."""
+        parser.add_argument(
+            "--bind",
+            default=config("SERVER_BIND", default="0.0.0.0:8080"),
+            help="Address to listen on.",
+        )
+        parser.add_argument(
+            "--worker-class",
+            choices=WORKER_CLASSES,
+            default=config("SERVER_WORKER_CLASS", default="gthread"),
+            help="Threaded WSGI workers, or ASGI workers with asynchronous reads.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=config("SERVER_WORKERS", default=0, cast=int),
+            help="Number of worker processes, by default derived from the CPUs.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=config("SERVER_THREADS", default=4, cast=int),
+            help="Number of threads of every gthread worker.",
+        )
+        parser.add_argument(
+            "--keep-alive",
+            type=int,
+            default=config("SERVER_KEEP_ALIVE", default=75, cast=int),
+            help=(
+                "Seconds to keep idle connections open, longer than the idle "
+                "timeout of the load balancer in front."
+            ),
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            default=config("SERVER_TIMEOUT", default=30, cast=int),
+            help="Seconds after which a silent worker is restarted.",
+        )
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=config("SERVER_MAX_REQUESTS", default=10000, cast=int),
+            help="Requests after which a worker is restarted, 0 to never.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only print the gunicorn command.",
+        )
+
+    def handle(self, *args, **options) -> None:
+        """Replace the process with gunicorn, or print its command."""
+        command = self.get_command(options)
+        self.stdout.write(shlex.join(command))
+        if options["dry_run"]:
+            return
+
+        # gunicorn inherits the environment, and with it the settings module.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(command[0], command)
+
+    @staticmethod
+    def get_command(options: dict) -> list[str]:
+        """Return the gunicorn command for the options."""
+        worker_class, application = WORKER_CLASSES[options["worker_class"]]
+        workers = options["workers"] or get_default_workers(
+            options["worker_class"], get_cpu_count()
+        )
+        command = [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            application,
+            "--config",
+            str(settings.BASE_DIR.parent / "gunicorn.conf.py"),
+            "--bind",
+            options["bind"],
+            "--worker-class",
+            worker_class,
+            "--workers",
+            str(workers),
+            "--keep-alive",
+            str(options["keep_alive"]),
+            "--timeout",
+            str(options["timeout"]),
+            "--preload",
+        ]
+        if options["worker_class"] == "gthread":
+            command += ["--threads", str(options["threads"])]
+        if options["max_requests"]:
+            # The jitter keeps the workers from restarting all at once.
+            command += [
+                "--max-requests",
+                str(options["max_requests"]),
+                "--max-requests-jitter",
+                str(options["max_requests"] // 10),
+            ]
+        return command
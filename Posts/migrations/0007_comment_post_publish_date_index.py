@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-17 23:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0006_post_keyset_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                fields=["post", "-publish_date", "-id"],
+                name="comment_post_publish_date_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.0.2 on 2026-10-17 23:53
+
+from django.db import migrations, models
+
+# Statement level triggers with transition tables, so that a bulk insert or
+# delete of comments updates each affected post once per statement instead
+# of once per comment.
+CREATE_COMMENT_COUNT_TRIGGERS = """
+CREATE FUNCTION posts_update_comment_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count
+        FROM (
+            SELECT post_id, count(*) AS count FROM new_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count - changed.count
+        FROM (
+            SELECT post_id, count(*) AS count FROM old_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSE
+        -- Only comments moved to another post change the counts.
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count
+        FROM (
+            SELECT post_id, sum(change) AS count
+            FROM (
+                SELECT post_id, 1 AS change FROM new_comments
+                UNION ALL
+                SELECT post_id, -1 AS change FROM old_comments
+            ) AS changes
+            GROUP BY post_id
+            HAVING sum(change) <> 0
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER posts_comment_count_insert
+AFTER INSERT ON "Posts_comment"
+REFERENCING NEW TABLE AS new_comments
+FOR EACH STATEMENT EXECUTE FUNCTION posts_update_comment_count();
+
+CREATE TRIGGER posts_comment_count_delete
+AFTER DELETE ON "Posts_comment"
+REFERENCING OLD TABLE AS old_comments
+FOR EACH STATEMENT EXECUTE FUNCTION posts_update_comment_count();
+
+CREATE TRIGGER posts_comment_count_update
+AFTER UPDATE ON "Posts_comment"
+REFERENCING OLD TABLE AS old_comments NEW TABLE AS new_comments
+FOR EACH STATEMENT EXECUTE FUNCTION posts_update_comment_count();
+
+UPDATE "Posts_post" AS post
+SET comment_count = counts.count
+FROM (
+    SELECT post_id, count(*) AS count FROM "Posts_comment" GROUP BY post_id
+) AS counts
+WHERE post.id = counts.post_id;
+"""
+
+DROP_COMMENT_COUNT_TRIGGERS = """
+DROP TRIGGER posts_comment_count_update ON "Posts_comment";
+DROP TRIGGER posts_comment_count_delete ON "Posts_comment";
+DROP TRIGGER posts_comment_count_insert ON "Posts_comment";
+DROP FUNCTION posts_update_comment_count();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0007_comment_post_publish_date_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(
+            CREATE_COMMENT_COUNT_TRIGGERS, reverse_sql=DROP_COMMENT_COUNT_TRIGGERS
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.2 on 2026-10-18 00:01
+
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+
+def make_excerpt(content: str, length: int = 300) -> str:
+    """Return the excerpt of a post as Posts.excerpts made it when this
+    migration was written, copied so that later changes to it never change
+    what the migration does."""
+    text = " ".join(strip_tags(content).split())
+    if len(text) <= length:
+        return text
+
+    boundary = text.rfind(" ", 0, length + 1)
+    if boundary <= 0:
+        boundary = length
+    return text[:boundary].rstrip() + "…"
+
+
+def set_excerpts(apps, schema_editor) -> None:
+    """Compute the excerpt of every existing post, in batches so that the
+    posts are never all in memory."""
+    Post = apps.get_model("Posts", "Post")
+    batch = []
+    posts = Post.objects.only("id", "content").order_by("id")
+    for post in posts.iterator(chunk_size=2000):
+        post.excerpt = make_excerpt(post.content)
+        batch.append(post)
+        if len(batch) == 2000:
+            Post.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Post.objects.bulk_update(batch, ["excerpt"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0010_post_title_trigram_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="excerpt",
+            field=models.CharField(blank=True, editable=False, max_length=301),
+        ),
+        migrations.RunPython(set_excerpts, migrations.RunPython.noop),
+    ]
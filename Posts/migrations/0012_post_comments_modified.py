@@ -0,0 +1,110 @@
+# Generated by Django 5.0.2 on 2026-10-18 01:12
+
+from django.db import migrations, models
+
+# Replaces the function of the comment count triggers so that they also date
+# the changes of the comments of a post. Changed comments now touch their
+# post even when the count stays the same.
+UPDATE_COMMENT_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION posts_update_comment_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count,
+            comments_modified = statement_timestamp()
+        FROM (
+            SELECT post_id, count(*) AS count FROM new_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count - changed.count,
+            comments_modified = statement_timestamp()
+        FROM (
+            SELECT post_id, count(*) AS count FROM old_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSE
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count,
+            comments_modified = statement_timestamp()
+        FROM (
+            SELECT post_id, sum(change) AS count
+            FROM (
+                SELECT post_id, 1 AS change FROM new_comments
+                UNION ALL
+                SELECT post_id, -1 AS change FROM old_comments
+            ) AS changes
+            GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE "Posts_post" AS post
+SET comments_modified = newest.publish_date
+FROM (
+    SELECT post_id, max(publish_date) AS publish_date
+    FROM "Posts_comment"
+    GROUP BY post_id
+) AS newest
+WHERE post.id = newest.post_id;
+"""
+
+RESTORE_COMMENT_TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION posts_update_comment_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count
+        FROM (
+            SELECT post_id, count(*) AS count FROM new_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count - changed.count
+        FROM (
+            SELECT post_id, count(*) AS count FROM old_comments GROUP BY post_id
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    ELSE
+        UPDATE "Posts_post" AS post
+        SET comment_count = post.comment_count + changed.count
+        FROM (
+            SELECT post_id, sum(change) AS count
+            FROM (
+                SELECT post_id, 1 AS change FROM new_comments
+                UNION ALL
+                SELECT post_id, -1 AS change FROM old_comments
+            ) AS changes
+            GROUP BY post_id
+            HAVING sum(change) <> 0
+        ) AS changed
+        WHERE post.id = changed.post_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0011_post_excerpt"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="comments_modified",
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunSQL(
+            UPDATE_COMMENT_TRIGGER_FUNCTION,
+            reverse_sql=RESTORE_COMMENT_TRIGGER_FUNCTION,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.2 on 2026-10-18 02:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Posts", "0012_post_comments_modified"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="comment_count",
+            field=models.PositiveIntegerField(db_default=0, default=0, editable=False),
+        ),
+    ]
@@ -5,7 +5,11 @@ queries for retrieving posts with their comments and to avoid violating
 the DRY principle.
 """
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.db import models
+from django.db.models import Prefetch
+from django.db.models.functions import Upper
 from django.db.models.query import QuerySet
 
 from Users.models import CustomUser
@@ -15,15 +19,37 @@ class PostManager(models.Manager):
     """A custom manager for the Post model, adds methods to efficiently query
     all posts and their related comments."""
 
-    def get_all_posts_and_related_comments(self) -> QuerySet:
+    def get_all_posts_and_related_comments(
+        self, comments_limit: int | None = None
+    ) -> QuerySet:
         """Retrieve all Post instances from the database, prefetching related
         comments to minimize database queries.
 
+        When a comments limit is given, only the newest comments of each post
+        are prefetched, one more than the limit so that it is known whether a
+        post has further comments. The database computes this in a single
+        query with a ROW_NUMBER() window partitioned by post, so a post with a
+        huge number of comments is never loaded into memory as a whole.
+
+        Args:
+            comments_limit: The maximum number of comments per post, or None
+            to prefetch every comment.
+
         Returns:
             QuerySet: A QuerySet of all Post instances with their related
             comments prefetched.
         """
-        return self.all().prefetch_related("comments")
+        if comments_limit is None:
+            return self.all().prefetch_related("comments")
+
+        newest_comments = Comment.objects.order_by("-publish_date", "-id")
+        return self.all().prefetch_related(
+            Prefetch(
+                "comments",
+                queryset=newest_comments[: comments_limit + 1],
+                to_attr="newest_comments",
+            )
+        )
 
 
 class Post(models.Model):
@@ -34,13 +60,81 @@ class Post(models.Model):
     )
     title = models.CharField(max_length=100)
     content = models.TextField()
+    # Plain text beginning of the content for listings, set by the
+    # serializers whenever the content is written, see Posts.excerpts.
+    excerpt = models.CharField(max_length=301, blank=True, editable=False)
     publish_date = models.DateTimeField(auto_now=True)
+    # Maintained by database triggers on the comment table, see migration
+    # 0008_post_comment_count. Use the repair_comment_counts command to fix
+    # any drift. The default of the database lets rows be inserted without
+    # the column, like the import does.
+    comment_count = models.PositiveIntegerField(default=0, db_default=0, editable=False)
+    # Set by the same triggers whenever a comment of the post is added,
+    # changed or removed, so it dates every change of the comments.
+    comments_modified = models.DateTimeField(null=True, editable=False)
+    # Computed and stored by the database on every write, so saving a post
+    # is still a single query.
+    search_vector = models.GeneratedField(
+        expression=SearchVector("title", weight="A", config="english")
+        + SearchVector("content", weight="B", config="english"),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
+    # The newest comments of the post, one more than the limit, set by the
+    # prefetch of get_all_posts_and_related_comments with a comments limit.
+    newest_comments: list["Comment"]
 
     objects = (
         models.Manager()
     )  # In the case, we may not want to use the custom manager.
     post_manager = PostManager()
 
+    class Meta:
+        """Composite indexes backing the keyset pagination of posts and the
+        indexes backing the full-text search and the title autocomplete."""
+
+        indexes = [
+            models.Index(
+                fields=["-publish_date", "-id"], name="post_publish_date_id_idx"
+            ),
+            models.Index(
+                fields=["title", "-publish_date", "-id"],
+                name="post_title_publish_date_idx",
+            ),
+            GinIndex(fields=["search_vector"], name="post_search_vector_idx"),
+            # On the upper case title, which is what case-insensitive
+            # lookups compare against.
+            GinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                name="post_title_trigram_idx",
+            ),
+        ]
+
+    # Columns written only by the triggers of the comment table.
+    trigger_fields = ("comment_count", "comments_modified")
+
+    def save(self, *args, **kwargs) -> None:
+        """Save the post, without writing back the columns of the triggers
+        when it is updated.
+
+        The counts loaded with the post would otherwise overwrite the counts
+        of comments added or removed since it was loaded.
+        """
+        if (
+            not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and not field.generated
+                and field.name not in self.trigger_fields
+            ]
+        super().save(*args, **kwargs)
+
     def __str__(self) -> str:
         """Return a string representation of the Post instance, including its
         title and publish date."""
@@ -57,6 +151,17 @@ class Comment(models.Model):
     content = models.TextField()
     publish_date = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        """Composite index backing the newest first listing of the comments
+        of a post."""
+
+        indexes = [
+            models.Index(
+                fields=["post", "-publish_date", "-id"],
+                name="comment_post_publish_date_idx",
+            ),
+        ]
+
     def __str__(self) -> str:
         """Return a string representation of the Comment instance, including
         its publishing date."""
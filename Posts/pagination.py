@@ -0,0 +1,307 @@
+"""This module defines keyset (cursor) pagination for the posts API.
+
+Instead of an offset, the position in the list is an opaque cursor that
+holds the ordering values of the row at the edge of the current page. The
+next page is then fetched with a range condition on those values, so
+fetching page N costs the same index scan as fetching the first page.
+
+A cursor also holds a hash of the ordering it was made for, since the same
+list is ordered differently with a search query, and its values are only
+positions in that ordering.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, NamedTuple, TypeVar
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+
+ModelT = TypeVar("ModelT", bound=Model)
+
+
+class Cursor(NamedTuple):
+    """The decoded contents of a cursor query parameter."""
+
+    values: tuple[Any, ...]
+    reverse: bool
+
+
+class KeysetPagination(BasePagination):
+    """Paginate a queryset by comparing the ordering columns against the
+    values of the last row seen.
+
+    The ordering must end with a unique column (such as ``id``) so that the
+    position of every row is unambiguous, and it should be backed by a
+    composite index on the same columns.
+    """
+
+    ordering: tuple[str, ...] = ("-publish_date", "-id")
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(
+        self, queryset: QuerySet[ModelT], request: Request, view: APIView | None = None
+    ) -> list[ModelT]:
+        """Return a single page of the queryset.
+
+        One row more than the page size is fetched to find out whether there
+        is a page after this one without running a separate COUNT query.
+
+        :param queryset: The filtered queryset to paginate.
+        :param request: The incoming request object.
+        :param view: The view we are working with.
+        :return: The rows of the requested page.
+        """
+        return self.set_page(list(self.get_page_queryset(queryset, request, view)))
+
+    async def apaginate_queryset(
+        self, queryset: QuerySet[ModelT], request: Request, view: APIView | None = None
+    ) -> list[ModelT]:
+        """Return a single page of the queryset like ``paginate_queryset``,
+        read with the asynchronous ORM."""
+        page_queryset = self.get_page_queryset(queryset, request, view)
+        return self.set_page([row async for row in page_queryset])
+
+    def get_page_queryset(
+        self, queryset: QuerySet[ModelT], request: Request, view: APIView | None
+    ) -> QuerySet[ModelT]:
+        """Decode the position of the requested page and return the queryset
+        of its rows, plus one."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+        self.cursor = self.decode_cursor(request, queryset)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.cursor))
+
+        order_by = self.ordering if not reverse else self.reverse_ordering()
+        return queryset.order_by(*order_by)[: self.page_size + 1]
+
+    def set_page(self, results: list[ModelT]) -> list[ModelT]:
+        """Keep the page of the fetched rows and whether it has neighbouring
+        pages.
+
+        :param results: The rows of the page queryset.
+        :return: The rows of the page, in the order of the ordering.
+        """
+        reverse = self.cursor is not None and self.cursor.reverse
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        return self.page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        """Wrap the serialized page with links to its neighbouring pages."""
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        """Describe the paginated response for the OpenAPI schema."""
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: APIView) -> list[dict]:
+        """Describe the cursor and page size query parameters."""
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page, "
+                f"at most {self.max_page_size}.",
+                "schema": {"type": "integer"},
+            },
+        ]
+
+    def get_page_size(self, request: Request) -> int:
+        """Return the page size requested by the client, capped at
+        ``max_page_size``, or the default page size."""
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view: APIView | None) -> tuple[str, ...]:
+        """Return the ordering of the view if it defines ``keyset_ordering``,
+        otherwise the default ordering of the paginator."""
+        return tuple(getattr(view, "keyset_ordering", self.ordering))
+
+    def reverse_ordering(self) -> tuple[str, ...]:
+        """Return the ordering with every direction flipped, used to walk
+        backwards to the previous page."""
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def get_keyset_filter(self, cursor: Cursor) -> Q:
+        """Build the condition selecting the rows after the cursor position.
+
+        For the ordering ``(-a, -b)`` and the position ``(x, y)`` this is
+        ``a <= x AND (a < x OR (a = x AND b < y))``. The redundant leading
+        bound lets the database use the composite index as a range scan.
+
+        :param cursor: The decoded cursor.
+        :return: A Q object to filter the queryset with.
+        """
+        condition = Q()
+        equal: dict[str, Any] = {}
+        for field, value in zip(self.ordering, cursor.values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") != cursor.reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+
+        first_field = self.ordering[0]
+        bound = "lte" if first_field.startswith("-") != cursor.reverse else "gte"
+        leading_bound = Q(**{f"{first_field.lstrip('-')}__{bound}": cursor.values[0]})
+        return leading_bound & condition
+
+    def get_next_link(self) -> str | None:
+        """Return the link to the page after this one, if there is one."""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(self.get_position(self.page[-1]), False))
+
+    def get_previous_link(self) -> str | None:
+        """Return the link to the page before this one, if there is one."""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(Cursor(self.get_position(self.page[0]), True))
+
+    def get_link_after(self, base_url: str, item: Model) -> str:
+        """Return a link to the page that starts right after the given row.
+
+        :param base_url: The absolute URL of the paginated list endpoint.
+        :param item: The last row the client has already seen.
+        :return: The URL with the cursor query parameter set.
+        """
+        self.base_url = base_url
+        return self.encode_cursor(Cursor(self.get_position(item), False))
+
+    def get_position(self, item: Model) -> tuple[Any, ...]:
+        """Return the values of the ordering columns for a single row."""
+        return tuple(getattr(item, field.lstrip("-")) for field in self.ordering)
+
+    def encode_cursor(self, cursor: Cursor) -> str:
+        """Encode the cursor into the URL of the current request.
+
+        :param cursor: The position and direction to encode.
+        :return: The absolute URL with the cursor query parameter replaced.
+        """
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in cursor.values
+        ]
+        payload = json.dumps(
+            {"v": values, "r": int(cursor.reverse), "o": self.get_ordering_hash()}
+        )
+        encoded = base64.urlsafe_b64encode(payload.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_ordering_hash(self) -> str:
+        """Return a short hash of the ordering, which a cursor has to be
+        decoded with."""
+        return hashlib.sha256(",".join(self.ordering).encode()).hexdigest()[:8]
+
+    def decode_cursor(self, request: Request, queryset: QuerySet) -> Cursor | None:
+        """Decode the cursor query parameter of the request.
+
+        Values of model fields are converted back to their Python type so
+        that malformed cursors are rejected before reaching the database, and
+        cursors of another ordering are rejected as well.
+
+        :param request: The incoming request object.
+        :param queryset: The queryset the cursor belongs to.
+        :return: The decoded cursor, or None when no cursor was sent.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            values = payload["v"]
+            reverse = bool(payload["r"])
+            if payload["o"] != self.get_ordering_hash():
+                raise ValueError
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            converted = tuple(
+                self.to_python(queryset, field.lstrip("-"), value)
+                for field, value in zip(self.ordering, values)
+            )
+        except (
+            binascii.Error,
+            UnicodeError,
+            KeyError,
+            TypeError,
+            ValueError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(converted, reverse)
+
+    @staticmethod
+    def to_python(queryset: QuerySet, name: str, value: Any) -> Any:
+        """Convert a cursor value to the Python type of the model field or
+        the output field of the annotation it belongs to.
+
+        :raises ValueError: If the value is None or the name is neither.
+        :raises ValidationError: If the field rejects the value.
+        """
+        if value is None:
+            raise ValueError
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            if name not in queryset.query.annotations:
+                raise ValueError(name)
+            field = queryset.query.annotations[name].output_field
+        return field.to_python(value)
@@ -1,28 +1,98 @@
 """This module defines serializers for the `Post` and `Comment` models.
 
 It includes serializers for individual `Post` and `Comment` instances,
+a serializer for post listings showing only an excerpt of the content,
 as well as a serializer that combines posts with their associated
 comments for nested serialization.
 """
 
+from django.urls import reverse
 from rest_framework import serializers
 
+from Mixins.sparse_fieldsets import SparseFieldsetsSerializerMixin
+from Mixins.timed_serializers import TimedSerializerMixin
+from Posts.excerpts import make_excerpt
 from Posts.models import Comment, Post
+from Posts.pagination import KeysetPagination
+from Users.models import CustomUser
 
 
-class PostSerializer(serializers.ModelSerializer):
+class AuthorField(serializers.PrimaryKeyRelatedField):
+    """Primary key field of the author of a post or comment.
+
+    Authors write their own posts and comments, so the ID is nearly always
+    the ID of the user of the request, which is answered with the user
+    already loaded by the authentication instead of querying it again.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        kwargs.setdefault("queryset", CustomUser.objects.all())
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data: object) -> CustomUser:
+        """Return the user of the ID, without a query for the user of the
+        request."""
+        user = getattr(self.context.get("request"), "user", None)
+        if user is not None and user.is_authenticated and str(data) == str(user.pk):
+            return user
+        return super().to_internal_value(data)
+
+
+class PostSerializer(
+    TimedSerializerMixin, SparseFieldsetsSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for Post model instances."""
 
+    author_id = AuthorField()
+
     class Meta:
         """Defines fields for the Post model."""
 
         model = Post
-        fields = ["id", "author_id", "title", "content"]
+        fields = ["id", "author_id", "title", "content", "comment_count"]
 
+    def validate(self, attrs: dict) -> dict:
+        """Compute the excerpt of the post whenever its content is written.
 
-class CommentSerializer(serializers.ModelSerializer):
+        :param attrs: The validated field values.
+        :return: The validated field values, including the excerpt.
+        """
+        if "content" in attrs:
+            attrs["excerpt"] = make_excerpt(attrs["content"])
+        return attrs
+
+
+class PostExcerptSerializer(PostSerializer):
+    """Read only serializer for Post model instances in listings, with the
+    stored excerpt instead of the full content."""
+
+    class Meta:
+        """Defines fields for the Post model in listings."""
+
+        model = Post
+        fields = ["id", "author_id", "title", "excerpt", "comment_count"]
+        read_only_fields = fields
+
+
+class PostTitleSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for the ID and title of Post model instances, used for
+    title suggestions."""
+
+    class Meta:
+        """Defines fields for the Post model title suggestions."""
+
+        model = Post
+        fields = ["id", "title"]
+        read_only_fields = fields
+
+
+class CommentSerializer(
+    TimedSerializerMixin, SparseFieldsetsSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for Comment model instances."""
 
+    author_id = AuthorField()
+
     class Meta:
         """Defines fields for the Comment model."""
 
@@ -30,11 +100,14 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ["id", "author_id", "post", "content", "publish_date"]
 
 
-class PostWithCommentsSerializer(serializers.ModelSerializer):
+class PostWithCommentsSerializer(
+    TimedSerializerMixin, SparseFieldsetsSerializerMixin, serializers.ModelSerializer
+):
     """Composite serializer for Post model instances that include related
     comments."""
 
-    comments = CommentSerializer(many=True, read_only=True)
+    author_id = AuthorField()
+    comments: serializers.Field = CommentSerializer(many=True, read_only=True)
 
     class Meta:
         """Defines fields for the Post model with comments."""
@@ -46,5 +119,46 @@ class PostWithCommentsSerializer(serializers.ModelSerializer):
             "content",
             "author_id",
             "publish_date",
+            "comment_count",
             "comments",
         ]
+
+
+class PostWithLimitedCommentsSerializer(PostWithCommentsSerializer):
+    """Composite serializer for Post model instances that include only the
+    newest comments of each post.
+
+    Expects the posts to be fetched with a comments limit so that the newest
+    comments are prefetched into the ``newest_comments`` attribute. The
+    number of comments to include is read from the ``comments_limit`` key of
+    the serializer context.
+    """
+
+    comments = serializers.SerializerMethodField()
+    comments_next = serializers.SerializerMethodField()
+
+    class Meta(PostWithCommentsSerializer.Meta):
+        """Defines fields for the Post model with limited comments."""
+
+        fields = PostWithCommentsSerializer.Meta.fields + ["comments_next"]
+
+    def get_comments(self, post: Post) -> list:
+        """Serialize the newest comments of the post, up to the limit."""
+        comments = post.newest_comments[: self.context["comments_limit"]]
+        serializer: serializers.ListSerializer = serializers.ListSerializer(
+            child=CommentSerializer(), context=self.context
+        )
+        return serializer.to_representation(comments)
+
+    def get_comments_next(self, post: Post) -> str | None:
+        """Return the cursor link to the comments following the included
+        ones, or None if every comment of the post is included."""
+        limit = self.context["comments_limit"]
+        if len(post.newest_comments) <= limit:
+            return None
+
+        url = reverse("posts-comments-list", kwargs={"post_pk": post.id})
+        request = self.context.get("request")
+        if request is not None:
+            url = request.build_absolute_uri(url)
+        return KeysetPagination().get_link_after(url, post.newest_comments[limit - 1])
@@ -0,0 +1,43 @@
+"""This module invalidates the cached responses of posts and comments
+whenever a post or comment is saved or deleted.
+
+Bulk operations that bypass the model signals have to call
+``invalidate_cached`` themselves.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Caching.response_cache import get_resource, get_response_cache
+from Posts.models import Comment, Post
+
+
+def invalidate_cached(model: type[Post | Comment], *pks: int) -> None:
+    """Invalidate the cached responses of posts or comments.
+
+    The instances are invalidated right away and again when the transaction
+    commits, since a concurrent request may still read and cache the old
+    rows until then.
+
+    :param model: The model of the changed instances.
+    :param pks: The IDs of the changed instances.
+    """
+    response_cache = get_response_cache()
+    resources = [get_resource(model, pk) for pk in pks]
+    response_cache.invalidate(*resources)
+    transaction.on_commit(lambda: response_cache.invalidate(*resources))
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender: type[Post], instance: Post, **kwargs) -> None:
+    """Invalidate the cached responses of a saved or deleted post."""
+    invalidate_cached(Post, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment(sender: type[Comment], instance: Comment, **kwargs) -> None:
+    """Invalidate the cached responses of a saved or deleted comment and of
+    its post, which include its comment count and comments."""
+    invalidate_cached(Comment, instance.pk)
+    invalidate_cached(Post, instance.post_id)
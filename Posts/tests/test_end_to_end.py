@@ -1,16 +1,37 @@
+import base64
+import gzip
 import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from http import HTTPStatus
-from typing import TypedDict
-
+from types import ModuleType
+from typing import Any, Iterator, TypedDict
+from unittest.mock import patch
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import msgpack
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import connection
 from django.forms import model_to_dict
-from django.test import TestCase
+from django.http import StreamingHttpResponse
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, resolve
 from model_bakery import baker
 from parameterized import parameterized_class
 from rest_framework.response import Response
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
 from Authentication.client import Client
+from Mixins.async_reads import get_async_urlpatterns
+from Mixins.conditional_requests import ConditionalRequestsViewMixin
+from Posts.export import iter_buffered
 from Posts.models import Comment, Post
+from Posts.serializers import PostWithCommentsSerializer
+from Posts.views import CommentViewSet, PostViewSet
 from Users.models import CustomUser
 from Users.tests import TestUser
 
@@ -164,6 +185,108 @@ class TestBlogComment:
         return client, post
 
 
+class QueryBudgetTestMixin(TestCase):
+    """Asserts an upper bound of the queries of a block, unlike
+    assertNumQueries, so that budgets do not break on queries saved later."""
+
+    @contextmanager
+    def assertMaxQueries(self, max_queries: int, name: str = "") -> Iterator[None]:
+        """Fail if the block runs more than a number of queries, listing the
+        queries it ran.
+
+        :param max_queries: The query budget of the block.
+        :param name: The name of the block in the failure message.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            yield
+        if len(queries) > max_queries:
+            self.fail(
+                f"{name or 'Block'} ran {len(queries)} queries, over its budget "
+                f"of {max_queries}:\n"
+                + "\n".join(
+                    f"{number}. {query['sql']}"
+                    for number, query in enumerate(queries, start=1)
+                )
+            )
+
+
+class EndpointQueryBudgetTest(QueryBudgetTestMixin):
+    """Every endpoint has to stay within its query budget, whatever the
+    number of posts and comments it reads."""
+
+    api_client: APIClient
+    user: CustomUser
+    posts: list[Post]
+    comments: list[Comment]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user_and_client = TestUser.create_test_user()
+        cls.api_client = user_and_client["client"]
+        cls.user = user_and_client["custom_user_instance"]
+        cls.posts = baker.make(Post, author_id=cls.user, _quantity=5)
+        cls.comments = [
+            comment
+            for post in cls.posts
+            for comment in baker.make(
+                Comment, post=post, author_id=cls.user, _quantity=5
+            )
+        ]
+
+    def test_server_timing(self) -> None:
+        response = self.api_client.get("/api/posts/?include_comments=true")
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="3 queries')
+
+    def test_read_endpoints(self) -> None:
+        post, comment = self.posts[0], self.comments[0]
+        for url, budget in (
+            ("/api/posts/", 2),
+            ("/api/posts/?include_comments=true", 3),
+            ("/api/posts/?include_comments=true&comments_limit=2", 3),
+            ("/api/posts/?excerpt=true", 2),
+            ("/api/posts/?fields=id,title", 2),
+            ("/api/posts/?q=lorem", 2),
+            ("/api/posts/autocomplete/?prefix=lor", 2),
+            (f"/api/posts/{post.id}/", 2),
+            (f"/api/posts/{post.id}/?include_comments=true", 3),
+            (f"/api/posts/{post.id}/comments/", 2),
+            (f"/api/posts/{post.id}/comments/{comment.id}/", 2),
+        ):
+            with self.subTest(url), self.assertMaxQueries(budget, f"GET {url}"):
+                response = self.api_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_write_endpoints(self) -> None:
+        post, comment = self.posts[0], self.comments[0]
+        post_data = {"author_id": self.user.id, "title": "Title", "content": "Text"}
+        comment_data = {"author_id": self.user.id, "post": post.id, "content": "Hi"}
+        for method, url, data, budget in (
+            ("post", "/api/posts/", post_data, 2),
+            ("put", f"/api/posts/{post.id}/", post_data, 4),
+            ("post", "/api/posts/bulk/", [post_data] * 10, 5),
+            ("patch", "/api/posts/bulk/?all=true", {"content": "New"}, 5),
+            ("post", f"/api/posts/{post.id}/comments/", comment_data, 3),
+            ("put", f"/api/posts/{post.id}/comments/{comment.id}/", comment_data, 4),
+            ("post", f"/api/posts/{post.id}/comments/bulk/", [comment_data] * 10, 6),
+            (
+                "patch",
+                f"/api/posts/{post.id}/comments/bulk/?all=true",
+                {"content": "New"},
+                5,
+            ),
+            ("delete", f"/api/posts/{post.id}/comments/{comment.id}/", None, 3),
+            ("delete", f"/api/posts/{post.id}/comments/bulk/?all=true", None, 5),
+            ("delete", f"/api/posts/{post.id}/", None, 4),
+            ("delete", "/api/posts/bulk/?all=true", None, 7),
+        ):
+            name = f"{method.upper()} {url}"
+            with self.subTest(name), self.assertMaxQueries(budget, name):
+                response = getattr(self.api_client, method)(
+                    url, data=json.dumps(data), content_type="application/json"
+                )
+                self.assertLess(response.status_code, 300, response.content)
+
+
 class AuthenticatedUserCreatedPostSuccessfullyTest(TestCase):
     def setUp(self) -> None:
         created_post_with_authenticated_user_request_response = (
@@ -312,14 +435,204 @@ class CreateUserAndGetAllPostsTest(TestCase):
         self.assertEqual(self.response.status_code, HTTPStatus.OK)
 
     def test_post_retrieved_successfully(self) -> None:
-        self.assertEqual(len(self.response.data), 3)
+        self.assertEqual(len(self.response.data["results"]), 3)
 
-        for post in self.response.data:
+        for post in self.response.data["results"]:
             self.assertIn("author_id", post)
             self.assertIn("title", post)
             self.assertIn("content", post)
 
 
+def edit_cursor(url: str, **payload: Any) -> str:
+    """Return the URL with the given values changed in the payload of its
+    cursor query parameter."""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    decoded = json.loads(base64.urlsafe_b64decode(query["cursor"]))
+    query["cursor"] = base64.urlsafe_b64encode(
+        json.dumps({**decoded, **payload}).encode()
+    ).decode()
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+class PaginatePostsWithCursorTest(TestCase):
+    api_client: APIClient
+    post_ids: list[int]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.api_client = TestBlogPost.setup_user_posts_and_client(
+            True, number_of_posts=5
+        )
+        # Newest first, the order of the keyset pagination.
+        cls.post_ids = list(
+            Post.objects.order_by("-publish_date", "-id").values_list("id", flat=True)
+        )
+
+    def get_all_pages(self, url: str) -> list[Response]:
+        responses: list[Response] = []
+        while url:
+            response = self.api_client.get(url)
+            responses.append(response)
+            url = response.data["next"]
+        return responses
+
+    def test_first_page(self) -> None:
+        response = self.api_client.get("/api/posts/?page_size=2")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]], self.post_ids[:2]
+        )
+        self.assertIsNotNone(response.data["next"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_following_next_links_returns_every_post_once(self) -> None:
+        responses = self.get_all_pages("/api/posts/?page_size=2")
+        post_ids = [
+            post["id"] for response in responses for post in response.data["results"]
+        ]
+        self.assertEqual(len(responses), 3)
+        self.assertEqual(post_ids, self.post_ids)
+
+    def test_previous_link_returns_previous_page(self) -> None:
+        second_page = self.get_all_pages("/api/posts/?page_size=2")[1]
+        response = self.api_client.get(second_page.data["previous"])
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]], self.post_ids[:2]
+        )
+        self.assertIsNone(response.data["previous"])
+
+    def test_pagination_with_title_filter(self) -> None:
+        post = Post.objects.get(id=self.post_ids[3])
+        response = self.api_client.get(f"/api/posts/?title={post.title}&page_size=2")
+        self.assertEqual([post["id"] for post in response.data["results"]], [post.id])
+        self.assertIsNone(response.data["next"])
+
+    def test_invalid_cursor(self) -> None:
+        response = self.api_client.get("/api/posts/?cursor=invalid")
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+
+class SearchPostsTest(TestCase):
+    title_match: Post
+    content_match: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user = baker.make(CustomUser)
+        cls.content_match = baker.make(
+            Post,
+            author_id=user,
+            title="Travelling light",
+            content="Packing for a long hike in the mountains.",
+        )
+        cls.title_match = baker.make(
+            Post,
+            author_id=user,
+            title="Mountains of Iceland",
+            content="The highlands are best visited in summer.",
+        )
+        baker.make(
+            Post,
+            author_id=user,
+            title="Baking bread",
+            content="Flour, water, salt and patience.",
+        )
+
+    def test_search_ranks_title_matches_first(self) -> None:
+        response = APIClient().get("/api/posts/?q=mountain")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [self.title_match.id, self.content_match.id],
+        )
+
+    def test_search_results_paginated_by_rank(self) -> None:
+        first_page = APIClient().get("/api/posts/?q=mountain&page_size=1")
+        second_page = APIClient().get(first_page.data["next"])
+
+        self.assertEqual(
+            [post["id"] for post in first_page.data["results"]],
+            [self.title_match.id],
+        )
+        self.assertEqual(
+            [post["id"] for post in second_page.data["results"]],
+            [self.content_match.id],
+        )
+        self.assertIsNone(second_page.data["next"])
+
+    def test_search_cursor_with_invalid_rank(self) -> None:
+        first_page = APIClient().get("/api/posts/?q=mountain&page_size=1")
+        ranks: list[object] = ["high", [1], {}]
+        for rank in ranks:
+            with self.subTest(rank=rank):
+                url = edit_cursor(first_page.data["next"], v=[rank, 1])
+                response = APIClient().get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cursor_of_other_ordering(self) -> None:
+        search_page = APIClient().get("/api/posts/?q=mountain&page_size=1")
+        list_page = APIClient().get("/api/posts/?page_size=1")
+        for url in (
+            search_page.data["next"].replace("q=mountain", ""),
+            # Values that are also valid positions of the search ordering.
+            edit_cursor(f"{list_page.data['next']}&q=mountain", v=[0.5, 1]),
+        ):
+            with self.subTest(url=url):
+                response = APIClient().get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_search_without_matches(self) -> None:
+        response = APIClient().get("/api/posts/?q=volcano")
+        self.assertEqual(response.data["results"], [])
+
+    def test_search_vector_updated_on_post_update(self) -> None:
+        Post.objects.filter(id=self.title_match.id).update(title="Volcanoes")
+        response = APIClient().get("/api/posts/?q=volcano")
+        self.assertEqual(
+            [post["id"] for post in response.data["results"]],
+            [self.title_match.id],
+        )
+
+
+class AutocompletePostTitlesTest(TestCase):
+    iceland: Post
+    biking: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user = baker.make(CustomUser)
+        cls.iceland = baker.make(Post, author_id=user, title="Mountains of Iceland")
+        cls.biking = baker.make(Post, author_id=user, title="Mountain biking")
+        baker.make(Post, author_id=user, title="Baking bread")
+
+    def test_autocomplete_prefix(self) -> None:
+        response = APIClient().get("/api/posts/autocomplete/?prefix=mount")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.data,
+            [
+                {"id": self.biking.id, "title": self.biking.title},
+                {"id": self.iceland.id, "title": self.iceland.title},
+            ],
+        )
+
+    def test_autocomplete_word_inside_title(self) -> None:
+        response = APIClient().get("/api/posts/autocomplete/?prefix=iceland")
+        self.assertEqual(
+            [post["id"] for post in response.data],
+            [self.iceland.id],
+        )
+
+    def test_autocomplete_prefix_too_short(self) -> None:
+        response = APIClient().get("/api/posts/autocomplete/?prefix=m")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_autocomplete_without_prefix(self) -> None:
+        response = APIClient().get("/api/posts/autocomplete/")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
 @parameterized_class(
     ("authenticate"),
     [
@@ -345,9 +658,9 @@ class CreateUserAndGetAllCommentsRelatedToPostTest(TestCase):
         self.assertEqual(self.response.status_code, HTTPStatus.OK)
 
     def test_comment_retrieved_successfully(self) -> None:
-        self.assertEqual(len(self.response.data), 3)
+        self.assertEqual(len(self.response.data["results"]), 3)
 
-        for comment in self.response.data:
+        for comment in self.response.data["results"]:
             self.assertIn("author_id", comment)
             self.assertIn("post", comment)
             self.assertIn("content", comment)
@@ -457,9 +770,9 @@ class CreateUserCreatePostCreateCommentGetAllCommentsAndAllPosts(TestCase):
         self.assertEqual(self.response.status_code, HTTPStatus.OK)
 
     def test_all_posts_and_comments_fetched_successfully(self) -> None:
-        self.assertEqual(len(self.response.data), 3)
+        self.assertEqual(len(self.response.data["results"]), 3)
 
-        for post in self.response.data:
+        for post in self.response.data["results"]:
             self.assertIn("author_id", post)
             self.assertIn("title", post)
             self.assertIn("content", post)
@@ -470,6 +783,921 @@ class CreateUserCreatePostCreateCommentGetAllCommentsAndAllPosts(TestCase):
             self.assertIn("content", comment)
 
 
+class GetAllPostsWithLimitedComments(TestCase):
+    post: Post
+    comment_ids: list[int]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        client_and_post_id = (
+            TestBlogPost.setup_user_posts_get_authenticated_client_and_post_id(
+                True, number_of_posts=2
+            )
+        )
+        authenticated_client = client_and_post_id[2]
+        for post in Post.objects.all():
+            TestBlogComment.create_comment_post_response(
+                authenticated_client, post, number_of_comments=5
+            )
+        cls.post = client_and_post_id[1]
+        cls.comment_ids = list(
+            cls.post.comments.order_by("-publish_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+
+    def get_post_data(self, response: Response) -> dict:
+        return next(
+            post for post in response.data["results"] if post["id"] == self.post.id
+        )
+
+    def test_only_newest_comments_included(self) -> None:
+        response = APIClient().get("/api/posts/?include_comments=true&comments_limit=2")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+        for post in response.data["results"]:
+            self.assertEqual(len(post["comments"]), 2)
+        post_data = self.get_post_data(response)
+        self.assertEqual(
+            [comment["id"] for comment in post_data["comments"]],
+            self.comment_ids[:2],
+        )
+
+    def test_comments_fetched_in_one_query(self) -> None:
+        # One query for the posts and one windowed query for their comments.
+        with self.assertNumQueries(2):
+            APIClient().get("/api/posts/?include_comments=true&comments_limit=2")
+
+    def test_comments_next_returns_remaining_comments(self) -> None:
+        response = APIClient().get("/api/posts/?include_comments=true&comments_limit=2")
+        comments_next = self.get_post_data(response)["comments_next"]
+        comments_response = APIClient().get(comments_next)
+
+        self.assertEqual(comments_response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            [comment["id"] for comment in comments_response.data["results"]],
+            self.comment_ids[2:],
+        )
+
+    def test_no_comments_next_when_all_comments_included(self) -> None:
+        response = APIClient().get("/api/posts/?include_comments=true&comments_limit=5")
+        self.assertIsNone(self.get_post_data(response)["comments_next"])
+
+    def test_comment_count_included(self) -> None:
+        response = APIClient().get(f"/api/posts/{self.post.id}/")
+        self.assertEqual(response.data["comment_count"], 5)
+
+    def test_comment_count_decremented_on_delete(self) -> None:
+        self.post.comments.latest("id").delete()
+        response = APIClient().get(f"/api/posts/{self.post.id}/")
+        self.assertEqual(response.data["comment_count"], 4)
+
+    def test_invalid_comments_limit(self) -> None:
+        response = APIClient().get("/api/posts/?include_comments=true&comments_limit=0")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class SparseFieldsetsTest(TestCase):
+    post: Post
+    comment: Comment
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user = baker.make(CustomUser)
+        cls.post = baker.make(Post, author_id=user)
+        cls.comment = baker.make(Comment, post=cls.post, author_id=user)
+
+    def test_list_only_requested_fields(self) -> None:
+        response = APIClient().get("/api/posts/?fields=id,title")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            response.data["results"], [{"id": self.post.id, "title": self.post.title}]
+        )
+
+    def test_unrequested_columns_not_selected(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            APIClient().get(f"/api/posts/{self.post.id}/?fields=id,title")
+        post_query = next(
+            query["sql"] for query in queries if '"Posts_post"' in query["sql"]
+        )
+        self.assertNotIn('"Posts_post"."content"', post_query)
+        self.assertIn('"Posts_post"."title"', post_query)
+
+    def test_fields_with_comments(self) -> None:
+        response = APIClient().get("/api/posts/?include_comments=true&fields=comments")
+        self.assertEqual(list(response.data["results"][0]), ["comments"])
+        self.assertEqual(
+            response.data["results"][0]["comments"][0]["content"],
+            self.comment.content,
+        )
+
+    def test_comment_fields(self) -> None:
+        response = APIClient().get(
+            f"/api/posts/{self.post.id}/comments/{self.comment.id}/?fields=content"
+        )
+        self.assertEqual(response.data, {"content": self.comment.content})
+
+    def test_unknown_field(self) -> None:
+        response = APIClient().get("/api/posts/?fields=id,secret")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class PostExcerptTest(TestCase):
+    api_client: APIClient
+    author_id: int
+    post_id: int
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user_and_client = TestUser.create_test_user()
+        cls.api_client = user_and_client["client"]
+        cls.author_id = user_and_client["custom_user_instance"].id
+        response = cls.api_client.post(
+            "/api/posts/",
+            data=json.dumps(
+                {
+                    "author_id": cls.author_id,
+                    "title": "A long post",
+                    "content": "<p>Lorem ipsum</p> " * 100,
+                }
+            ),
+            content_type="application/json",
+        )
+        cls.post_id = response.data["id"]
+
+    def test_excerpt_stored_on_create(self) -> None:
+        excerpt = Post.objects.get(id=self.post_id).excerpt
+        self.assertTrue(excerpt.startswith("Lorem ipsum Lorem"))
+        self.assertTrue(excerpt.endswith("ipsum…"))
+        self.assertLessEqual(len(excerpt), 301)
+
+    def test_excerpt_updated_with_content(self) -> None:
+        response = self.api_client.put(
+            f"/api/posts/{self.post_id}/",
+            data=json.dumps(
+                {
+                    "author_id": self.author_id,
+                    "title": "A short post",
+                    "content": "Short <b>content</b>",
+                }
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(Post.objects.get(id=self.post_id).excerpt, "Short content")
+
+    def test_list_excerpts(self) -> None:
+        response = APIClient().get("/api/posts/?excerpt=true")
+        post = response.data["results"][0]
+        self.assertEqual(post["excerpt"], Post.objects.get(id=self.post_id).excerpt)
+        self.assertNotIn("content", post)
+
+    def test_content_not_selected(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            APIClient().get("/api/posts/?excerpt=true")
+        post_query = next(
+            query["sql"] for query in queries if '"Posts_post"' in query["sql"]
+        )
+        self.assertNotIn('"Posts_post"."content"', post_query)
+
+
+class MessagePackContentNegotiationTest(TestCase):
+    api_client: APIClient
+    user: CustomUser
+    post: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user_and_client = TestUser.create_test_user()
+        cls.api_client = user_and_client["client"]
+        cls.user = user_and_client["custom_user_instance"]
+        cls.post = baker.make(Post, author_id=cls.user)
+        baker.make(Comment, post=cls.post, _quantity=2)
+
+    def test_same_data_as_json(self) -> None:
+        for url in (
+            "/api/posts/?include_comments=true",
+            f"/api/posts/{self.post.id}/",
+            f"/api/posts/{self.post.id}/comments/",
+        ):
+            with self.subTest(url):
+                response = self.api_client.get(url, HTTP_ACCEPT="application/msgpack")
+                self.assertEqual(response["Content-Type"], "application/msgpack")
+                self.assertEqual(
+                    msgpack.unpackb(response.content),
+                    json.loads(self.api_client.get(url).content),
+                )
+
+    def test_create_post(self) -> None:
+        response = self.api_client.post(
+            "/api/posts/",
+            data=msgpack.packb(
+                {"author_id": self.user.id, "title": "Packed", "content": "Binary"}
+            ),
+            content_type="application/msgpack",
+            HTTP_ACCEPT="application/msgpack",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)["title"], "Packed")
+
+    def test_invalid_body(self) -> None:
+        response = self.api_client.post(
+            "/api/posts/", data=b"\xc1", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class ConditionalGetTest(TestCase):
+    post: Post
+    comment: Comment
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.post = baker.make(Post)
+        cls.comment = baker.make(Comment, post=cls.post)
+
+    def test_validators(self) -> None:
+        response = APIClient().get(f"/api/posts/{self.post.id}/")
+        self.assertTrue(response["ETag"].startswith('"'))
+        self.assertIn("Last-Modified", response)
+
+    def test_post_not_modified(self) -> None:
+        etag = APIClient().get(f"/api/posts/{self.post.id}/")["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(
+                f"/api/posts/{self.post.id}/", HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"Posts_post"."content"', queries[0]["sql"])
+
+    def test_post_not_modified_since(self) -> None:
+        last_modified = APIClient().get(f"/api/posts/{self.post.id}/")["Last-Modified"]
+        response = APIClient().get(
+            f"/api/posts/{self.post.id}/", HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_comment_modifies_post(self) -> None:
+        etag = APIClient().get(f"/api/posts/{self.post.id}/")["ETag"]
+        baker.make(Comment, post=self.post)
+        response = APIClient().get(
+            f"/api/posts/{self.post.id}/", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data["comment_count"], 2)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_not_modified(self) -> None:
+        response = APIClient().get("/api/posts/")
+        self.assertNotIn("Last-Modified", response)
+        response = APIClient().get("/api/posts/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_deleted_post_modifies_list(self) -> None:
+        other_post = baker.make(Post)
+        etag = APIClient().get("/api/posts/")["ETag"]
+        other_post.delete()
+        response = APIClient().get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_deleted_next_page_modifies_list(self) -> None:
+        """Checks that the ETag of a page covers its link to the next page,
+        which disappears with the last post after the page."""
+        baker.make(Post)
+        etag = APIClient().get("/api/posts/?page_size=1")["ETag"]
+        self.post.delete()
+        response = APIClient().get("/api/posts/?page_size=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertIsNone(response.data["next"])
+
+    def test_compressed_not_modified(self) -> None:
+        post = baker.make(Post, content="Lorem ipsum. " * 200)
+        response = APIClient().get(
+            f"/api/posts/{post.id}/", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertTrue(response["ETag"].startswith('W/"'))
+        response = APIClient().get(
+            f"/api/posts/{post.id}/",
+            HTTP_ACCEPT_ENCODING="gzip",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_comment_not_modified(self) -> None:
+        url = f"/api/posts/{self.post.id}/comments/{self.comment.id}/"
+        etag = APIClient().get(url)["ETag"]
+        response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_fields_not_modified(self) -> None:
+        url = f"/api/posts/{self.post.id}/?fields=title"
+        etag = APIClient().get(url)["ETag"]
+        response = APIClient().get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+
+class CachedPostResponsesTest(TransactionTestCase):
+    post: Post
+    url: str
+
+    def setUp(self) -> None:
+        self.post = baker.make(Post)
+        self.url = f"/api/posts/{self.post.id}/"
+
+    def test_cached_read_without_queries(self) -> None:
+        response = APIClient().get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            cached_response = APIClient().get(self.url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(cached_response.content, response.content)
+        self.assertEqual(cached_response["ETag"], response["ETag"])
+
+    def test_cached_not_modified(self) -> None:
+        etag = APIClient().get(self.url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(len(queries), 0)
+
+    def test_saved_post_invalidated(self) -> None:
+        APIClient().get(self.url)
+        self.post.title = "Changed title"
+        self.post.save()
+        self.assertEqual(APIClient().get(self.url).json()["title"], "Changed title")
+
+    def test_new_comment_invalidates_post(self) -> None:
+        APIClient().get(self.url)
+        baker.make(Comment, post=self.post)
+        self.assertEqual(APIClient().get(self.url).json()["comment_count"], 1)
+
+    def test_variants_cached_separately(self) -> None:
+        APIClient().get(self.url)
+        response = APIClient().get(f"{self.url}?fields=title")
+        self.assertEqual(response.json(), {"title": self.post.title})
+
+    def test_authenticated_read_not_cached(self) -> None:
+        client = APIClient()
+        client.force_authenticate(self.post.author_id)
+        client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            client.get(self.url)
+        self.assertGreater(len(queries), 0)
+
+
+class CoalescedCacheMissesTest(TransactionTestCase):
+    """Load generator of concurrent anonymous reads of one post."""
+
+    readers = 10
+
+    def read_concurrently(self, url: str) -> tuple[list[Response], int]:
+        """Read the URL from many threads at once, with slow queries so that
+        the reads overlap.
+
+        :return: The responses and the number of queries of all threads.
+        """
+        barrier = threading.Barrier(self.readers)
+        lock = threading.Lock()
+        query_count = 0
+
+        def slow_query(execute, sql, params, many, context):  # type: ignore
+            nonlocal query_count
+            with lock:
+                query_count += 1
+            time.sleep(0.2)
+            return execute(sql, params, many, context)
+
+        def read() -> Response:
+            try:
+                barrier.wait()
+                with connection.execute_wrapper(slow_query):
+                    return APIClient().get(url)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.readers) as executor:
+            responses = list(executor.map(lambda _: read(), range(self.readers)))
+        return responses, query_count
+
+    def test_post_miss_storm_queries_once(self) -> None:
+        post = baker.make(Post)
+        responses, query_count = self.read_concurrently(f"/api/posts/{post.id}/")
+        self.assertEqual(query_count, 1)
+        self.assertEqual(
+            {response.status_code for response in responses}, {HTTPStatus.OK}
+        )
+        self.assertEqual(len({response.content for response in responses}), 1)
+
+    def test_comment_miss_storm_queries_once(self) -> None:
+        comment = baker.make(Comment)
+        responses, query_count = self.read_concurrently(
+            f"/api/posts/{comment.post_id}/comments/{comment.id}/"
+        )
+        self.assertEqual(query_count, 1)
+        self.assertEqual(
+            {json.loads(response.content)["id"] for response in responses},
+            {comment.id},
+        )
+
+
+class BulkCreateTest(TestCase):
+    api_client: APIClient
+    author_id: int
+    other_user: CustomUser
+    post: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user_and_client = TestUser.create_test_user()
+        cls.api_client = user_and_client["client"]
+        cls.author_id = user_and_client["custom_user_instance"].id
+        cls.other_user = baker.make(CustomUser)
+        cls.post = baker.make(Post, author_id=cls.other_user)
+
+    def bulk_post(self, url: str, items: object) -> Response:
+        return self.api_client.post(
+            url, data=json.dumps(items), content_type="application/json"
+        )
+
+    def test_bulk_create_posts(self) -> None:
+        items = [
+            {"author_id": self.author_id, "title": f"Post {i}", "content": "<p>Hi</p>"}
+            for i in range(3)
+        ]
+        response = self.bulk_post("/api/posts/bulk/", items)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(
+            [post["title"] for post in response.data["created"]],
+            ["Post 0", "Post 1", "Post 2"],
+        )
+        self.assertEqual(response.data["errors"], [])
+        created = Post.objects.get(id=response.data["created"][0]["id"])
+        self.assertEqual(created.excerpt, "Hi")
+
+    def test_bulk_create_reports_item_errors(self) -> None:
+        items = [
+            {"author_id": self.author_id, "title": "Valid", "content": "Content"},
+            {"author_id": self.other_user.id, "title": "Other", "content": "X"},
+            {"author_id": self.author_id, "content": "No title"},
+        ]
+        response = self.bulk_post("/api/posts/bulk/", items)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(len(response.data["created"]), 1)
+        self.assertEqual([error["index"] for error in response.data["errors"]], [1, 2])
+        self.assertIn("title", response.data["errors"][1]["errors"])
+        self.assertFalse(Post.objects.filter(title="Other").exists())
+
+    def test_bulk_create_atomic(self) -> None:
+        items = [
+            {"author_id": self.author_id, "title": "Valid", "content": "Content"},
+            {"author_id": self.author_id, "content": "No title"},
+        ]
+        response = self.bulk_post("/api/posts/bulk/?atomic=true", items)
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertFalse(Post.objects.filter(title="Valid").exists())
+
+    def test_bulk_create_requires_list(self) -> None:
+        response = self.bulk_post(
+            "/api/posts/bulk/", {"author_id": self.author_id, "title": "Not a list"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_bulk_create_anonymous(self) -> None:
+        response = APIClient().post(
+            "/api/posts/bulk/",
+            data=json.dumps([{"author_id": self.author_id}]),
+            content_type="application/json",
+        )
+        self.assertIn(
+            response.status_code, (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
+        )
+
+    def test_bulk_create_comments(self) -> None:
+        items = [
+            {"author_id": self.author_id, "content": f"Comment {i}"} for i in range(100)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk_post(
+                f"/api/posts/{self.post.id}/comments/bulk/", items
+            )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(
+            {comment["post"] for comment in response.data["created"]}, {self.post.id}
+        )
+        self.assertLess(len(queries), 10)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 100)
+
+
+class BulkUpdateDeleteTest(TestCase):
+    api_client: APIClient
+    user: CustomUser
+    posts: list[Post]
+    other_post: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user_and_client = TestUser.create_test_user()
+        cls.api_client = user_and_client["client"]
+        cls.user = user_and_client["custom_user_instance"]
+        cls.posts = baker.make(Post, author_id=cls.user, _quantity=3)
+        cls.other_post = baker.make(Post)
+        for post in [*cls.posts, cls.other_post]:
+            baker.make(Comment, post=post, author_id=cls.user)
+            baker.make(Comment, post=post)
+
+    def test_bulk_delete_own_posts(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api_client.delete("/api/posts/bulk/?all=true")
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.data, {"deleted": 3})
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertLess(len(queries), 10)
+
+    def test_bulk_delete_filtered(self) -> None:
+        ids = f"{self.posts[0].id},{self.posts[1].id},{self.other_post.id}"
+        response = self.api_client.delete(f"/api/posts/bulk/?id__in={ids}")
+        self.assertEqual(response.data, {"deleted": 2})
+        self.assertEqual(
+            set(Post.objects.values_list("id", flat=True)),
+            {self.posts[2].id, self.other_post.id},
+        )
+
+    def test_bulk_delete_without_known_filter(self) -> None:
+        for url in ("/api/posts/bulk/", f"/api/posts/bulk/?autor={self.user.id}"):
+            with self.subTest(url):
+                response = self.api_client.delete(url)
+                self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+                self.assertIn("all=true", response.data["non_field_errors"])
+        response = self.api_client.patch(
+            "/api/posts/bulk/?id__in=",
+            data=json.dumps({"content": "New"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_bulk_delete_searched(self) -> None:
+        Post.objects.filter(id=self.posts[1].id).update(title="Unique zebra")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api_client.delete("/api/posts/bulk/?q=zebra")
+        self.assertEqual(response.data, {"deleted": 1})
+        self.assertFalse(Post.objects.filter(id=self.posts[1].id).exists())
+        deletes = [q["sql"] for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 2)
+        self.assertNotIn(str(self.posts[1].id), "".join(deletes))
+
+    def test_bulk_update_own_posts(self) -> None:
+        response = self.api_client.patch(
+            f"/api/posts/bulk/?id__in={self.posts[0].id},{self.other_post.id}",
+            data=json.dumps({"content": "New <b>content</b>"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.data, {"updated": 1})
+        updated = Post.objects.get(id=self.posts[0].id)
+        self.assertEqual(updated.excerpt, "New content")
+        self.assertGreater(updated.publish_date, self.posts[0].publish_date)
+        self.assertNotEqual(
+            Post.objects.get(id=self.other_post.id).content, "New <b>content</b>"
+        )
+
+    def test_partial_update_not_allowed(self) -> None:
+        for url in (
+            f"/api/posts/{self.posts[0].id}/",
+            f"/api/posts/{self.posts[0].id}/comments/"
+            f"{self.posts[0].comments.filter(author_id=self.user).get().id}/",
+        ):
+            with self.subTest(url):
+                response = self.api_client.patch(
+                    url,
+                    data=json.dumps({"content": "New"}),
+                    content_type="application/json",
+                )
+                self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def test_bulk_update_field_not_allowed(self) -> None:
+        response = self.api_client.patch(
+            "/api/posts/bulk/?all=true",
+            data=json.dumps({"author_id": self.other_post.author_id_id}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_bulk_delete_anonymous(self) -> None:
+        response = APIClient().delete("/api/posts/bulk/")
+        self.assertIn(
+            response.status_code, (HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN)
+        )
+        self.assertEqual(Post.objects.count(), 4)
+
+    def test_bulk_delete_own_comments(self) -> None:
+        response = self.api_client.delete(
+            f"/api/posts/{self.other_post.id}/comments/bulk/?all=true"
+        )
+        self.assertEqual(response.data, {"deleted": 1})
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.other_post.comment_count, 1)
+
+    def test_bulk_update_own_comments(self) -> None:
+        response = self.api_client.patch(
+            f"/api/posts/{self.other_post.id}/comments/bulk/?all=true",
+            data=json.dumps({"content": "Edited"}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.data, {"updated": 1})
+        self.assertEqual(
+            Comment.objects.filter(post=self.other_post, content="Edited").count(), 1
+        )
+
+
+class ExportPostsTest(TestCase):
+    admin_client: APIClient
+    posts: list[Post]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.admin_client = APIClient()
+        cls.admin_client.force_authenticate(baker.make(CustomUser, is_staff=True))
+        cls.posts = baker.make(Post, _quantity=3)
+        for post in cls.posts:
+            baker.make(Comment, post=post, _quantity=2)
+
+    def read_lines(self, response) -> list[dict]:
+        content = b"".join(response.streaming_content)
+        if response.headers.get("Content-Encoding") == "gzip":
+            content = gzip.decompress(content)
+        return [json.loads(line) for line in content.decode().splitlines()]
+
+    def test_export_posts_with_comments(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            response = self.admin_client.get("/api/posts/export/")
+            lines = self.read_lines(response)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([line["id"] for line in lines], [p.id for p in self.posts])
+        self.assertEqual([len(line["comments"]) for line in lines], [2, 2, 2])
+        self.assertEqual(lines[0]["content"], self.posts[0].content)
+        self.assertLessEqual(len(queries), 2)
+
+    def test_export_resumes_after_id(self) -> None:
+        response = self.admin_client.get(
+            f"/api/posts/export/?after_id={self.posts[0].id}"
+        )
+        self.assertEqual(
+            [line["id"] for line in self.read_lines(response)],
+            [post.id for post in self.posts[1:]],
+        )
+
+    def test_export_gzip(self) -> None:
+        response = self.admin_client.get(
+            "/api/posts/export/", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(len(self.read_lines(response)), 3)
+
+    def test_export_invalid_after_id(self) -> None:
+        response = self.admin_client.get("/api/posts/export/?after_id=-1")
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_export_requires_admin(self) -> None:
+        response = TestUser.create_test_user()["client"].get("/api/posts/export/")
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    def test_export_streamed_incrementally_under_asgi(self) -> None:
+        admin = CustomUser.objects.get(is_staff=True)
+        serialized: list[int] = []
+        to_representation = PostWithCommentsSerializer.to_representation
+
+        def count_serialized(serializer, post: Post) -> dict:
+            serialized.append(post.id)
+            return to_representation(serializer, post)
+
+        async def read_chunks() -> tuple:
+            response = await self.async_client.get(
+                "/api/posts/export/",
+                headers={"Authorization": f"Bearer {AccessToken.for_user(admin)}"},
+            )
+            assert isinstance(response, StreamingHttpResponse)
+            chunks = aiter(response.streaming_content)
+            first_chunk = await anext(chunks)
+            serialized_before_first_chunk = len(serialized)
+            return (
+                response,
+                [first_chunk, *[chunk async for chunk in chunks]],
+                serialized_before_first_chunk,
+            )
+
+        with (
+            patch(
+                "Posts.export.iter_buffered",
+                side_effect=lambda chunks: iter_buffered(chunks, buffer_size=1),
+            ),
+            patch.object(
+                PostWithCommentsSerializer, "to_representation", count_serialized
+            ),
+        ):
+            response, chunks, serialized_before_first_chunk = async_to_sync(
+                read_chunks
+            )()
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(serialized_before_first_chunk, 1)
+        self.assertEqual(
+            [json.loads(chunk)["id"] for chunk in chunks], [p.id for p in self.posts]
+        )
+
+
+class ValuesSerializerOutputTest(TestCase):
+    posts: list[Post]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.posts = baker.make(Post, content="<p>Text \u00e9</p>", _quantity=3)
+        for post in cls.posts[:2]:
+            baker.make(Comment, post=post, _quantity=2)
+
+    @contextmanager
+    def regular_serializers(self) -> Iterator[None]:
+        with (
+            patch.object(PostViewSet, "use_values_serializer", False),
+            patch.object(CommentViewSet, "use_values_serializer", False),
+        ):
+            yield
+
+    def get_both(self, url: str, **headers) -> tuple[bytes, bytes]:
+        fast = self.client.get(url, **headers).content
+        with self.regular_serializers():
+            regular = self.client.get(url, **headers).content
+        return fast, regular
+
+    def test_output_identical_to_serializers(self) -> None:
+        post_id = self.posts[0].id
+        for url in (
+            "/api/posts/",
+            "/api/posts/?page_size=2",
+            "/api/posts/?include_comments=true",
+            "/api/posts/?excerpt=true",
+            "/api/posts/?fields=id,title",
+            "/api/posts/?q=text",
+            f"/api/posts/{post_id}/comments/",
+            f"/api/posts/{post_id}/comments/?fields=publish_date",
+        ):
+            with self.subTest(url):
+                fast, regular = self.get_both(url)
+                self.assertEqual(fast, regular)
+
+    def test_next_page_identical(self) -> None:
+        next_url = self.client.get("/api/posts/?page_size=2").json()["next"]
+        fast, regular = self.get_both(next_url)
+        self.assertEqual(fast, regular)
+
+    def test_conditional_list_identical(self) -> None:
+        etag = self.client.get("/api/posts/")["ETag"]
+        with self.regular_serializers():
+            self.assertEqual(self.client.get("/api/posts/")["ETag"], etag)
+        response = self.client.get("/api/posts/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_reads_only_serialized_columns(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/posts/?include_comments=true")
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"excerpt"', queries[0]["sql"])
+
+
+class AsyncReadsTest(TestCase):
+    """Tests that the asynchronous views answer like the synchronous ones."""
+
+    posts: list[Post]
+    user: CustomUser
+    token: str
+    async_urlconf = ModuleType("async_urls")
+    setattr(
+        async_urlconf, "urlpatterns", get_async_urlpatterns(get_resolver().url_patterns)
+    )
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = baker.make(CustomUser)
+        cls.token = str(AccessToken.for_user(cls.user))
+        cls.posts = baker.make(
+            Post, author_id=cls.user, content="<p>Text \u00e9</p>", _quantity=3
+        )
+        for post in cls.posts[:2]:
+            baker.make(Comment, post=post, author_id=cls.user, _quantity=2)
+
+    def get_headers(self, authenticate: bool, **headers: str) -> dict[str, str]:
+        if authenticate:
+            headers["Authorization"] = f"Bearer {self.token}"
+        return headers
+
+    def get_async(self, url: str, authenticate: bool = False, **headers: str):
+        with override_settings(ROOT_URLCONF=self.async_urlconf):
+            return async_to_sync(self.async_client.get)(
+                url, headers=self.get_headers(authenticate, **headers)
+            )
+
+    def get_sync(self, url: str, authenticate: bool = False, **headers: str):
+        return self.client.get(url, headers=self.get_headers(authenticate, **headers))
+
+    def test_views_asynchronous(self) -> None:
+        for url in ("/api/posts/", f"/api/posts/{self.posts[0].id}/comments/"):
+            with self.subTest(url):
+                self.assertFalse(iscoroutinefunction(resolve(url).func))
+                with override_settings(ROOT_URLCONF=self.async_urlconf):
+                    self.assertTrue(iscoroutinefunction(resolve(url).func))
+
+    def test_output_identical(self) -> None:
+        post_id = self.posts[0].id
+        comment_id = self.posts[0].comments.all()[0].id
+        for url in (
+            "/api/posts/",
+            "/api/posts/?page_size=2",
+            "/api/posts/?include_comments=true",
+            "/api/posts/?include_comments=true&comments_limit=1",
+            "/api/posts/?excerpt=true",
+            "/api/posts/?fields=id,title",
+            "/api/posts/?q=text",
+            "/api/posts/?id__in=invalid",
+            "/api/posts/?comments_limit=0&include_comments=true",
+            f"/api/posts/{post_id}/",
+            f"/api/posts/{post_id}/?include_comments=true",
+            f"/api/posts/{post_id}/?fields=title",
+            "/api/posts/0/",
+            "/api/posts/invalid/",
+            f"/api/posts/{post_id}/comments/",
+            f"/api/posts/{post_id}/comments/{comment_id}/",
+            f"/api/posts/{post_id}/comments/?fields=publish_date",
+        ):
+            for authenticate in (False, True):
+                with self.subTest(url, authenticate=authenticate):
+                    expected = self.get_sync(url, authenticate)
+                    response = self.get_async(url, authenticate)
+                    self.assertEqual(response.status_code, expected.status_code)
+                    self.assertEqual(response.content, expected.content)
+                    self.assertEqual(response.get("ETag"), expected.get("ETag"))
+
+    def test_next_page_identical(self) -> None:
+        next_url = self.get_sync("/api/posts/?page_size=2").data["next"]
+        self.assertEqual(
+            self.get_async(next_url).content, self.get_sync(next_url).content
+        )
+
+    def test_synchronous_handlers_not_used(self) -> None:
+        post_id = self.posts[0].id
+        with (
+            patch.object(
+                ConditionalRequestsViewMixin, "list", side_effect=AssertionError
+            ),
+            patch.object(
+                ConditionalRequestsViewMixin, "retrieve", side_effect=AssertionError
+            ),
+        ):
+            for url in (
+                "/api/posts/?include_comments=true",
+                f"/api/posts/{post_id}/",
+                f"/api/posts/{post_id}/comments/",
+            ):
+                with self.subTest(url):
+                    response = self.get_async(url, authenticate=True)
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_not_modified(self) -> None:
+        for url in ("/api/posts/", f"/api/posts/{self.posts[0].id}/"):
+            with self.subTest(url):
+                etag = self.get_sync(url)["ETag"]
+                response = self.get_async(
+                    url, authenticate=True, **{"If-None-Match": etag}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_same_queries(self) -> None:
+        url = "/api/posts/?include_comments=true"
+        with self.assertNumQueries(3):
+            response = self.get_async(url, authenticate=True)
+        self.assertIn('desc="3 queries', response["Server-Timing"])
+
+    def test_invalid_token(self) -> None:
+        expected = self.get_sync("/api/posts/", Authorization="Bearer invalid")
+        response = self.get_async("/api/posts/", Authorization="Bearer invalid")
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        self.assertEqual(response.content, expected.content)
+
+    def test_writes_served_by_synchronous_views(self) -> None:
+        with override_settings(ROOT_URLCONF=self.async_urlconf):
+            response = async_to_sync(self.async_client.post)(
+                "/api/posts/",
+                {"author_id": self.user.id, "title": "Title", "content": "Text"},
+                content_type="application/json",
+                headers={"Authorization": f"Bearer {self.token}"},
+            )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertTrue(Post.objects.filter(id=response.json()["id"]).exists())
+
+
 class CreateUserCreatePostCreateCommentUpdateIndividualComment(TestCase):
     old_comment: Response
     updated_comment_response: Response
@@ -0,0 +1,332 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.asgi import get_asgi_application
+from django.core.management import CommandError, call_command
+from django.core.signals import request_finished, request_started
+from django.core.wsgi import get_wsgi_application
+from django.db import close_old_connections
+from django.test import TestCase
+from model_bakery import baker
+
+from Bloggity.server import memory_usage, warm_up
+from Posts.models import Comment, Post
+from Users.models import CustomUser
+
+
+class RepairCommentCountsTest(TestCase):
+    posts: list[Post]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        user = baker.make(CustomUser)
+        cls.posts = baker.make(Post, author_id=user, _quantity=3)
+        for number_of_comments, post in enumerate(cls.posts):
+            for _ in range(number_of_comments):
+                baker.make(Comment, post=post, author_id=user)
+
+    def test_comment_count_maintained_by_database(self) -> None:
+        self.assertEqual(
+            [Post.objects.get(id=post.id).comment_count for post in self.posts],
+            [0, 1, 2],
+        )
+
+    def test_comment_count_updated_on_bulk_delete(self) -> None:
+        Comment.objects.filter(post=self.posts[2]).delete()
+        self.assertEqual(Post.objects.get(id=self.posts[2].id).comment_count, 0)
+
+    def test_comment_count_updated_when_comment_moved(self) -> None:
+        Comment.objects.filter(post=self.posts[2]).update(post=self.posts[0])
+        self.assertEqual(
+            [Post.objects.get(id=post.id).comment_count for post in self.posts],
+            [2, 1, 0],
+        )
+
+    def test_comment_count_kept_when_post_saved(self) -> None:
+        post = Post.objects.get(id=self.posts[1].id)
+        comment = Comment.objects.filter(post=post).get()
+        baker.make(Comment, post=post, author_id=comment.author_id)
+        post.title = "Edited"
+        post.save()
+
+        post.refresh_from_db()
+        self.assertEqual((post.title, post.comment_count), ("Edited", 2))
+        assert post.comments_modified is not None
+        self.assertGreater(post.comments_modified, comment.publish_date)
+
+    def test_repair_drifted_comment_counts(self) -> None:
+        Post.objects.filter(id=self.posts[1].id).update(comment_count=7)
+        Post.objects.filter(id=self.posts[2].id).update(comment_count=0)
+
+        modified = Post.objects.get(id=self.posts[1].id).comments_modified
+
+        out = StringIO()
+        with mock.patch(
+            "Posts.management.commands.repair_comment_counts.invalidate_cached"
+        ) as invalidate_cached:
+            call_command("repair_comment_counts", batch_size=2, stdout=out)
+
+        self.assertIn("Repaired 2 posts", out.getvalue())
+        self.assertEqual(
+            [Post.objects.get(id=post.id).comment_count for post in self.posts],
+            [0, 1, 2],
+        )
+        repaired = Post.objects.get(id=self.posts[1].id).comments_modified
+        assert modified is not None and repaired is not None
+        self.assertGreater(repaired, modified)
+        invalidated = {
+            pk for call in invalidate_cached.call_args_list for pk in call.args[1:]
+        }
+        self.assertEqual(invalidated, {self.posts[1].id, self.posts[2].id})
+
+    def test_dry_run_does_not_repair(self) -> None:
+        Post.objects.filter(id=self.posts[1].id).update(comment_count=7)
+
+        out = StringIO()
+        call_command("repair_comment_counts", dry_run=True, stdout=out)
+
+        self.assertIn("Found 1 posts", out.getvalue())
+        self.assertEqual(Post.objects.get(id=self.posts[1].id).comment_count, 7)
+
+
+class ExportPostsTest(TestCase):
+    posts: list[Post]
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.posts = baker.make(Post, _quantity=3)
+        baker.make(Comment, post=cls.posts[1], _quantity=2)
+
+    def export(self, **options) -> tuple[list[dict], str]:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "posts.ndjson")
+            err = StringIO()
+            call_command("export_posts", output=path, stderr=err, **options)
+            opener = gzip.open if options.get("gzip") else open
+            with opener(path, "rt") as file:
+                return [json.loads(line) for line in file], err.getvalue()
+
+    def test_export_posts(self) -> None:
+        lines, err = self.export(chunk_size=2)
+        self.assertEqual([line["id"] for line in lines], [p.id for p in self.posts])
+        self.assertEqual([len(line["comments"]) for line in lines], [0, 2, 0])
+        self.assertIn(f"Exported 3 posts, the last post ID is {self.posts[2].id}", err)
+
+    def test_export_gzip_after_id(self) -> None:
+        lines, err = self.export(gzip=True, after_id=self.posts[1].id)
+        self.assertEqual([line["id"] for line in lines], [self.posts[2].id])
+        self.assertIn("Exported 1 posts", err)
+
+
+class ImportContentTest(TestCase):
+    existing_post: Post
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.existing_post = baker.make(Post)
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.write(
+            "users.csv",
+            "id,username,email,password,first_name,last_name\n"
+            "10,alice,alice@example.com,secret-password,Alice,A\n"
+            "11,bob,bob@example.com,,Bob,B\n",
+        )
+        self.write(
+            "posts.jsonl",
+            "".join(
+                json.dumps(post) + "\n"
+                for post in [
+                    {"id": 1, "author_id": 10, "title": "First", "content": "<p>A</p>"},
+                    {
+                        "id": 2,
+                        "author_id": 11,
+                        "title": "Second",
+                        "content": "Tabs\tnew\nlines \\N and \\ slashes",
+                        "publish_date": "2020-01-02T03:04:05",
+                    },
+                ]
+            ),
+        )
+        self.write(
+            "comments.csv",
+            "post,author_id,content\n2,10,Nice\n2,11,Thanks\n1,11,Hi\n",
+        )
+
+    def write(self, name: str, content: str) -> None:
+        with open(os.path.join(self.directory, name), "w") as file:
+            file.write(content)
+
+    def import_content(self, **files: str) -> str:
+        out = StringIO()
+        call_command(
+            "import_content",
+            workers=2,
+            stdout=out,
+            **{
+                option: os.path.join(self.directory, name)
+                for option, name in files.items()
+            },
+        )
+        return out.getvalue()
+
+    def test_import_content(self) -> None:
+        out = self.import_content(
+            users="users.csv", posts="posts.jsonl", comments="comments.csv"
+        )
+
+        self.assertIn("Imported 2 users, 2 posts, 3 comments", out)
+        alice = CustomUser.objects.get(username="alice")
+        self.assertTrue(alice.check_password("secret-password"))
+        self.assertFalse(CustomUser.objects.get(username="bob").has_usable_password())
+
+        first, second = Post.objects.exclude(id=self.existing_post.id).order_by("id")
+        self.assertGreater(first.id, self.existing_post.id)
+        self.assertEqual(first.author_id, alice)
+        self.assertEqual(first.excerpt, "A")
+        self.assertEqual(second.content, "Tabs\tnew\nlines \\N and \\ slashes")
+        self.assertEqual(second.publish_date.year, 2020)
+        self.assertEqual([first.comment_count, second.comment_count], [1, 2])
+        self.assertEqual(
+            set(second.comments.values_list("author_id__username", flat=True)),
+            {"alice", "bob"},
+        )
+        # The sequences continue after the imported IDs.
+        self.assertGreater(baker.make(Post).id, second.id)
+        self.assertGreater(baker.make(Comment).id, Comment.objects.order_by("id")[2].id)
+
+    def test_ids_of_deleted_rows_not_reused(self) -> None:
+        deleted_id = baker.make(Post).id
+        Post.objects.filter(id=deleted_id).delete()
+        self.import_content(users="users.csv", posts="posts.jsonl")
+        self.assertGreater(
+            Post.objects.exclude(id=self.existing_post.id).order_by("id")[0].id,
+            deleted_id,
+        )
+
+    def test_derived_columns_not_read(self) -> None:
+        self.write(
+            "posts.jsonl",
+            json.dumps(
+                {
+                    "id": 1,
+                    "author_id": 10,
+                    "title": "First",
+                    "content": "<p>Text</p>",
+                    "excerpt": "Other",
+                    "comment_count": 99,
+                    "comments_modified": "2020-01-02T03:04:05",
+                }
+            )
+            + "\n",
+        )
+        self.import_content(users="users.csv", posts="posts.jsonl")
+        post = Post.objects.get(title="First")
+        self.assertEqual(
+            (post.excerpt, post.comment_count, post.comments_modified),
+            ("Text", 0, None),
+        )
+
+    def test_unknown_reference_imports_nothing(self) -> None:
+        self.write("users.csv", "id,username,first_name,last_name\n10,alice,Alice,A\n")
+        self.write(
+            "posts.jsonl",
+            '{"id": 1, "author_id": 10, "title": "First", "content": "A"}\n'
+            '{"id": 2, "author_id": 999999, "title": "Second", "content": "B"}\n',
+        )
+        with self.assertRaisesMessage(
+            CommandError,
+            "posts.jsonl:2: author_id: No imported or existing CustomUser with the "
+            "ID 999999",
+        ):
+            self.import_content(users="users.csv", posts="posts.jsonl")
+        self.assertEqual(list(Post.objects.all()), [self.existing_post])
+        self.assertFalse(CustomUser.objects.filter(username="alice").exists())
+
+    def test_comments_on_existing_post(self) -> None:
+        """Checks that references to IDs not in the files are existing rows,
+        and that the cached responses of the commented posts go stale."""
+        post = self.existing_post
+        # IDs in the files take precedence over existing IDs, so the
+        # imported post has one that no existing post has.
+        self.write(
+            "posts.jsonl",
+            '{"id": 900001, "author_id": 10, "title": "First", "content": "A"}\n',
+        )
+        self.write(
+            "comments.csv",
+            f"post,author_id,content\n{post.id},{post.author_id_id},Late\n"
+            "900001,10,First\n",
+        )
+        with mock.patch(
+            "Posts.management.commands.import_content.invalidate_cached"
+        ) as invalidate_cached:
+            out = self.import_content(
+                users="users.csv", posts="posts.jsonl", comments="comments.csv"
+            )
+        self.assertIn("2 comments", out)
+        comment = Comment.objects.get(content="Late")
+        self.assertEqual(comment.post, post)
+        self.assertEqual(comment.author_id, post.author_id)
+        first = Post.objects.get(title="First")
+        self.assertEqual(Comment.objects.get(content="First").post, first)
+        invalidate_cached.assert_called_once()
+        self.assertEqual(set(invalidate_cached.call_args.args[1:]), {post.id, first.id})
+
+
+@mock.patch("Posts.management.commands.serve.get_cpu_count", return_value=4)
+class ServeTest(TestCase):
+    def serve(self, **options) -> str:
+        out = StringIO()
+        call_command("serve", dry_run=True, stdout=out, **options)
+        return out.getvalue()
+
+    def test_gthread_workers(self, cpu_count: mock.Mock) -> None:
+        command = self.serve(threads=8)
+        self.assertIn("gunicorn Bloggity.wsgi:application", command)
+        self.assertIn("--worker-class gthread --workers 9", command)
+        self.assertIn("--threads 8", command)
+        self.assertIn("--preload", command)
+
+    def test_asgi_workers(self, cpu_count: mock.Mock) -> None:
+        command = self.serve(worker_class="asgi", max_requests=0)
+        self.assertIn("gunicorn Bloggity.asgi:application", command)
+        self.assertIn(
+            "--worker-class uvicorn_worker.UvicornWorker --workers 4", command
+        )
+        self.assertNotIn("--threads", command)
+        self.assertNotIn("--max-requests", command)
+
+    def test_configured_workers(self, cpu_count: mock.Mock) -> None:
+        self.assertIn("--workers 2", self.serve(workers=2))
+
+    def test_process_replaced_with_gunicorn(self, cpu_count: mock.Mock) -> None:
+        with mock.patch("os.execv") as execv:
+            call_command("serve", bind="127.0.0.1:9000", stdout=StringIO())
+        path, command = execv.call_args.args
+        self.assertEqual(path, sys.executable)
+        self.assertEqual(command[:3], [sys.executable, "-m", "gunicorn"])
+        self.assertIn("127.0.0.1:9000", command)
+
+    def test_warm_up(self, cpu_count: mock.Mock) -> None:
+        # Like the test client, keep the connection of the test open.
+        for signal in (request_started, request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        baker.make(Post)
+        self.assertEqual(warm_up(get_wsgi_application(), "/api/posts/"), 200)
+        self.assertEqual(warm_up(get_asgi_application(), "/api/posts/"), 200)
+        self.assertEqual(warm_up(get_wsgi_application(), "/api/posts/0/"), 404)
+
+    def test_memory_usage(self, cpu_count: mock.Mock) -> None:
+        usage = memory_usage()
+        self.assertGreater(usage["rss"], 0)
+        self.assertLessEqual(usage.get("shared", 0), usage["rss"])
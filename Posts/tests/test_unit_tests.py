@@ -2,7 +2,15 @@ from unittest.mock import MagicMock, patch
 
 from django.test import SimpleTestCase
 
-from Posts.serializers import PostSerializer, PostWithCommentsSerializer
+from Mixins.values_serializers import ValuesSerializer
+from Posts.excerpts import make_excerpt
+from Posts.serializers import (
+    CommentSerializer,
+    PostExcerptSerializer,
+    PostSerializer,
+    PostWithCommentsSerializer,
+    PostWithLimitedCommentsSerializer,
+)
 from Posts.views import PostViewSet
 
 
@@ -26,6 +34,44 @@ class PostSerializerTest(SimpleTestCase):
             self.viewset.get_serializer_class(), PostWithCommentsSerializer
         )
 
+    def test_get_serializer_class_return_post_with_limited_comments_serializer(
+        self,
+    ) -> None:
+        self.mock_request.query_params = {
+            "include_comments": "true",
+            "comments_limit": "3",
+        }
+        self.assertEqual(
+            self.viewset.get_serializer_class(), PostWithLimitedCommentsSerializer
+        )
+
+    def test_get_serializer_class_return_post_excerpt_serializer(self) -> None:
+        self.mock_request.query_params = {"excerpt": "true"}
+        self.mock_request.method = "GET"
+        self.assertEqual(self.viewset.get_serializer_class(), PostExcerptSerializer)
+
+    def test_get_serializer_class_excerpt_ignored_on_write(self) -> None:
+        self.mock_request.query_params = {"excerpt": "true"}
+        self.mock_request.method = "POST"
+        self.assertEqual(self.viewset.get_serializer_class(), PostSerializer)
+
+
+class MakeExcerptTest(SimpleTestCase):
+    def test_short_content_unchanged(self) -> None:
+        self.assertEqual(make_excerpt("Short content"), "Short content")
+
+    def test_truncated_on_word_boundary(self) -> None:
+        self.assertEqual(make_excerpt("one two three", length=9), "one two…")
+
+    def test_word_ending_at_length_kept(self) -> None:
+        self.assertEqual(make_excerpt("one two three", length=7), "one two…")
+
+    def test_long_word_cut(self) -> None:
+        self.assertEqual(make_excerpt("abcdefghij", length=4), "abcd…")
+
+    def test_markup_and_whitespace_removed(self) -> None:
+        self.assertEqual(make_excerpt("<p>Hello\n\n  <b>world</b></p>"), "Hello world")
+
 
 class PostQuerySetTest(SimpleTestCase):
     def setUp(self) -> None:
@@ -41,8 +87,44 @@ class PostQuerySetTest(SimpleTestCase):
         self.viewset.get_queryset()
         mock_get_all_posts_and_related_comments.assert_called_once()
 
+    @patch("Posts.models.Post.post_manager.get_all_posts_and_related_comments")
+    def test_get_queryset_return_limited_related_comments(
+        self, mock_get_all_posts_and_related_comments: MagicMock
+    ) -> None:
+        self.mock_request.query_params = {
+            "include_comments": "true",
+            "comments_limit": "3",
+        }
+        self.viewset.get_queryset()
+        mock_get_all_posts_and_related_comments.assert_called_once_with(
+            comments_limit=3
+        )
+
     @patch("Posts.models.Post.objects.all")
     def test_get_queryset_return_all_posts(self, mock_objects_all: MagicMock) -> None:
         self.mock_request.query_params = {}
         self.viewset.get_queryset()
         mock_objects_all.assert_called_once()
+
+
+class ValuesSerializerTest(SimpleTestCase):
+    def test_compiles_supported_serializers(self) -> None:
+        for serializer_class in (
+            PostSerializer,
+            PostExcerptSerializer,
+            PostWithCommentsSerializer,
+            CommentSerializer,
+        ):
+            with self.subTest(serializer_class.__name__):
+                self.assertIsNotNone(
+                    ValuesSerializer.for_serializer(serializer_class())
+                )
+
+    def test_falls_back_for_method_fields(self) -> None:
+        self.assertIsNone(
+            ValuesSerializer.for_serializer(PostWithLimitedCommentsSerializer())
+        )
+
+    def test_sparse_fieldsets_select_only_requested_columns(self) -> None:
+        values_serializer = ValuesSerializer(PostSerializer(fields=["title"]))
+        self.assertEqual(values_serializer.columns, ["title"])
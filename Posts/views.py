@@ -3,27 +3,76 @@ Comment models.
 
 Features include:
 - CRUD operations for posts and comments with custom permission handling.
-- Filtering posts by title using DjangoFilterBackend.
+- Filtering posts by title, IDs and publish date using DjangoFilterBackend.
+- Full-text search over posts with the q query parameter, ranked by
+  relevance.
+- Title suggestions for a prefix at the api/posts/autocomplete/ endpoint.
+- Keyset (cursor) pagination of posts ordered by publish date.
 - Optionally include related comments in the response with
-  the include_comments=True query parameter.
+  the include_comments=True query parameter, limited to the newest
+  comments of each post with the comments_limit query parameter.
 - Filtering comments based on their associated post-ID.
+- Keyset (cursor) pagination of comments, newest first.
+- Sparse fieldsets for posts and comments with the fields query parameter.
+- Listing posts with a stored excerpt instead of the full content with the
+  excerpt=true query parameter.
+- Conditional GET requests for posts and comments with ETag and
+  Last-Modified validators.
+- Caching the rendered responses of anonymous post and comment reads,
+  concurrent cache misses for the same response are coalesced.
+- Creating up to thousands of posts or comments in one request at the
+  api/posts/bulk/ and api/posts/<post_id>/comments/bulk/ endpoints, and
+  updating or deleting all posts or comments of the user matching the
+  filters with PATCH or DELETE requests to the same endpoints.
+- Serializing list responses from rows of values instead of model
+  instances, with the same output.
+- Streaming every post with its comments as newline-delimited JSON at the
+  api/posts/export/ endpoint, for admin users.
+- Reading posts and comments with asynchronous views and the asynchronous
+  ORM under ASGI.
 """
 
 from typing import Type
 
-from django.db.models import QuerySet
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Case, IntegerField, Model, Q, QuerySet, Value, When
+from django.db.models.functions import Upper
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import OpenApiParameter, extend_schema
-from rest_framework import viewsets
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.response import Response
 
+from Mixins.async_reads import AsyncReadsViewMixin
+from Mixins.bulk import BulkCreateListSerializer, BulkViewMixin, delete_returning_pks
+from Mixins.cached_responses import CachedResponsesViewMixin
+from Mixins.conditional_requests import ConditionalRequestsViewMixin
+from Mixins.sparse_fieldsets import SparseFieldsetsViewMixin
+from Mixins.values_serializers import ValuesSerializerViewMixin
 from Permissions.author_permissions import IsAuthorAnyRead
+from Posts.export import (
+    NDJSON_MEDIA_TYPE,
+    NDJSONRenderer,
+    parse_after_id,
+    streaming_export_response,
+)
+from Posts.filters import PostSearchFilter
 from Posts.models import Comment, Post
+from Posts.pagination import KeysetPagination
 from Posts.serializers import (
     CommentSerializer,
+    PostExcerptSerializer,
     PostSerializer,
+    PostTitleSerializer,
     PostWithCommentsSerializer,
+    PostWithLimitedCommentsSerializer,
 )
+from Posts.signals import invalidate_cached
 
 
 @extend_schema(
@@ -43,45 +92,279 @@ from Posts.serializers import (
             description="Include comments for each post if set to true. "
             "Only available at api/posts/ endpoint.",
             required=False,
-        )
+        ),
+        OpenApiParameter(
+            name="comments_limit",
+            type=OpenApiTypes.INT,
+            description="Only include the newest comments of each post, up to "
+            "this number, together with a comments_next link to the rest. "
+            "Only used together with include_comments=true.",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="excerpt",
+            type=OpenApiTypes.BOOL,
+            description="Return a plain text excerpt of the content of each "
+            "post instead of the full content if set to true.",
+            required=False,
+        ),
+        OpenApiParameter(
+            name="fields",
+            type=OpenApiTypes.STR,
+            description="Comma separated names of the fields to include.",
+            required=False,
+        ),
     ],
 )
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(
+    BulkViewMixin,
+    CachedResponsesViewMixin,
+    ValuesSerializerViewMixin,
+    ConditionalRequestsViewMixin,
+    SparseFieldsetsViewMixin,
+    AsyncReadsViewMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
     """Endpoint for viewing and editing posts."""
 
-    filter_backends = (DjangoFilterBackend,)
-    filterset_fields = ("title",)
+    filter_backends = (DjangoFilterBackend, PostSearchFilter)
+    filterset_fields = {
+        "title": ["exact"],
+        "id": ["in"],
+        "publish_date": ["lt", "gte"],
+    }
     http_method_names = ["get", "post", "put", "delete"]
+    bulk_update_fields = ("title", "content")
+    use_values_serializer = True
     permission_classes = [IsAuthorAnyRead]
+    pagination_class = KeysetPagination
+    # The comment triggers date every change of the comments, which also
+    # covers the comment count.
+    modified_fields = ("publish_date", "comments_modified")
+    max_comments_limit = 100
+    autocomplete_limit = 10
+    autocomplete_min_prefix_length = 2
+    export_chunk_size = 2000
+
+    @property
+    def keyset_ordering(self) -> tuple[str, ...]:
+        """Order search results by relevance, and all other posts by publish
+        date, newest first."""
+        if PostSearchFilter.get_search_terms(self.request):
+            return PostSearchFilter.ordering
+        return KeysetPagination.ordering
 
     def get_serializer_class(
         self,
-    ) -> Type[PostWithCommentsSerializer | PostSerializer]:
+    ) -> Type[
+        PostWithLimitedCommentsSerializer
+        | PostWithCommentsSerializer
+        | PostExcerptSerializer
+        | PostSerializer
+    ]:
         """Determine which serializer class to use based on client request.
 
         Returns:
-            PostWithCommentsSerializer or PostSerializer:
+            PostWithLimitedCommentsSerializer, PostWithCommentsSerializer,
+            PostExcerptSerializer or PostSerializer:
             The serializer class for posts,
-            including or excluding comments based on
-            the request query parameters.
+            including all, the newest or no comments, or only an excerpt
+            of the content based on the request query parameters.
         """
         if self.request.query_params.get("include_comments") == "true":
+            if self.get_comments_limit() is not None:
+                return PostWithLimitedCommentsSerializer
             return PostWithCommentsSerializer
+        if self.is_excerpt_mode():
+            return PostExcerptSerializer
         return PostSerializer
 
+    def is_excerpt_mode(self) -> bool:
+        """Return True if the posts should be read with an excerpt instead of
+        the full content, requested with the 'excerpt' query parameter."""
+        return (
+            self.request.query_params.get("excerpt") == "true"
+            and self.request.method in permissions.SAFE_METHODS
+        )
+
+    def get_serializer_context(self) -> dict:
+        """Add the comments limit of the request to the serializer context."""
+        context = super().get_serializer_context()
+        if self.request.query_params.get("include_comments") == "true":
+            context["comments_limit"] = self.get_comments_limit()
+        return context
+
     def get_queryset(self) -> QuerySet:
         """Retrieve the queryset of posts.
 
         Optionally including related comments
         based on the 'include_comments' query parameter.
 
+        The stored search vector is never serialized, so it is deferred to
+        avoid reading it from the database, as is the content when only the
+        excerpt is returned.
+
         Returns:
             QuerySet: A queryset of Post instances,
                               optionally including related comments.
         """
         if self.request.query_params.get("include_comments") == "true":
-            return Post.post_manager.get_all_posts_and_related_comments()
-        return Post.objects.all()
+            queryset = Post.post_manager.get_all_posts_and_related_comments(
+                comments_limit=self.get_comments_limit()
+            )
+        elif self.is_excerpt_mode():
+            return Post.objects.all().defer("content", "search_vector")
+        else:
+            queryset = Post.objects.all()
+        return queryset.defer("search_vector")
+
+    @extend_schema(
+        description="Suggest post titles for a prefix, titles starting with "
+        "the prefix first, followed by titles with a word similar to it.",
+        parameters=[
+            OpenApiParameter(
+                name="prefix",
+                type=OpenApiTypes.STR,
+                description="The beginning of the title, at least "
+                f"{autocomplete_min_prefix_length} characters.",
+                required=True,
+            )
+        ],
+        responses=PostTitleSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request: Request) -> Response:
+        """Return the IDs and titles of the posts best matching a prefix.
+
+        Both conditions are answered by the trigram index on the upper case
+        title, so only the matching posts are read and only their ID and
+        title columns are fetched.
+
+        Returns:
+            Response: The suggested posts, at most the autocomplete limit.
+
+        Raises:
+            ValidationError: If the prefix is missing or too short.
+        """
+        prefix = request.query_params.get("prefix", "").strip()
+        if len(prefix) < self.autocomplete_min_prefix_length:
+            raise ValidationError(
+                {
+                    "prefix": "Ensure this value has at least "
+                    f"{self.autocomplete_min_prefix_length} characters."
+                }
+            )
+
+        suggestions = (
+            Post.objects.alias(upper_title=Upper("title"))
+            .filter(
+                Q(title__istartswith=prefix)
+                | Q(upper_title__trigram_word_similar=prefix)
+            )
+            .annotate(
+                starts_with_prefix=Case(
+                    When(title__istartswith=prefix, then=Value(1)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ),
+                similarity=TrigramWordSimilarity(prefix, "upper_title"),
+            )
+            .order_by("-starts_with_prefix", "-similarity", "title", "id")
+            .only("id", "title")[: self.autocomplete_limit]
+        )
+        serializer = PostTitleSerializer(suggestions, many=True)
+        return Response(serializer.data)
+
+    @extend_schema(
+        description="Stream every post with all of its comments as "
+        "newline-delimited JSON, one post per line ordered by ID. Only "
+        "available to admin users.",
+        parameters=[
+            OpenApiParameter(
+                name="after_id",
+                type=OpenApiTypes.INT,
+                description="Only export the posts with a greater ID, to resume "
+                "an export after the last post it received.",
+                required=False,
+            )
+        ],
+        responses={(200, NDJSON_MEDIA_TYPE): OpenApiTypes.STR},
+    )
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[permissions.IsAdminUser],
+        renderer_classes=[NDJSONRenderer],
+    )
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Stream the export of the posts.
+
+        The posts are read with a server-side cursor while the response is
+        sent, see ``Posts.export``, so neither the server nor the client
+        holds the whole export in memory, under WSGI and ASGI alike.
+
+        Returns:
+            StreamingHttpResponse: The lines of the export, compressed by
+            the compression middleware if the client accepts it.
+
+        Raises:
+            ValidationError: If the after_id parameter is not a valid ID.
+        """
+        try:
+            after_id = parse_after_id(request.query_params.get("after_id"))
+        except ValueError:
+            raise ValidationError(
+                {"after_id": "Ensure this value is a non-negative number."}
+            )
+        return streaming_export_response(
+            after_id,
+            self.export_chunk_size,
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
+
+    def perform_bulk_delete(self, queryset: QuerySet) -> list[int]:
+        """Delete the comments of the posts first with a single DELETE
+        statement, instead of the cascade collecting them in Python."""
+        if not self.bulk_send_signals:
+            comment_ids = delete_returning_pks(
+                Comment.objects.filter(post__in=queryset.values("pk"))
+            )
+            invalidate_cached(Comment, *comment_ids)
+        return super().perform_bulk_delete(queryset)
+
+    def bulk_changed(self, pks: list[int]) -> None:
+        """Invalidate the cached responses of the updated or deleted posts."""
+        invalidate_cached(Post, *pks)
+
+    def get_comments_limit(self) -> int | None:
+        """Return the validated 'comments_limit' query parameter.
+
+        Returns:
+            int or None: The maximum number of comments to include per post,
+            or None if the parameter is not set.
+
+        Raises:
+            ValidationError: If the parameter is not a number between one and
+            the maximum comments limit.
+        """
+        comments_limit = self.request.query_params.get("comments_limit")
+        if comments_limit is None:
+            return None
+        try:
+            limit = int(comments_limit)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_comments_limit:
+            raise ValidationError(
+                {
+                    "comments_limit": "Ensure this value is a number between 1 "
+                    f"and {self.max_comments_limit}."
+                }
+            )
+        return limit
 
 
 @extend_schema(
@@ -89,6 +372,17 @@ class PostViewSet(viewsets.ModelViewSet):
     description="Retrieve a list of comments by post ID"
     "or a specific comment by a post ID and then a comment ID",
 )
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(
+            name="fields",
+            type=OpenApiTypes.STR,
+            description="Comma separated names of the fields to include.",
+            required=False,
+        )
+    ],
+)
 @extend_schema(
     methods=["POST"],
     description="Create a specific comment for a specific post",
@@ -101,12 +395,29 @@ class PostViewSet(viewsets.ModelViewSet):
     methods=["PUT"],
     description="Update a specific comment for a specific post",
 )
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    BulkViewMixin,
+    CachedResponsesViewMixin,
+    ValuesSerializerViewMixin,
+    ConditionalRequestsViewMixin,
+    SparseFieldsetsViewMixin,
+    AsyncReadsViewMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
     """Endpoint for viewing and editing comments."""
 
     serializer_class = CommentSerializer
+    filter_backends = (DjangoFilterBackend,)
+    filterset_fields = {"id": ["in"], "publish_date": ["lt", "gte"]}
     http_method_names = ["get", "post", "put", "delete"]
+    bulk_update_fields = ("content",)
+    use_values_serializer = True
     permission_classes = [IsAuthorAnyRead]
+    pagination_class = KeysetPagination
+    modified_fields = ("publish_date",)
 
     def get_queryset(self) -> QuerySet:
         """Retrieve the queryset of comments for a specific post, identified by
@@ -118,3 +429,27 @@ class CommentViewSet(viewsets.ModelViewSet):
         """
         post_id = str(self.kwargs.get("post_pk"))
         return Comment.objects.filter(post_id=post_id)
+
+    def get_bulk_items(self, request: Request) -> list:
+        """Return the comments of a bulk creation, all for the post of the
+        URL."""
+        post_id = self.kwargs.get("post_pk")
+        return [
+            {**item, "post": post_id} if isinstance(item, dict) else item
+            for item in super().get_bulk_items(request)
+        ]
+
+    def perform_bulk_create(
+        self, serializer: BulkCreateListSerializer, validated_data: list[dict]
+    ) -> list[Model]:
+        """Create the comments and invalidate the cached responses of their
+        post, which the signals of single comments would do."""
+        comments = super().perform_bulk_create(serializer, validated_data)
+        invalidate_cached(Post, validated_data[0]["post"].pk)
+        return comments
+
+    def bulk_changed(self, pks: list[int]) -> None:
+        """Invalidate the cached responses of the updated or deleted comments
+        and of their post."""
+        invalidate_cached(Comment, *pks)
+        invalidate_cached(Post, int(self.kwargs["post_pk"]))
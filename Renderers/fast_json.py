@@ -0,0 +1,113 @@
+"""This module provides a JSON renderer and parser backed by orjson.
+
+orjson encodes and decodes JSON many times faster than the ``json`` module
+that DRF's ``JSONRenderer`` and ``JSONParser`` are built on, which matters
+for large list responses. The renderer writes the same bytes as
+``JSONRenderer``: datetimes, dates, times, Decimals and every other type
+orjson does not encode like DRF are passed on to DRF's ``JSONEncoder``.
+
+Both classes fall back to their DRF base class if orjson is not installed,
+and for anything orjson does not handle the same way, such as indented
+output or integers beyond 64 bits. The only difference left is the notation
+of floats with an exponent, for example ``1e16`` instead of ``1e+16``, and
+that NaN and infinite floats are rendered as ``null`` instead of failing.
+"""
+
+import io
+import math
+from decimal import Decimal
+from types import ModuleType
+from typing import Any, Mapping, Optional
+
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+orjson: Optional[ModuleType]
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# The UTF-8 encoded line and paragraph separators, which JSONRenderer
+# escapes so that the output is valid JavaScript.
+LINE_SEPARATOR = "\u2028".encode()
+PARAGRAPH_SEPARATOR = "\u2029".encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Renders JSON with orjson, with the same output as ``JSONRenderer``."""
+
+    def __init__(self) -> None:
+        self.encoder = self.encoder_class()
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        """Render the data into JSON, with ``JSONRenderer`` if orjson is not
+        installed or cannot render it the same way."""
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type or "", renderer_context or {})
+            is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            rendered = orjson.dumps(
+                data,
+                default=self.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        if LINE_SEPARATOR in rendered or PARAGRAPH_SEPARATOR in rendered:
+            rendered = rendered.replace(LINE_SEPARATOR, b"\\u2028").replace(
+                PARAGRAPH_SEPARATOR, b"\\u2029"
+            )
+        return rendered
+
+    def default(self, obj: Any) -> Any:
+        """Convert an object orjson does not encode itself, like the encoder
+        of ``JSONRenderer`` does.
+
+        :raises TypeError: If the object cannot be converted, or the result
+            would be written differently by orjson, so that the renderer
+            falls back to ``JSONRenderer``.
+        """
+        value = self.encoder.default(obj)
+        if isinstance(obj, Decimal) and (
+            not math.isfinite(value) or "e" in repr(value)
+        ):
+            raise TypeError("Float written differently by orjson.")
+        return value
+
+
+class FastJSONParser(JSONParser):
+    """Parses JSON with orjson, falling back to ``JSONParser`` for anything
+    orjson rejects, so that invalid JSON fails with the same errors."""
+
+    renderer_class = FastJSONRenderer
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: str | None = None,
+        parser_context: Mapping[str, Any] | None = None,
+    ) -> Any:
+        """Parse the UTF-8 encoded JSON of the stream."""
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace("-", "") != "utf8":
+            return super().parse(stream, media_type, parser_context)
+
+        content = stream.read()
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return super().parse(io.BytesIO(content), media_type, parser_context)
@@ -0,0 +1,68 @@
+"""This module provides a MessagePack renderer and parser.
+
+MessagePack is a binary encoding of the same data model as JSON, with
+shorter encodings for numbers, short strings and the lengths of lists and
+objects, and without any escaping. Clients select it with the
+``application/msgpack`` media type in the ``Accept`` and ``Content-Type``
+headers.
+
+Values that have no JSON type, such as datetimes and Decimals, are converted
+by DRF's ``JSONEncoder`` as well, so that the decoded data is the same as
+the decoded JSON response.
+"""
+
+from typing import Any, Mapping
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+MESSAGE_PACK_MEDIA_TYPE = "application/msgpack"
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Renders data as MessagePack."""
+
+    media_type = MESSAGE_PACK_MEDIA_TYPE
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def __init__(self) -> None:
+        self.encoder = JSONEncoder()
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: str | None = None,
+        renderer_context: Mapping[str, Any] | None = None,
+    ) -> bytes:
+        """Render the data into MessagePack."""
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=self.encoder.default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies."""
+
+    media_type = MESSAGE_PACK_MEDIA_TYPE
+    renderer_class = MessagePackRenderer
+
+    def parse(
+        self,
+        stream: Any,
+        media_type: str | None = None,
+        parser_context: Mapping[str, Any] | None = None,
+    ) -> Any:
+        """Parse the MessagePack of the stream.
+
+        :raises ParseError: If the stream is not a single valid MessagePack
+            object with string keys.
+        """
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as error:
+            raise ParseError(f"MessagePack parse error - {error}")
@@ -0,0 +1,115 @@
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+import msgpack
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from Renderers.fast_json import FastJSONParser, FastJSONRenderer
+from Renderers.message_pack import MessagePackParser, MessagePackRenderer
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    data = {
+        "id": 1,
+        "title": 'Café \u2028 \u2029 "quoted" \\ \x1f',
+        "aware": datetime(2024, 1, 2, 3, 4, 5, 678, tzinfo=timezone.utc),
+        "offset": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2))),
+        "naive": datetime(2024, 1, 2, 3, 4, 5),
+        "date": date(2024, 1, 2),
+        "time": time(3, 4, 5, 6),
+        "duration": timedelta(days=1, seconds=2),
+        "decimal": Decimal("12.50"),
+        "uuid": uuid.UUID(int=1),
+        "error": ErrorDetail("Invalid.", code="invalid"),
+        "lazy": gettext_lazy("This field is required."),
+        "keys": {1: "one", None: "none", False: "no"},
+        "nested": [{"float": 0.1, "empty": [], "tuple": (1, 2)}],
+    }
+
+    def assertRendersLikeJSONRenderer(self, data, media_type=None) -> None:
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_same_output_as_json_renderer(self) -> None:
+        self.assertRendersLikeJSONRenderer(self.data)
+
+    def test_renders_with_orjson(self) -> None:
+        expected = JSONRenderer().render(self.data)
+        with patch.object(JSONRenderer, "render", side_effect=AssertionError):
+            self.assertEqual(FastJSONRenderer().render(self.data), expected)
+
+    def test_same_output_indented(self) -> None:
+        self.assertRendersLikeJSONRenderer(self.data, "application/json; indent=4")
+
+    def test_none_renders_empty(self) -> None:
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_falls_back_for_values_orjson_writes_differently(self) -> None:
+        self.assertRendersLikeJSONRenderer({"big": 2**70, "decimal": Decimal("1E+20")})
+
+    def test_fails_like_json_renderer(self) -> None:
+        with self.assertRaises(ValueError):
+            FastJSONRenderer().render({"nan": Decimal("NaN")})
+        with self.assertRaises(TypeError):
+            FastJSONRenderer().render({"object": object()})
+
+    def test_without_orjson(self) -> None:
+        with patch("Renderers.fast_json.orjson", None):
+            self.assertRendersLikeJSONRenderer(self.data)
+
+
+class FastJSONParserTest(SimpleTestCase):
+    def parse(self, parser_class: type, content: bytes):
+        return parser_class().parse(io.BytesIO(content), "application/json", {})
+
+    def test_parse(self) -> None:
+        content = '{"title": "Café", "ids": [1, 2.5, null, true]}'.encode()
+        self.assertEqual(
+            self.parse(FastJSONParser, content), self.parse(JSONParser, content)
+        )
+
+    def test_parse_big_integer(self) -> None:
+        self.assertEqual(
+            self.parse(FastJSONParser, b"[1180591620717411303424]"), [2**70]
+        )
+
+    def test_invalid_json_fails_like_json_parser(self) -> None:
+        for content in (b"", b"{", b"[NaN]", b'"\xff"'):
+            with self.subTest(content):
+                with self.assertRaises(ParseError) as expected:
+                    self.parse(JSONParser, content)
+                with self.assertRaises(ParseError) as error:
+                    self.parse(FastJSONParser, content)
+                self.assertEqual(str(error.exception), str(expected.exception))
+
+    def test_without_orjson(self) -> None:
+        with patch("Renderers.fast_json.orjson", None):
+            self.assertEqual(self.parse(FastJSONParser, b'{"a": [1]}'), {"a": [1]})
+
+
+class MessagePackTest(SimpleTestCase):
+    def test_round_trips_like_json(self) -> None:
+        data = {**FastJSONRendererTest.data, "keys": {"a": 1}, "big": 2**63 - 1}
+        rendered = MessagePackRenderer().render(data)
+        self.assertEqual(
+            MessagePackParser().parse(io.BytesIO(rendered)),
+            JSONParser().parse(io.BytesIO(JSONRenderer().render(data))),
+        )
+
+    def test_none_renders_empty(self) -> None:
+        self.assertEqual(MessagePackRenderer().render(None), b"")
+
+    def test_invalid_message_pack(self) -> None:
+        for content in (b"", b"\xc1", msgpack.packb([1]) + b"\x01", b"\x81\x01\x02"):
+            with self.subTest(content):
+                with self.assertRaisesMessage(ParseError, "MessagePack parse error"):
+                    MessagePackParser().parse(io.BytesIO(content))
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.2 on 2026-10-18 01:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("Users", "0002_remove_customuser_user_name"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="modified_date",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
@@ -23,3 +23,4 @@ class CustomUser(AbstractUser):
 
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=30)
+    modified_date = models.DateTimeField(auto_now=True)
@@ -12,10 +12,14 @@ that sensitive information is adequately protected.
 
 from rest_framework import serializers
 
+from Mixins.sparse_fieldsets import SparseFieldsetsSerializerMixin
+from Mixins.timed_serializers import TimedSerializerMixin
 from Users.models import CustomUser
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(
+    TimedSerializerMixin, SparseFieldsetsSerializerMixin, serializers.ModelSerializer
+):
     """A serializer for the CustomUser model.
 
     Ensuring secure password handling by hashing passwords upon creation
@@ -258,6 +258,75 @@ class GetIndividualUser(TestCase):
         self.assertNotIn("password", self.resp.data)
 
 
+class GetUserSparseFieldsets(TestCase):
+    """Tests that only the requested fields of users are returned."""
+
+    user: CustomUser
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data by creating a user."""
+        cls.user = baker.make(CustomUser)
+
+    def test_get_individual_user_requested_fields(self) -> None:
+        """Verifies that only the requested fields are included."""
+        resp = APIClient().get(f"/api/users/{self.user.id}/?fields=id,username")
+        self.assertEqual(
+            resp.data, {"id": self.user.id, "username": self.user.username}
+        )
+
+    def test_write_only_field_cannot_be_requested(self) -> None:
+        """Checks that the password field can not be requested."""
+        resp = APIClient().get(f"/api/users/{self.user.id}/?fields=password")
+        self.assertEqual(resp.status_code, HTTPStatus.BAD_REQUEST)
+
+
+class ConditionalGetUser(TestCase):
+    """Tests that unchanged users are answered with 304 Not Modified."""
+
+    user: CustomUser
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        """Set up test data by creating a user."""
+        cls.user = baker.make(CustomUser)
+
+    def test_user_not_modified(self) -> None:
+        """Checks that the ETag of an unchanged user is still valid."""
+        resp = APIClient().get(f"/api/users/{self.user.id}/")
+        resp_not_modified = APIClient().get(
+            f"/api/users/{self.user.id}/", HTTP_IF_NONE_MATCH=resp["ETag"]
+        )
+        self.assertEqual(resp_not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(resp_not_modified["ETag"], resp["ETag"])
+
+    def test_changed_user_modified(self) -> None:
+        """Checks that changing a user invalidates its ETag."""
+        resp = APIClient().get(f"/api/users/{self.user.id}/")
+        self.user.first_name = "Changed"
+        self.user.save()
+        resp_modified = APIClient().get(
+            f"/api/users/{self.user.id}/", HTTP_IF_NONE_MATCH=resp["ETag"]
+        )
+        self.assertEqual(resp_modified.status_code, HTTPStatus.OK)
+        self.assertEqual(resp_modified.data["first_name"], "Changed")
+
+    def test_list_not_modified(self) -> None:
+        """Checks that the ETag of the list of users is valid until a user
+        changes, and that the list is not paginated."""
+        resp = APIClient().get("/api/users/")
+        self.assertIsInstance(resp.data, list)
+        resp_not_modified = APIClient().get(
+            "/api/users/", HTTP_IF_NONE_MATCH=resp["ETag"]
+        )
+        self.assertEqual(resp_not_modified.status_code, HTTPStatus.NOT_MODIFIED)
+
+        self.user.first_name = "Changed"
+        self.user.save()
+        resp_modified = APIClient().get("/api/users/", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(resp_modified.status_code, HTTPStatus.OK)
+
+
 class UpdateIndividualUser(TestCase):
     """Tests the update functionality for individual user's data, ensuring data
     integrity and authorization checks."""
@@ -1,9 +1,12 @@
 """This module contains view-sets for CRUD operations for the User of the
 posts, comments etc."""
 
-from drf_spectacular.utils import extend_schema
-from rest_framework import viewsets
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import mixins, viewsets
 
+from Mixins.conditional_requests import ConditionalRequestsViewMixin
+from Mixins.sparse_fieldsets import SparseFieldsetsViewMixin
 from Permissions.user_permissions import UserOnlyModifyOwnAllowRead
 from Users.models import CustomUser
 from Users.serializers import UserSerializer
@@ -16,10 +19,29 @@ from Users.serializers import UserSerializer
     methods=["POST"], description="Create a specific user and add the user to the list"
 )
 @extend_schema(methods=["PUT"], description="Update a specific user")
-class UserViewSet(viewsets.ModelViewSet):
-    """Endpoint for viewing and editing users."""
+@extend_schema(
+    methods=["GET"],
+    parameters=[
+        OpenApiParameter(
+            name="fields",
+            type=OpenApiTypes.STR,
+            description="Comma separated names of the fields to include.",
+            required=False,
+        )
+    ],
+)
+class UserViewSet(
+    ConditionalRequestsViewMixin,
+    SparseFieldsetsViewMixin,
+    mixins.CreateModelMixin,
+    mixins.UpdateModelMixin,
+    viewsets.GenericViewSet,
+):
+    """Endpoint for viewing and editing users, with conditional GET
+    requests."""
 
     queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     http_method_names = ["get", "post", "put"]
     permission_classes = [UserOnlyModifyOwnAllowRead]
+    modified_fields = ("modified_date",)
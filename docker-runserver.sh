@@ -1,4 +1,7 @@
 #!/bin/sh
+# The gunicorn workers share their metrics through the files of this directory.
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR" && mkdir -p "$PROMETHEUS_MULTIPROC_DIR" && \
 python manage.py collectstatic --noinput --settings Bloggity.settings.production && \
 python manage.py migrate --settings Bloggity.settings.production && \
-exec gunicorn Bloggity.wsgi:application --bind 0.0.0.0:8080
\ No newline at end of file
+exec python manage.py serve --settings Bloggity.settings.production --bind 0.0.0.0:8080
\ No newline at end of file
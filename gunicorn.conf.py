@@ -0,0 +1,61 @@
+"""Configuration of gunicorn, read from the working directory.
+
+``manage.py serve`` runs gunicorn with this configuration and the options
+tuned for the machine, see Posts.management.commands.serve.
+"""
+
+import gc
+import os
+
+# Imported as a module, config is a setting of gunicorn.
+import decouple
+
+# The path the workers request before accepting traffic, empty to skip.
+warm_up_path = decouple.config("SERVER_WARM_UP_PATH", default="/api/posts/")
+
+
+def pre_fork(server, worker) -> None:
+    """Move the objects of the master, the preloaded application, out of
+    the reach of the garbage collector before a worker is forked.
+
+    A collection in a worker would otherwise write the reference counts of
+    every object it traverses, copying the pages of the master that the
+    workers share.
+    """
+    gc.freeze()
+
+
+def post_worker_init(worker) -> None:
+    """Warm up the worker with a request before it accepts traffic, then
+    log its memory."""
+    from Bloggity.server import format_memory_usage, memory_usage, warm_up
+
+    if warm_up_path:
+        try:
+            status = warm_up(worker.wsgi, warm_up_path)
+        except Exception:
+            worker.log.exception("Worker %s failed to warm up.", worker.pid)
+        else:
+            log = worker.log.warning if status >= 400 else worker.log.info
+            log("Worker %s warmed up with %s %s.", worker.pid, warm_up_path, status)
+    worker.log.info(
+        "Worker %s memory: %s", worker.pid, format_memory_usage(memory_usage())
+    )
+
+
+def worker_exit(server, worker) -> None:
+    """Log the memory of a worker when it exits."""
+    from Bloggity.server import format_memory_usage, memory_usage
+
+    server.log.info(
+        "Worker %s exits, memory: %s", worker.pid, format_memory_usage(memory_usage())
+    )
+
+
+def child_exit(server, worker) -> None:
+    """Remove the live metrics of a worker that exited, see
+    Metrics.prometheus."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,388 @@
+"""This module provides the middleware compressing responses.
+
+The encoding of a response is negotiated from the ``Accept-Encoding`` header
+of the request among zstd, brotli and gzip, at the levels configured by the
+RESPONSE_COMPRESSION setting. The client's preference decides, the order of
+the LEVELS setting breaks ties. zstd and brotli are only offered if their
+libraries are installed.
+
+Responses shorter than the minimum length are not worth compressing and are
+sent as they are. Streaming responses are compressed chunk by chunk, and
+every compressed chunk is flushed right away, so they are never buffered
+and reach the client as soon as they are produced.
+
+Compressed responses are open to BREACH, which guesses a secret of a page
+from the compressed length of pages reflecting the guess, sent with the
+credentials of the victim. As Django's ``GZipMiddleware`` does, the header
+of gzip responses carries a file name of a random length, up to the
+MAX_RANDOM_BYTES of the setting, so that their length gives the secret
+away only over many more requests. brotli and zstd have no field to pad
+outside of the compressed data, so they are only negotiated for requests
+without cookies, whose credentials, if any, are bearer tokens a browser
+never sends by itself. A MAX_RANDOM_BYTES of 0 turns the mitigation off.
+
+The number of compressed responses, their size before and after
+compression, and the CPU time spent compressing them are counted per
+encoding in the Prometheus metrics, see ``Metrics.prometheus``.
+"""
+
+import importlib
+import secrets
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from types import ModuleType
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseBase,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_vary_headers
+
+from Metrics.prometheus import (
+    COMPRESSED_RESPONSES,
+    COMPRESSION_CPU_SECONDS,
+    COMPRESSION_INPUT_BYTES,
+    COMPRESSION_OUTPUT_BYTES,
+)
+
+
+def import_optional(name: str) -> Optional[ModuleType]:
+    """Import an optional library, returning None if it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:  # pragma: no cover
+        return None
+
+
+brotli = import_optional("brotli")
+zstandard = import_optional("zstandard")
+
+
+class Encoder(ABC):
+    """Compresses the content of one response, in one or several chunks."""
+
+    encoding = ""
+    # Whether the encoder takes the max_random_bytes of the BREACH padding.
+    padded = False
+
+    @abstractmethod
+    def __init__(self, level: int, max_random_bytes: int = 0) -> None:
+        """Start a compressed stream at the level, padded with up to
+        ``max_random_bytes`` random bytes if the encoder is padded."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk, returning as much output as is ready."""
+
+    @abstractmethod
+    def flush(self) -> bytes:
+        """Return the output of all chunks so far, so that the client can
+        decompress them without waiting for the next chunk."""
+
+    @abstractmethod
+    def finish(self) -> bytes:
+        """Return the rest of the output, ending the compressed stream."""
+
+
+class GzipEncoder(Encoder):
+    encoding = "gzip"
+    padded = True
+
+    def __init__(self, level: int, max_random_bytes: int = 0) -> None:
+        # A raw deflate stream, the gzip header and trailer are written here
+        # so that the header can carry the padding.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self.header = make_gzip_header(max_random_bytes)
+        self.crc = 0
+        self.size = 0
+
+    def compress(self, data: bytes) -> bytes:
+        self.crc = zlib.crc32(data, self.crc)
+        self.size += len(data)
+        return self.take_header() + self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.take_header() + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return (
+            self.take_header()
+            + self.compressor.flush(zlib.Z_FINISH)
+            + struct.pack("<2L", self.crc, self.size & 0xFFFFFFFF)
+        )
+
+    def take_header(self) -> bytes:
+        """Return the header before the first output, and nothing after."""
+        header, self.header = self.header, b""
+        return header
+
+
+class BrotliEncoder(Encoder):
+    encoding = "br"
+
+    def __init__(self, level: int, max_random_bytes: int = 0) -> None:
+        # brotli has no field to pad outside of the compressed data.
+        assert brotli is not None
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush()
+
+    def finish(self) -> bytes:
+        return self.compressor.finish()
+
+
+class ZstdEncoder(Encoder):
+    encoding = "zstd"
+
+    def __init__(self, level: int, max_random_bytes: int = 0) -> None:
+        # zstd has no field to pad outside of the compressed data.
+        assert zstandard is not None
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        self.flush_block = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        self.flush_finish = zstandard.COMPRESSOBJ_FLUSH_FINISH
+
+    def compress(self, data: bytes) -> bytes:
+        return self.compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self.compressor.flush(self.flush_block)
+
+    def finish(self) -> bytes:
+        return self.compressor.flush(self.flush_finish)
+
+
+def make_gzip_header(max_random_bytes: int) -> bytes:
+    """Return a gzip header without a modification time, with a file name
+    of a random length below ``max_random_bytes`` if it is not 0."""
+    # The magic number, the deflate method, the flags, the modification
+    # time, the extra flags and the unknown operating system.
+    if not max_random_bytes:
+        return b"\x1f\x8b\x08\x00" + bytes(5) + b"\xff"
+    filename = b"a" * secrets.randbelow(max_random_bytes) + b"\x00"
+    return b"\x1f\x8b\x08\x08" + bytes(5) + b"\xff" + filename
+
+
+def get_encoders() -> dict[str, type[Encoder]]:
+    """Return the encoders whose libraries are installed, by encoding."""
+    encoders: list[type[Encoder]] = [GzipEncoder]
+    if brotli is not None:
+        encoders.append(BrotliEncoder)
+    if zstandard is not None:
+        encoders.append(ZstdEncoder)
+    return {encoder.encoding: encoder for encoder in encoders}
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """Parse an ``Accept-Encoding`` header.
+
+    :return: The quality value of every listed encoding, items with an
+        invalid quality value are left out.
+    """
+    qualities = {}
+    for item in header.lower().split(","):
+        encoding, *parameters = (part.strip() for part in item.split(";"))
+        if not encoding:
+            continue
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = -1.0
+        if 0 <= quality <= 1:
+            qualities[encoding] = quality
+    return qualities
+
+
+def choose_encoding(header: str, preference: Iterable[str]) -> str | None:
+    """Choose the encoding of a response.
+
+    :param header: The ``Accept-Encoding`` header of the request.
+    :param preference: The available encodings, most preferred first, which
+        decides between encodings the client accepts equally.
+    :return: The accepted encoding with the highest quality value, or None
+        if the client accepts none of them.
+    """
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    chosen, chosen_quality = None, 0.0
+    for encoding in preference:
+        quality = qualities.get(encoding, wildcard)
+        if quality > chosen_quality:
+            chosen, chosen_quality = encoding, quality
+    return chosen
+
+
+def record_compression(
+    encoding: str, input_bytes: int, output_bytes: int, cpu_seconds: float
+) -> None:
+    """Count a compressed response in the metrics of its encoding."""
+    COMPRESSED_RESPONSES.labels(encoding).inc()
+    COMPRESSION_INPUT_BYTES.labels(encoding).inc(input_bytes)
+    COMPRESSION_OUTPUT_BYTES.labels(encoding).inc(output_bytes)
+    COMPRESSION_CPU_SECONDS.labels(encoding).inc(cpu_seconds)
+
+
+class CompressionMiddleware:
+    """Compresses responses with the best encoding the client accepts."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        options = settings.RESPONSE_COMPRESSION
+        encoders = get_encoders()
+        self.get_response = get_response
+        self.min_length = options["MIN_LENGTH"]
+        self.levels = {
+            encoding: level
+            for encoding, level in options["LEVELS"].items()
+            if encoding in encoders
+        }
+        self.padded_levels = {
+            encoding: level
+            for encoding, level in self.levels.items()
+            if encoders[encoding].padded
+        }
+        self.encoders = encoders
+        self.max_random_bytes = options["MAX_RANDOM_BYTES"]
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.compress_response(request, self.get_response(request))
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        return self.compress_response(request, await self.get_response(request))
+
+    def compress_response(
+        self, request: HttpRequest, response: HttpResponseBase
+    ) -> HttpResponseBase:
+        """Compress the response with the encoding negotiated for the
+        request, if it is worth it."""
+        if not isinstance(response, (HttpResponse, StreamingHttpResponse)):
+            return response
+        # It is not worth compressing short responses.
+        if (
+            isinstance(response, HttpResponse)
+            and len(response.content) < self.min_length
+        ):
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        # A browser sends the cookies of a request by itself, so its
+        # response may only be compressed with the padded encodings.
+        levels = (
+            self.padded_levels
+            if self.max_random_bytes and request.COOKIES
+            else self.levels
+        )
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), levels)
+        if encoding is None:
+            return response
+        encoder = self.get_encoder(encoding)
+
+        if isinstance(response, StreamingHttpResponse):
+            chunks = response.streaming_content
+            if isinstance(chunks, AsyncIterator):
+                response.streaming_content = self.acompress_sequence(encoder, chunks)
+            else:
+                response.streaming_content = self.compress_sequence(encoder, chunks)
+            # The compressed length is unknown until the content is streamed.
+            del response.headers["Content-Length"]
+        else:
+            start = time.thread_time()
+            content = encoder.compress(response.content) + encoder.finish()
+            cpu_seconds = time.thread_time() - start
+            # Send the content as it is if it does not get any shorter.
+            if len(content) >= len(response.content):
+                return response
+            record_compression(
+                encoding, len(response.content), len(content), cpu_seconds
+            )
+            response.content = content
+            response.headers["Content-Length"] = str(len(content))
+
+        # A strong ETag promises the same bytes, which the compressed content
+        # is not, weak ETags still match conditional requests.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = f"W/{etag}"
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def get_encoder(self, encoding: str) -> Encoder:
+        """Return an encoder of the encoding at its level, padded if it
+        supports it."""
+        encoder_class = self.encoders[encoding]
+        if encoder_class.padded:
+            return encoder_class(self.levels[encoding], self.max_random_bytes)
+        return encoder_class(self.levels[encoding])
+
+    def compress_sequence(
+        self, encoder: Encoder, chunks: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """Compress and flush every chunk of a streaming response."""
+        input_bytes = output_bytes = 0
+        cpu_seconds = 0.0
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                start = time.thread_time()
+                compressed = encoder.compress(chunk) + encoder.flush()
+                cpu_seconds += time.thread_time() - start
+                input_bytes += len(chunk)
+                output_bytes += len(compressed)
+                yield compressed
+            start = time.thread_time()
+            compressed = encoder.finish()
+            cpu_seconds += time.thread_time() - start
+            output_bytes += len(compressed)
+            yield compressed
+        finally:
+            record_compression(encoder.encoding, input_bytes, output_bytes, cpu_seconds)
+
+    async def acompress_sequence(
+        self, encoder: Encoder, chunks: AsyncIterator[bytes]
+    ) -> AsyncIterator[bytes]:
+        """Compress and flush every chunk of an asynchronous streaming
+        response."""
+        input_bytes = output_bytes = 0
+        cpu_seconds = 0.0
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                start = time.thread_time()
+                compressed = encoder.compress(chunk) + encoder.flush()
+                cpu_seconds += time.thread_time() - start
+                input_bytes += len(chunk)
+                output_bytes += len(compressed)
+                yield compressed
+            start = time.thread_time()
+            compressed = encoder.finish()
+            cpu_seconds += time.thread_time() - start
+            output_bytes += len(compressed)
+            yield compressed
+        finally:
+            record_compression(encoder.encoding, input_bytes, output_bytes, cpu_seconds)
@@ -1,30 +1,178 @@
+"""This module provides the middleware logging every request.
+
+Every request is logged as one structured record with its route, view, method,
+status, latency, user, browser and the statistics of its queries, to the
+``middleware.logging`` logger at the INFO level. The request only builds the
+record: ``QueuedFileHandler`` hands it to a background thread, which formats
+it as a line of JSON with ``JSONFormatter`` and writes it to the log file.
+
+User-Agent headers are parsed with a regular expression per known browser,
+so the browser of each distinct header is parsed once and kept in a bounded
+LRU cache, since nearly all requests come from a few browsers.
+"""
+
+import json
 import logging
+import os
+import queue
 import time
-from datetime import date
+from datetime import datetime, timezone
+from functools import lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Awaitable, Callable
 
 import user_agents
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponseBase
+from django.utils.functional import LazyObject, empty
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def parse_browser(user_agent: str) -> tuple[str, str]:
+    """Return the browser family and version of a User-Agent header."""
+    browser = user_agents.parse(user_agent).browser
+    return browser.family, browser.version_string
 
 
 class LoggingMiddleWare:
+    """Logs the route, status, latency, user and browser of every request."""
+
+    sync_capable = True
+    async_capable = True
 
-    def __init__(self, get_response):
+    def __init__(self, get_response: Callable) -> None:
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
-        today = date.today()
-        start_time = time.time()
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
         response = self.get_response(request)
-        end_time = time.time()
-        response_time = end_time - start_time
-        user_agent = request.META.get("HTTP_USER_AGENT", "")
-        browser_type = user_agents.parse(user_agent).browser.family
-        browser_version = user_agents.parse(user_agent).browser.version_string
-
-        logger = logging.getLogger("django")
-        logger.warning(
-            f"{today} - user_id: {request.user.id}, "
-            f"user: {request.user.username}, "
-            f"browser: {browser_type}/{browser_version}, "
-            f"response time: {response_time} seconds"
-        )
+        latency = time.perf_counter() - start
+        if logger.isEnabledFor(logging.INFO):
+            self.log(request, response, latency, getattr(request, "user", None))
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        latency = time.perf_counter() - start
+        if logger.isEnabledFor(logging.INFO):
+            user = getattr(request, "user", None)
+            if isinstance(user, LazyObject) and user._wrapped is empty:
+                # The view has not loaded the user of the session, which is
+                # a query, and queries of asynchronous code go through auser.
+                user = await request.auser()
+            self.log(request, response, latency, user)
         return response
+
+    @staticmethod
+    def log(
+        request: HttpRequest, response: HttpResponseBase, latency: float, user: Any
+    ) -> None:
+        """Log the record of a request."""
+        browser, browser_version = parse_browser(
+            request.META.get("HTTP_USER_AGENT", "")
+        )
+        resolver_match = request.resolver_match
+        record: dict[str, Any] = {
+            "method": request.method,
+            "route": resolver_match.route if resolver_match is not None else None,
+            "view": resolver_match.view_name if resolver_match is not None else None,
+            "path": request.path,
+            "status": response.status_code,
+            "latency_ms": round(latency * 1000, 3),
+            "user_id": getattr(user, "id", None),
+            "user": getattr(user, "username", None),
+            "browser": browser,
+            "browser_version": browser_version,
+        }
+        query_stats = getattr(request, "query_stats", None)
+        if query_stats is not None:
+            record["queries"] = query_stats.count
+            record["sql_ms"] = round(query_stats.seconds * 1000, 3)
+            record["duplicate_queries"] = query_stats.duplicates
+        logger.info(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as a line of JSON.
+
+    The fields of records logged with a dict as the message are written as
+    fields of the line, any other message as the ``message`` field.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = (
+            record.msg
+            if isinstance(record.msg, dict)
+            else {"message": record.getMessage()}
+        )
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            **fields,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueuedFileHandler(QueueHandler):
+    """Hands records to a background thread that formats them and writes
+    them to a file, so that logging never waits for the disk.
+
+    Threads do not survive a fork, so a process forked from the one that
+    created the handler, like a gunicorn worker of a preloaded application,
+    starts its own queue and thread with its first record.
+    """
+
+    def __init__(self, filename: str, encoding: str | None = None) -> None:
+        """
+        :param filename: The file the records are appended to.
+        :param encoding: The encoding of the file.
+        """
+        super().__init__(queue.SimpleQueue())
+        self.file_handler = logging.FileHandler(filename, encoding=encoding, delay=True)
+        self.listener: QueueListener | None = None
+        self.start_listener()
+
+    def start_listener(self) -> None:
+        """Start the background thread of this process, with a new queue,
+        so that the records queued before a fork are not written twice."""
+        self.queue = queue.SimpleQueue()
+        self.listener = QueueListener(self.queue, self.file_handler)
+        self.listener.start()
+        self.pid = os.getpid()
+
+    def setFormatter(self, fmt: logging.Formatter | None) -> None:
+        """Format the records with the formatter in the background thread."""
+        super().setFormatter(fmt)
+        self.file_handler.setFormatter(fmt)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Queue the record as it is, it is formatted by the file handler."""
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue the record, for the thread of this process."""
+        # Records are emitted under the lock of the handler, so only one
+        # thread starts the listener of a forked process.
+        if self.pid != os.getpid():
+            self.start_listener()
+        super().enqueue(record)
+
+    def close(self) -> None:
+        """Write the queued records and close the file."""
+        if self.listener is not None and self.pid == os.getpid():
+            self.listener.stop()
+        self.listener = None
+        self.file_handler.close()
+        super().close()
@@ -0,0 +1,83 @@
+"""This module provides the middleware observing the metrics of requests.
+
+See ``Metrics.prometheus`` for the metrics. The middleware is placed before
+the compression middleware, so that the size of responses is the size they
+are sent with, and before the query instrumentation, whose statistics it
+reads. The size of streaming responses is not known and not observed.
+
+The middleware is asynchronous in an asynchronous middleware chain, as are
+the other middleware of the project, so that requests to asynchronous views
+never leave the event loop for the middleware.
+"""
+
+import time
+from typing import Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+
+from Metrics.prometheus import (
+    REQUEST_DB_TIME,
+    REQUEST_LATENCY,
+    REQUEST_SERIALIZER_TIME,
+    RESPONSE_SIZE,
+    get_method_label,
+    track_serializer_time,
+)
+
+
+class MetricsMiddleware:
+    """Observes the latency, SQL time, serializer time and response size of
+    every request per route, method and status."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        with track_serializer_time() as serializer_seconds:
+            response = self.get_response(request)
+        self.observe(
+            request, response, time.perf_counter() - start, serializer_seconds[0]
+        )
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        start = time.perf_counter()
+        with track_serializer_time() as serializer_seconds:
+            response = await self.get_response(request)
+        self.observe(
+            request, response, time.perf_counter() - start, serializer_seconds[0]
+        )
+        return response
+
+    @staticmethod
+    def observe(
+        request: HttpRequest,
+        response: HttpResponseBase,
+        latency: float,
+        serializer_seconds: float,
+    ) -> None:
+        """Observe the metrics of a request."""
+        resolver_match = request.resolver_match
+        labels = (
+            resolver_match.view_name if resolver_match is not None else "unmatched",
+            get_method_label(request.method),
+            str(response.status_code),
+        )
+        REQUEST_LATENCY.labels(*labels).observe(latency)
+        REQUEST_SERIALIZER_TIME.labels(*labels).observe(serializer_seconds)
+        query_stats = getattr(request, "query_stats", None)
+        if query_stats is not None:
+            REQUEST_DB_TIME.labels(*labels).observe(query_stats.seconds)
+        if isinstance(response, HttpResponse):
+            RESPONSE_SIZE.labels(*labels).observe(len(response.content))
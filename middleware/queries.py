@@ -0,0 +1,166 @@
+"""This module provides the middleware instrumenting the queries of requests.
+
+Every statement a request runs on any database connection is counted and
+timed through Django's execution wrappers. The wrapper is installed on every
+connection once, and counts the statements in the ``QueryStats`` of the
+context variable ``query_stats``, which the middleware sets for the request.
+Threads running the queries of asynchronous requests through
+``sync_to_async`` get a copy of the context, so their queries are counted
+for the request as well. The number of queries and the
+total SQL time are sent in the ``Server-Timing`` header of the response, and
+the statistics are kept on the request as ``request.query_stats`` for the
+logging middleware.
+
+A request running the same statement, with any parameters, at least as
+many times as the N_PLUS_ONE_THRESHOLD of the QUERY_INSTRUMENTATION setting
+is logged as a possible N+1 query. Queries a streaming response runs while
+its content is sent are not included.
+"""
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponseBase
+
+logger = logging.getLogger("django")
+
+
+class QueryStats:
+    """The number, time and repetitions of the queries of a request."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # Executions per statement, and per statement with its parameters.
+        self.statements: Counter[str] = Counter()
+        self.executions: Counter[tuple[str, str]] = Counter()
+
+    def __call__(
+        self,
+        execute: Callable,
+        sql: str,
+        params: Any,
+        many: bool,
+        context: dict[str, Any],
+    ) -> Any:
+        """Execute a statement and count it, as a database execution
+        wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+            self.executions[sql, repr(params)] += 1
+
+    @property
+    def duplicates(self) -> int:
+        """The number of executions repeating an earlier statement with the
+        same parameters."""
+        return sum(count - 1 for count in self.executions.values())
+
+    def most_repeated(self) -> tuple[str, int]:
+        """Return the statement run the most times, and how many times."""
+        if not self.statements:
+            return "", 0
+        return self.statements.most_common(1)[0]
+
+    def server_timing(self) -> str:
+        """Return the metric of the queries for the Server-Timing header."""
+        return (
+            f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries, '
+            f'{self.duplicates} duplicates"'
+        )
+
+
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def count_query(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict[str, Any]
+) -> Any:
+    """Execute a statement, counting it in the statistics of the current
+    request if there is one, as a database execution wrapper."""
+    stats = query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrument_connection(connection: BaseDatabaseWrapper, **kwargs) -> None:
+    """Install the execution wrapper counting the queries on a connection,
+    unless it already has it."""
+    if count_query not in connection.execute_wrappers:
+        # First, so that removing the last wrapper of an execute_wrapper()
+        # block still removes the wrapper of the block.
+        connection.execute_wrappers.insert(0, count_query)
+
+
+class QueryInstrumentationMiddleware:
+    """Counts and times the queries of every request."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.n_plus_one_threshold = settings.QUERY_INSTRUMENTATION[
+            "N_PLUS_ONE_THRESHOLD"
+        ]
+        # Connections created from now on are instrumented when they connect.
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(
+        self, request: HttpRequest
+    ) -> HttpResponseBase | Awaitable[HttpResponseBase]:
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = QueryStats()
+        setattr(request, "query_stats", stats)
+        token = query_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            query_stats.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponseBase:
+        stats = QueryStats()
+        setattr(request, "query_stats", stats)
+        token = query_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            query_stats.reset(token)
+        self.report(request, response, stats)
+        return response
+
+    def report(
+        self, request: HttpRequest, response: HttpResponseBase, stats: QueryStats
+    ) -> None:
+        """Send the statistics in the Server-Timing header, and log a possible
+        N+1 query."""
+        response.headers["Server-Timing"] = ", ".join(
+            filter(None, (response.get("Server-Timing"), stats.server_timing()))
+        )
+        statement, repetitions = stats.most_repeated()
+        if self.n_plus_one_threshold and repetitions >= self.n_plus_one_threshold:
+            logger.warning(
+                f"Possible N+1 query on {request.method} {request.path}: "
+                f"{repetitions} of {stats.count} queries ran {statement}"
+            )
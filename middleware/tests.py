@@ -0,0 +1,427 @@
+"""This module tests the negotiation of the encoding and the compression of
+regular and streaming responses, the instrumentation of the queries of
+requests and the request log."""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import tempfile
+import zlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, cast
+from unittest.mock import AsyncMock, patch
+
+import brotli
+import zstandard
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve
+from django.utils.functional import SimpleLazyObject
+from model_bakery import baker
+from prometheus_client import REGISTRY
+from user_agents import parse
+
+from middleware.compression import CompressionMiddleware, choose_encoding
+from middleware.logging import (
+    JSONFormatter,
+    LoggingMiddleWare,
+    QueuedFileHandler,
+    parse_browser,
+)
+from middleware.queries import QueryInstrumentationMiddleware, QueryStats
+from Users.models import CustomUser
+
+CONTENT = b'{"title": "A post", "content": "Lorem ipsum dolor sit amet."}' * 100
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda content: zstandard.ZstdDecompressor()
+    .decompressobj()
+    .decompress(content),
+}
+
+
+def run_async(middleware: Callable[[HttpRequest], Any], request: HttpRequest) -> Any:
+    """Run an asynchronous middleware chain on a request."""
+    return async_to_sync(middleware)(request)
+
+
+class ChooseEncodingTest(SimpleTestCase):
+    """Tests the negotiation of the encoding from Accept-Encoding."""
+
+    preference = ["zstd", "br", "gzip"]
+
+    def test_choose_encoding(self) -> None:
+        """Checks that the quality values of the client decide first."""
+        for header, expected in (
+            ("gzip, deflate, br, zstd", "zstd"),
+            ("gzip, deflate, br", "br"),
+            ("GZIP", "gzip"),
+            ("br;q=0.5, gzip", "gzip"),
+            ("zstd;q=0, *", "br"),
+            ("*;q=0.1, gzip;q=0.2", "gzip"),
+            ("gzip;q=invalid, br;q=2", None),
+            ("identity, deflate", None),
+            ("*;q=0", None),
+            ("", None),
+        ):
+            with self.subTest(header):
+                self.assertEqual(choose_encoding(header, self.preference), expected)
+
+
+@override_settings(
+    RESPONSE_COMPRESSION={
+        "MIN_LENGTH": 1024,
+        "LEVELS": {"zstd": 3, "br": 4, "gzip": 6},
+        "MAX_RANDOM_BYTES": 100,
+    }
+)
+class CompressionMiddlewareTest(SimpleTestCase):
+    """Tests the compression of responses."""
+
+    def compress(
+        self, response, accept_encoding: str = "gzip, br, zstd", **headers: Any
+    ):
+        request = RequestFactory().get(
+            "/", HTTP_ACCEPT_ENCODING=accept_encoding, **headers
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_compress_every_encoding(self) -> None:
+        """Checks that every encoding decompresses to the content."""
+        for encoding, decompress in DECOMPRESS.items():
+            with self.subTest(encoding):
+                response = self.compress(HttpResponse(CONTENT), encoding)
+                self.assertEqual(response["Content-Encoding"], encoding)
+                self.assertEqual(response["Vary"], "Accept-Encoding")
+                self.assertEqual(int(response["Content-Length"]), len(response.content))
+                self.assertEqual(decompress(response.content), CONTENT)
+
+    def test_short_content_not_compressed(self) -> None:
+        """Checks that responses below the minimum length are sent as they
+        are."""
+        response = self.compress(HttpResponse(CONTENT[:1000]))
+        self.assertNotIn("Content-Encoding", response)
+        self.assertNotIn("Vary", response)
+
+    def test_not_accepted(self) -> None:
+        """Checks that the content is not compressed without an accepted
+        encoding, but that caches still vary on Accept-Encoding."""
+        response = self.compress(HttpResponse(CONTENT), "identity")
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+        self.assertEqual(response.content, CONTENT)
+
+    def test_encoded_response_not_compressed(self) -> None:
+        """Checks that a response with a Content-Encoding is left alone."""
+        response = HttpResponse(gzip.compress(CONTENT) * 10)
+        response["Content-Encoding"] = "gzip"
+        content = response.content
+        self.assertEqual(self.compress(response, "br").content, content)
+
+    def test_etag_weakened(self) -> None:
+        """Checks that strong ETags of compressed responses become weak."""
+        response = HttpResponse(CONTENT)
+        response["ETag"] = '"abc"'
+        self.assertEqual(self.compress(response)["ETag"], 'W/"abc"')
+
+    def test_stream_compressed_chunk_by_chunk(self) -> None:
+        """Checks that every chunk of a streaming response can be
+        decompressed as soon as it is received."""
+        chunks = [CONTENT[:100], b"", CONTENT[100:]]
+        response = self.compress(StreamingHttpResponse(iter(chunks)), "gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        received = [
+            decompressor.decompress(chunk) for chunk in response.streaming_content
+        ]
+        self.assertEqual(received[:2], [CONTENT[:100], CONTENT[100:]])
+        self.assertEqual(b"".join(received), CONTENT)
+        self.assertTrue(decompressor.eof)
+
+    def test_async_stream_compressed(self) -> None:
+        """Checks that asynchronous streaming responses are compressed."""
+
+        async def chunks():
+            yield CONTENT[:100]
+            yield CONTENT[100:]
+
+        async def read(response) -> bytes:
+            return b"".join([chunk async for chunk in response.streaming_content])
+
+        response = self.compress(StreamingHttpResponse(chunks()), "zstd")
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        self.assertEqual(DECOMPRESS["zstd"](asyncio.run(read(response))), CONTENT)
+
+    def test_async_middleware(self) -> None:
+        """Checks that responses of an asynchronous middleware chain are
+        compressed without leaving the event loop."""
+
+        async def get_response(request):
+            return HttpResponse(CONTENT)
+
+        middleware = CompressionMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="br")
+        response = run_async(middleware, request)
+        self.assertEqual(DECOMPRESS["br"](response.content), CONTENT)
+
+    def test_compression_counted(self) -> None:
+        """Checks that the sizes and CPU time are counted per encoding."""
+        names = (
+            "http_compressed_responses_total",
+            "http_compression_input_bytes_total",
+            "http_compression_output_bytes_total",
+            "http_compression_cpu_seconds_total",
+        )
+
+        def get_samples() -> list[float]:
+            return [
+                REGISTRY.get_sample_value(name, {"encoding": "br"}) or 0.0
+                for name in names
+            ]
+
+        before = get_samples()
+        response = self.compress(HttpResponse(CONTENT), "br")
+        streaming = self.compress(StreamingHttpResponse([CONTENT]), "br")
+        streamed = b"".join(streaming.streaming_content)
+        responses, input_bytes, output_bytes, cpu_seconds = (
+            after - value for after, value in zip(get_samples(), before)
+        )
+        self.assertEqual(responses, 2)
+        self.assertEqual(input_bytes, len(CONTENT) * 2)
+        self.assertEqual(output_bytes, len(response.content) + len(streamed))
+        self.assertGreaterEqual(cpu_seconds, 0)
+
+    def test_gzip_padded(self) -> None:
+        """Checks that gzip responses are padded with a file name of a
+        random length."""
+        lengths = set()
+        for _ in range(20):
+            content = self.compress(HttpResponse(CONTENT), "gzip").content
+            self.assertEqual(content[3], gzip.FNAME)
+            self.assertEqual(gzip.decompress(content), CONTENT)
+            lengths.add(len(content))
+        self.assertGreater(len(lengths), 1)
+
+    @override_settings(
+        RESPONSE_COMPRESSION={
+            "MIN_LENGTH": 1024,
+            "LEVELS": {"gzip": 6},
+            "MAX_RANDOM_BYTES": 0,
+        }
+    )
+    def test_gzip_not_padded(self) -> None:
+        """Checks that the padding can be turned off."""
+        content = self.compress(HttpResponse(CONTENT), "gzip").content
+        self.assertEqual(content, self.compress(HttpResponse(CONTENT), "gzip").content)
+        self.assertEqual(content[3], 0)
+        self.assertEqual(gzip.decompress(content), CONTENT)
+
+    def test_unpadded_encodings_not_sent_with_cookies(self) -> None:
+        """Checks that requests with cookies only get padded encodings."""
+        response = self.compress(
+            HttpResponse(CONTENT), "br, zstd, gzip;q=0.5", HTTP_COOKIE="sessionid=a"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        response = self.compress(
+            HttpResponse(CONTENT), "br, zstd", HTTP_COOKIE="sessionid=a"
+        )
+        self.assertNotIn("Content-Encoding", response)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+
+@override_settings(QUERY_INSTRUMENTATION={"N_PLUS_ONE_THRESHOLD": 3})
+class QueryInstrumentationMiddlewareTest(TestCase):
+    """Tests the counting of the queries of requests."""
+
+    def instrument(self, get_response):
+        request = RequestFactory().get("/api/posts/")
+        response = QueryInstrumentationMiddleware(get_response)(request)
+        return request, response
+
+    def test_queries_counted(self) -> None:
+        """Checks that the queries, their time and the duplicates are in the
+        Server-Timing header and on the request."""
+        user = baker.make(CustomUser)
+
+        def get_response(request):
+            CustomUser.objects.get(id=user.id)
+            CustomUser.objects.get(id=user.id)
+            CustomUser.objects.filter(id=0).exists()
+            return HttpResponse()
+
+        request, response = self.instrument(get_response)
+        self.assertEqual(request.query_stats.count, 3)
+        self.assertEqual(request.query_stats.duplicates, 1)
+        self.assertGreater(request.query_stats.seconds, 0)
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=\d+\.\d\d;desc="3 queries, 1 duplicates"$',
+        )
+
+    def test_async_queries_counted(self) -> None:
+        """Checks that the queries asynchronous views run in other threads
+        are counted for their request."""
+
+        async def get_response(request):
+            await CustomUser.objects.filter(id=0).aexists()
+            await CustomUser.objects.filter(id=0).aexists()
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = RequestFactory().get("/api/posts/")
+        response = run_async(middleware, request)
+        self.assertEqual(getattr(request, "query_stats").count, 2)
+        self.assertIn('desc="2 queries, 1 duplicates"', response["Server-Timing"])
+
+    def test_queries_outside_requests_not_counted(self) -> None:
+        """Checks that queries after the response are not counted."""
+        request, _ = self.instrument(lambda request: HttpResponse())
+        CustomUser.objects.filter(id=0).exists()
+        self.assertEqual(request.query_stats.count, 0)
+
+    def test_server_timing_appended(self) -> None:
+        """Checks that metrics already in the header are kept."""
+        response = HttpResponse()
+        response["Server-Timing"] = "cache;desc=hit"
+        _, response = self.instrument(lambda request: response)
+        self.assertEqual(
+            response["Server-Timing"],
+            'cache;desc=hit, db;dur=0.00;desc="0 queries, 0 duplicates"',
+        )
+
+    def test_n_plus_one_logged(self) -> None:
+        """Checks that a statement repeated with other parameters up to the
+        threshold is logged."""
+
+        def get_response(request):
+            for user_id in range(3):
+                CustomUser.objects.filter(id=user_id).first()
+            return HttpResponse()
+
+        with self.assertLogs("django", "WARNING") as logs:
+            self.instrument(get_response)
+        self.assertIn("Possible N+1 query on GET /api/posts/: 3 of 3", logs.output[0])
+
+    def test_below_threshold_not_logged(self) -> None:
+        """Checks that fewer repetitions are not logged."""
+
+        def get_response(request):
+            for user_id in range(2):
+                CustomUser.objects.filter(id=user_id).first()
+            return HttpResponse()
+
+        with self.assertNoLogs("django", "WARNING"):
+            self.instrument(get_response)
+
+
+class LoggingMiddleWareTest(SimpleTestCase):
+    """Tests the records of the request log and how they are written."""
+
+    user_agent = (
+        "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0"
+    )
+
+    def setUp(self) -> None:
+        parse_browser.cache_clear()
+
+    def log_request(self, status: int = 200) -> dict[str, Any]:
+        request = RequestFactory().get("/api/posts/", HTTP_USER_AGENT=self.user_agent)
+        request.resolver_match = resolve("/api/posts/")
+        setattr(request, "query_stats", QueryStats())
+        with self.assertLogs("middleware.logging", "INFO") as logs:
+            LoggingMiddleWare(lambda request: HttpResponse(status=status))(request)
+        return cast(dict[str, Any], logs.records[0].msg)
+
+    def test_record(self) -> None:
+        """Checks the fields of the record of a request."""
+        record = self.log_request(status=201)
+        self.assertEqual(record["method"], "GET")
+        self.assertEqual(record["route"], "api/posts/$")
+        self.assertEqual(record["view"], "posts-list")
+        self.assertEqual(record["path"], "/api/posts/")
+        self.assertEqual(record["status"], 201)
+        self.assertGreaterEqual(record["latency_ms"], 0)
+        self.assertEqual(record["browser"], "Firefox")
+        self.assertEqual(record["browser_version"], "125.0")
+        self.assertEqual(record["queries"], 0)
+
+    def test_async_request_logged(self) -> None:
+        """Checks that an asynchronous middleware chain loads a user the view
+        has not loaded with auser."""
+
+        async def get_response(request):
+            return HttpResponse()
+
+        def load_user():
+            raise AssertionError("The user is loaded synchronously.")
+
+        request = RequestFactory().get("/metrics", HTTP_USER_AGENT=self.user_agent)
+        request.resolver_match = None
+        setattr(request, "user", SimpleLazyObject(load_user))
+        request.auser = AsyncMock(return_value=SimpleNamespace(id=1, username="a"))
+        middleware = LoggingMiddleWare(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        with self.assertLogs("middleware.logging", "INFO") as logs:
+            run_async(middleware, request)
+        record = cast(dict[str, Any], logs.records[0].msg)
+        self.assertEqual(record["user_id"], 1)
+        self.assertEqual(record["browser"], "Firefox")
+
+    def test_user_agent_parsed_once(self) -> None:
+        """Checks that a User-Agent seen before is not parsed again."""
+        with patch("middleware.logging.user_agents.parse", wraps=parse) as parsed:
+            self.log_request()
+            self.log_request()
+        parsed.assert_called_once_with(self.user_agent)
+
+    def test_json_lines_written_in_background(self) -> None:
+        """Checks that the queued records are written as lines of JSON."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "requests.log"
+            handler = QueuedFileHandler(str(path))
+            handler.setFormatter(JSONFormatter())
+            test_logger = logging.getLogger("middleware.tests.queued")
+            test_logger.addHandler(handler)
+            try:
+                test_logger.warning({"status": 200, "route": "api/posts/"})
+                test_logger.warning("Plain %s", "message")
+            finally:
+                test_logger.removeHandler(handler)
+                handler.close()
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertEqual(lines[0]["status"], 200)
+        self.assertEqual(lines[0]["level"], "WARNING")
+        self.assertEqual(lines[0]["logger"], "middleware.tests.queued")
+        self.assertEqual(lines[1]["message"], "Plain message")
+
+    def test_records_written_after_fork(self) -> None:
+        """Checks that a forked process, like a worker of a preloaded
+        application, writes its records with a thread of its own."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "requests.log"
+            handler = QueuedFileHandler(str(path))
+            handler.setFormatter(JSONFormatter())
+            test_logger = logging.getLogger("middleware.tests.forked")
+            test_logger.addHandler(handler)
+            try:
+                test_logger.warning({"process": "parent"})
+                pid = os.fork()
+                if pid == 0:
+                    try:
+                        test_logger.warning({"process": "child"})
+                        handler.close()
+                    finally:
+                        os._exit(0)
+                os.waitpid(pid, 0)
+            finally:
+                test_logger.removeHandler(handler)
+                handler.close()
+            lines = [json.loads(line) for line in path.read_text().splitlines()]
+        self.assertCountEqual([line["process"] for line in lines], ["parent", "child"])